@@ -20,6 +20,20 @@ bool systemActive = false;
 #define FORCE_SENSOR2_PIN A1
 #define FORCE_SENSOR3_PIN A2
 
+// === Output Format ===
+// 0: comma-separated ASCII lines, 1: fixed-size binary frames (see sensor_protocol.py)
+#define BINARY_MODE 0
+
+// Binary frame layout (36 bytes, little-endian):
+// sync u16 | type u8 | reserved u8 | seq u16 | timestamp_us u32 | 12 x i16 values | crc16 u16
+#define FRAME_SYNC 0xA55A
+#define FRAME_SAMPLE 0
+#define FRAME_ACTIVATED 1
+#define FRAME_DEACTIVATED 2
+#define FRAME_SIZE 36
+
+uint16_t frameSeq = 0;
+
 void setup() {
     Serial.begin(115200); // Increase baud rate for faster transmission if needed
     Wire.begin();    
@@ -53,7 +67,10 @@ void loop() {
         buttonPressed = false;
 
         // Notify the user of the current state
-        if (systemActive) {
+        if (BINARY_MODE) {
+            int16_t noValues[12] = {0};
+            sendFrame(systemActive ? FRAME_ACTIVATED : FRAME_DEACTIVATED, noValues);
+        } else if (systemActive) {
             Serial.println("System Activated");
         } else {
             Serial.println("System Deactivated");
@@ -93,6 +110,16 @@ void readSensors() {
     int forceReading2 = analogRead(FORCE_SENSOR2_PIN);
     int forceReading3 = analogRead(FORCE_SENSOR3_PIN);
 
+    if (BINARY_MODE) {
+        int16_t values[12] = {
+            acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z,
+            clampInt16(mag_x), clampInt16(mag_y), clampInt16(mag_z),
+            (int16_t)forceReading1, (int16_t)forceReading2, (int16_t)forceReading3
+        };
+        sendFrame(FRAME_SAMPLE, values);
+        return;
+    }
+
     // === Output All Data to Serial Monitor (CSV Format) ===
     Serial.print(acc_x);
     Serial.print(", ");
@@ -119,6 +146,47 @@ void readSensors() {
     Serial.println(forceReading3);
 }
 
+int16_t clampInt16(int32_t value) {
+    return (int16_t)constrain(value, -32768, 32767);
+}
+
+// CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF)
+uint16_t crc16(const uint8_t *data, size_t length) {
+    uint16_t crc = 0xFFFF;
+    for (size_t i = 0; i < length; i++) {
+        crc ^= (uint16_t)data[i] << 8;
+        for (uint8_t bit = 0; bit < 8; bit++) {
+            crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+        }
+    }
+    return crc;
+}
+
+void putUint16(uint8_t *out, uint16_t value) {
+    out[0] = value & 0xFF;
+    out[1] = value >> 8;
+}
+
+void sendFrame(uint8_t type, const int16_t *values) {
+    uint8_t frame[FRAME_SIZE];
+    uint32_t timestamp = micros();
+
+    putUint16(frame, FRAME_SYNC);
+    frame[2] = type;
+    frame[3] = 0;
+    putUint16(frame + 4, frameSeq++);
+    for (int i = 0; i < 4; i++) {
+        frame[6 + i] = (timestamp >> (8 * i)) & 0xFF;
+    }
+    for (int i = 0; i < 12; i++) {
+        putUint16(frame + 10 + 2 * i, (uint16_t)values[i]);
+    }
+    // CRC covers everything after the sync word
+    putUint16(frame + FRAME_SIZE - 2, crc16(frame + 2, FRAME_SIZE - 4));
+
+    Serial.write(frame, FRAME_SIZE);
+}
+
 void calibrateIMU() {
     Serial.println("Starting IMU Calibration...");
 
@@ -11,8 +11,14 @@ from tensorflow.keras.models import load_model
 from tensorflow.keras.preprocessing.sequence import pad_sequences
 from sklearn.preprocessing import StandardScaler
 import tensorflow.keras.backend as K
-from tensorflow.keras import layers
 from all_sensors.all_sensors.characters import get_complete_set
+from all_sensors.all_sensors.ring_buffer import RingBuffer
+from all_sensors.all_sensors.serial_ingest import SerialIngest, SAMPLES
+from all_sensors.all_sensors.sensor_protocol import BinaryIngest
+from all_sensors.all_sensors.ctc_decoding import build_index_to_char, greedy_decode
+from all_sensors.all_sensors.normalization import load_normalizer
+from all_sensors.all_sensors.inference import load_vocabulary
+from all_sensors.all_sensors.metrics import Metrics, MetricsExporter, instrument_ingest
 
 # working directory should be NeverLateX
 # run command: sudo python3 /Users/tunakisaga/Documents/GitHub/NeverLateX/all_sensors/all_sensors_only_prediction.py
@@ -46,45 +52,26 @@ def ctc_loss(y_true, y_pred):
 
     return loss
           
-def decode_predictions(logits, num_to_char):
-    # Use CTC greedy decoder to convert logits to sequences
-    decoded_predictions, _ = tf.nn.ctc_greedy_decoder(
-        tf.transpose(logits, [1, 0, 2]),  # Transpose for time-major format
-        tf.fill([tf.shape(logits)[0]], tf.shape(logits)[1])  # Input length
-    )
-
-    # Convert the sparse tensor to dense format
-    dense_predictions = tf.sparse.to_dense(decoded_predictions[0], default_value=0)
-
-    # Convert from numeric indices to characters using `num_to_char` mapping
-    predicted_texts = [
-        ''.join(num_to_char(index).numpy().decode('utf-8') for index in prediction if index > 0)
-        for prediction in dense_predictions
-    ]
-
-    return predicted_texts
-
 # Define a blank token for CTC decoding
 blank_token = 'BLANK'
 dataset = get_complete_set()
 characters = set(char for label in dataset for char in label)
-# Update the StringLookup layers with the extended vocabulary
-char_to_num = layers.StringLookup(
-    vocabulary=list(characters), mask_token=None, oov_token=blank_token
-)
-num_to_char = layers.StringLookup(
-    vocabulary=char_to_num.get_vocabulary(), mask_token=None, invert=True
-)
 
 ##################################################################################################################################
            
 # === Configuration ===
 serial_port = '/dev/tty.usbmodem101'  # Change as needed (e.g., 'COM3' for Windows)
 baud_rate = 9600  # Must match Arduino's baud rate
+serial_protocol = 'ascii'  # 'ascii' or 'binary', must match BINARY_MODE in the firmware
 model_folder = "all_sensors/model_parameters"  # Folder containing trained models (.h5)
 model_filename = "cnn_model.h5"  # Change based on the model to use ("cnn_model.h5" or "cldnn_model.h5")
 prediction_file_name = "predicted_characters.csv"
 max_sequence_length = 64  # Ensure consistency with model training
+buffer_capacity = 20000  # Max samples kept per recording (~20 s at 1 kHz), older ones are dropped
+metrics_enabled = False  # Per-stage latency histograms and counters (metrics.py); when False nothing is instrumented
+metrics_path = "all_sensors/benchmark_results/live_metrics.jsonl"  # JSON snapshot appended every metrics_interval seconds
+metrics_interval = 10.0
+metrics_port = 9108  # Prometheus text endpoint http://127.0.0.1:9108/metrics, None for none
 
 # === Load Trained Model ===
 model_path = os.path.join(model_folder, model_filename)
@@ -94,6 +81,8 @@ if os.path.exists(model_path):
 else:
     print(f"❌ ERROR: Model file {model_path} not found!")
     model = None  # Prevent crashes if model is missing
+# Class order the model was trained with, saved next to it
+index_to_char = build_index_to_char(load_vocabulary(model_path, characters, blank_token))
 
 # === Prepare CSV Logging ===
 current_directory = os.getcwd()
@@ -103,57 +92,74 @@ prediction_path = os.path.join(current_directory, "all_sensors/predicted_data",
 noise = ['noise']
 all_characters = noise + dataset
 
-all_buffer = []  # Buffer to store all data during recording
+all_buffer = RingBuffer(buffer_capacity, 12)  # Buffer to store all data during recording
 predicted_characters = {}
 
-# Initialize StandardScaler for consistency with training
+# Training scaler statistics saved next to the model, else fit a StandardScaler per recording
+normalizer = load_normalizer(model_path, 'global')
 scaler = StandardScaler()
 
 # Define feature set for CSV 
 feature_set = ['Timestamp', 'Acc_X', 'Acc_Y', 'Acc_Z', 'Gyro_X', 'Gyro_Y', 'Gyro_Z', 'Mag_X', 'Mag_Y', 'Mag_Z', 'Force1', 'Force2', 'Force3', 'Letter']
 
+# === Metrics ===
+# Stages are wrapped once here; the serial read and parse are wrapped when the port opens
+metrics = Metrics() if metrics_enabled else None
+exporter = None
+if metrics is not None:
+    all_buffer.append = metrics.timed('buffer', all_buffer.append)
+    if normalizer is not None:
+        normalizer = metrics.timed('normalize', normalizer)
+    scaler.fit_transform = metrics.timed('normalize', scaler.fit_transform)
+    if model is not None:
+        model.predict = metrics.timed('predict', model.predict)
+    greedy_decode = metrics.timed('ctc_decode', greedy_decode)
+    metrics.gauge('buffer_fill_samples', lambda: len(all_buffer))
+    exporter = MetricsExporter(metrics, metrics_path, metrics_interval, metrics_port)
+
 # === Open Serial Connection & CSV File ===
 try:
     with serial.Serial(serial_port, baud_rate, timeout=1) as ser, open(prediction_path, mode='w', newline='') as prediction_file:
         prediction_writer = csv.writer(prediction_file)
         prediction_writer.writerow(['Timestamp', 'Best Prediction'])
 
+        ingest = BinaryIngest(ser, len(feature_set)-2) if serial_protocol == 'binary' else SerialIngest(ser, len(feature_set)-2)
+        if metrics is not None:
+            instrument_ingest(metrics, ingest)
         while True:
             try:
-                line = ser.readline().decode('utf-8').strip()
-
-                # === Handle Start/Stop Recording ===
-                if line == 'System Deactivated':
-                    print("🛑 Recording stopped. See the prediction below:\n")
-
-                    if model is not None and len(all_buffer) > 0:
-                        all_data_np = np.array(all_buffer, dtype=np.float32)
-                        all_data_np = scaler.fit_transform(all_data_np)
-                        all_data_np = pad_sequences([all_data_np], maxlen=max_sequence_length, padding='post', dtype='float32')
-                        all_data_np = all_data_np.reshape(1, all_data_np.shape[1], all_data_np.shape[2])
-
-                        preds = model.predict(all_data_np)
-                        pred = decode_predictions(preds)
-
-                        # Get current timestamp
-                        now = datetime.now()
-                        timestamp = str(now.strftime('%Y-%m-%d %H:%M:%S') + f".{now.microsecond // 1000:03d}")
-                        predicted_characters[timestamp] = pred  # Store best prediction
-                        prediction_writer.writerow([timestamp, pred])
-                        print(f"🔠 Best Prediction: {pred}")
+                for kind, payload in ingest.read():
+
+                    # === Handle Start/Stop Recording ===
+                    if payload == 'System Deactivated':
+                        print("🛑 Recording stopped. See the prediction below:\n")
+
+                        if model is not None and len(all_buffer) > 0:
+                            all_data_np = all_buffer.view()
+                            all_data_np = normalizer(all_data_np.copy()) if normalizer is not None else scaler.fit_transform(all_data_np)
+                            all_data_np = pad_sequences([all_data_np], maxlen=max_sequence_length, padding='post', dtype='float32')
+                            all_data_np = all_data_np.reshape(1, all_data_np.shape[1], all_data_np.shape[2])
+
+                            preds = model.predict(all_data_np)
+                            pred = greedy_decode(preds, index_to_char)[0]
+
+                            # Get current timestamp
+                            now = datetime.now()
+                            timestamp = str(now.strftime('%Y-%m-%d %H:%M:%S') + f".{now.microsecond // 1000:03d}")
+                            predicted_characters[timestamp] = pred  # Store best prediction
+                            prediction_writer.writerow([timestamp, pred])
+                            print(f"🔠 Best Prediction: {pred}")
                         
-                    all_buffer.clear()  # Reset buffer after prediction
+                        all_buffer.clear()  # Reset buffer after prediction
 
-                elif line == 'System Activated':
-                    print("✅ System started predicting...")
-                    all_buffer.clear()
+                    elif payload == 'System Activated':
+                        print("✅ System started predicting...")
+                        all_buffer.clear()
 
-                # === Read All Data ===
-                elif len(line.split(',')) == len(feature_set)-2:
-                    data = line.split(',')
-                    # Store in buffer for prediction
-                    all_buffer.append([float(value) for value in data[0:len(feature_set)]])  # Exclude timestamp and label  
-                    firstLetter = False
+                    # === Read All Data ===
+                    elif kind == SAMPLES:
+                        # Store in buffer for prediction
+                        all_buffer.append(payload)
 
             except Exception as e:
                 print(f"⚠️ Error predicting data: {e}")
@@ -166,6 +172,9 @@ except KeyboardInterrupt:
 except Exception as e:
     print(f"❌ Failed to open serial port or file: {e}")
     report_predicted_characters(predicted_characters)
+finally:
+    if exporter is not None:
+        exporter.close()
 
 
     
\ No newline at end of file
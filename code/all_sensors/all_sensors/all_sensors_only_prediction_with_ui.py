@@ -3,35 +3,57 @@ import csv
 import time
 import os
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from sklearn.preprocessing import StandardScaler
-from tensorflow.keras import layers
 from characters import get_complete_set
+from inference import IncrementalPredictor, load_vocabulary, standardize_chunks
+from model_backends import load_backend
+from ctc_decoding import build_index_to_char, greedy_decode, beam_search_decode, LexiconTrie
+from ring_buffer import RingBuffer
+from serial_ingest import SerialIngest, SAMPLES
+from sensor_protocol import BinaryIngest
+from normalization import load_normalizer
+from pen_activity import PenActivityDetector, PenGate
+from metrics import Metrics, MetricsExporter, instrument_ingest
 from datetime import datetime
-import tkinter as tk
-from tkinter.scrolledtext import ScrolledText
+from prediction_ui import start_ui
 import threading
 import queue
-from tkinter import Label, PhotoImage
-from PIL import Image, ImageTk  # Required for resizing the image
+
+# TensorFlow is only imported when the model loads, so with startup_mode = 'background'
+# the UI and serial port open at once and samples are buffered while the model loads and warms up.
+startup_start = time.perf_counter()
 
 # === Configuration ===
 serial_port = '/dev/tty.usbmodem101' 
 baud_rate = 115200
+serial_protocol = 'ascii'  # 'ascii' or 'binary', must match BINARY_MODE in the firmware
 model_folder = "all_sensors/model_parameters"
-model_filename = "cldnn_full_model.h5"
+model_filename = "cldnn_full_model.h5"  # or "cldnn_compact_model.h5", the distilled student from distill_cldnn.py
+model_backend = 'keras'  # 'keras' or 'tflite' (run export_tflite.py first)
+tflite_variant = 'float16'  # 'float16', 'dynamic' or 'int8'
+inference_mode = 'windowed'  # 'windowed' (overlapping chunks) or 'streaming' (streaming CLDNN, carried state)
+streaming_model_filename = "cldnn_streaming_model.h5"
 prediction_file_name = "predicted_characters.csv"
 window_size = 1500  # Can be any value
 window_step = int(window_size/4) # Move forward by this step
+decoder = 'greedy'  # 'greedy' or 'beam' (prefix beam search)
+beam_width = 8
+use_lexicon = True  # Beam search only: restrict output to entries of get_complete_set()
+normalization = 'global'  # 'global' (training scaler), 'running' (drift-tracking) or 'per_chunk' (legacy)
+startup_mode = 'background'  # 'background' (UI and serial first, model loads in parallel) or 'blocking'
+pen_gating = True  # Skip hops while the pen is lifted (force channels at their resting baseline)
+pen_on_threshold = 150  # Raw force that puts the pen down
+pen_off_threshold = 100  # Raw force below which the pen is up again
+pen_hold_samples = 50  # Samples a stroke stays active after the pen was last down
+metrics_enabled = False  # Per-stage latency histograms and counters (metrics.py); when False nothing is instrumented
+metrics_path = "all_sensors/benchmark_results/live_metrics.jsonl"  # JSON snapshot appended every metrics_interval seconds
+metrics_interval = 10.0
+metrics_port = 9108  # Prometheus text endpoint http://127.0.0.1:9108/metrics, None for none
 
 # === Setup Character Encoding ===
 blank_token = 'BLANK'
 dataset = get_complete_set()
 characters = set(char for label in dataset for char in label)
-char_to_num = layers.StringLookup(vocabulary=list(characters), mask_token=None, oov_token=blank_token)
-num_to_char = layers.StringLookup(vocabulary=char_to_num.get_vocabulary(), mask_token=None, invert=True)
+lexicon = LexiconTrie(dataset) if use_lexicon else None
 
 # === CSV Logging Setup ===
 current_directory = os.getcwd()
@@ -40,76 +62,105 @@ feature_set = ['Acc_X', 'Acc_Y', 'Acc_Z', 'Gyro_X', 'Gyro_Y', 'Gyro_Z',
                'Mag_X', 'Mag_Y', 'Mag_Z', 'Force1', 'Force2', 'Force3']
 
 # === Buffer and Queue ===
-all_buffer = []
+all_buffer = RingBuffer(window_size, len(feature_set))
 predicted_characters = {}
-scaler = StandardScaler()
 prediction_queue = queue.Queue()
+gate = PenGate(PenActivityDetector(pen_on_threshold, pen_off_threshold, pen_hold_samples), window_step) if pen_gating else None
+metrics = Metrics() if metrics_enabled else None
 
 # === Load Model and Get Expected Input Shape ===
-model_path = os.path.join(model_folder, model_filename)
-try:
-    model = load_model(model_path, custom_objects={'ctc_loss': lambda y_true, y_pred: y_pred})
-    model_input_shape = model.input_shape[1]  # Get expected time step length
+model_path = os.path.join(model_folder, streaming_model_filename if inference_mode == 'streaming' else model_filename)
+normalizer = load_normalizer(model_path, normalization)
+index_to_char = build_index_to_char(load_vocabulary(model_path, characters, blank_token))  # Class order of the model's training
+predictor = None
+model_ready = threading.Event()
+startup_times = {}  # Seconds since start: 'ui', 'model_ready', 'first_prediction'
+
+def create_predictor():
+    """Imports TensorFlow, loads the model and wraps it for the live loop."""
+    if inference_mode == 'streaming':
+        from streaming_cldnn import StreamingPredictor, load_streaming_models
+        if normalizer is None:
+            print("⚠️ The streaming model expects samples normalized with its training scaler")
+        print("Streaming model loaded successfully!")
+        return StreamingPredictor(*load_streaming_models(model_path))  # Only runs the new samples of each hop
+
+    backend = load_backend(model_backend, model_path, len(feature_set), tflite_variant)
+    model_input_shape = backend.chunk_size  # Get expected time step length
     print(f"Model loaded successfully! Expected input time steps: {model_input_shape}")
-except Exception as e:
-    print(f"Error loading model: {e}")
+    if normalizer is None:
+        return IncrementalPredictor(lambda batch: backend(standardize_chunks(batch)), model_input_shape)
+    return IncrementalPredictor(backend, model_input_shape)  # Buffer already holds normalized samples
 
-# === Adjust Window Size Dynamically ===
-def adjust_window_size(data, target_size):
+def warm_up(predictor):
     """
-    Adjusts the window size dynamically to fit the model's input shape.
-    - Truncate if too long
-    - Pad with zeros if too short
+    Runs a full dummy window and one dummy hop, so graph tracing and buffer
+    allocation happen before the first real prediction.
     """
-    if len(data) > target_size:
-        return data[:target_size]  # Truncate
-    elif len(data) < target_size:
-        pad_width = target_size - len(data)
-        return np.pad(data, ((0, pad_width), (0, 0)), mode='constant')  # Zero padding
-    return data
-
-# === Decode Predictions ===
-def decode_predictions(logits, num_to_char):
-    decoded_predictions, _ = tf.nn.ctc_greedy_decoder(
-        tf.transpose(logits, [1, 0, 2]),  
-        tf.fill([tf.shape(logits)[0]], tf.shape(logits)[1])
-    )
-    dense_predictions = tf.sparse.to_dense(decoded_predictions[0], default_value=0)
-    predicted_texts = [
-        ''.join(num_to_char(index).numpy().decode('utf-8') for index in prediction if index > 0)
-        for prediction in dense_predictions
-    ]
-    return predicted_texts
+    dummy = np.zeros((window_size + window_step, len(feature_set)), dtype=np.float32)
+    predictor.update(dummy[:window_size], 0)
+    predictor.update(dummy[window_step:], window_step)
+    predictor.reset()
 
-# === Predict in Chunks and Merge Outputs ===
-def process_chunks_and_predict(buffer):
+def model_loading_thread():
+    global predictor
+    try:
+        load_start = time.perf_counter()
+        loaded = create_predictor()
+        warm_up(loaded)
+        if metrics is not None:
+            loaded.update = metrics.timed('predict', loaded.update)  # Warm-up stays out of the histogram
+        predictor = loaded
+        startup_times['model_ready'] = time.perf_counter() - startup_start
+        print(f"⏱️ Model loaded and warmed up in {time.perf_counter() - load_start:.2f} s "
+              f"({startup_times['model_ready']:.2f} s after start)")
+        model_ready.set()
+    except Exception as e:
+        print(f"Error loading model: {e}")
+
+def startup_status():
+    if not model_ready.is_set():
+        return "Loading model… samples are being buffered"
+    if 'first_prediction' not in startup_times:
+        return f"Model ready after {startup_times['model_ready']:.1f} s"
+    status = f"First prediction after {startup_times['first_prediction']:.1f} s"
+    if gate is not None:
+        status += f" · {gate.skipped_fraction:.0%} of windows skipped (pen up)"
+    return status
+
+def report_ui_ready():
+    startup_times['ui'] = time.perf_counter() - startup_start
+    print(f"⏱️ Time to UI: {startup_times['ui']:.2f} s")
+
+# === Hot-Path Instrumentation ===
+def instrument_live_path(metrics):
     """
-    Process the buffered data in smaller chunks, pass them to the model, 
-    and concatenate outputs for better predictions.
+    Wraps the per-hop stages of the live loop once at startup; the serial read and parse
+    are wrapped when the port opens and the model call when the model is loaded.
     """
-    chunk_size = model_input_shape  # Each chunk should match the model's expected size
-    predictions = []
-
-    for i in range(0, len(buffer) - chunk_size + 1, chunk_size // 2):  # Overlapping chunks
-        chunk = np.array(buffer[i:i + chunk_size], dtype=np.float32)
-
-        # Standardize the data
-        chunk = scaler.fit_transform(chunk)
+    global normalizer, greedy_decode, beam_search_decode
+    all_buffer.append = metrics.timed('buffer', all_buffer.append)
+    if normalizer is not None:
+        normalizer = metrics.timed('normalize', normalizer)
+    greedy_decode = metrics.timed('ctc_decode', greedy_decode)
+    beam_search_decode = metrics.timed('ctc_decode', beam_search_decode)
+    metrics.gauge('ui_queue_depth', prediction_queue.qsize)
+    metrics.gauge('window_fill_samples', lambda: len(all_buffer))
+    if gate is not None:
+        metrics.gauge('pen_up_skipped_fraction', lambda: round(gate.skipped_fraction, 4))
 
-        # Ensure it matches the expected model input shape
-        chunk = adjust_window_size(chunk, model_input_shape)
-
-        # Reshape for model
-        chunk = chunk.reshape(1, model_input_shape, chunk.shape[1])
-
-        # Predict
-        preds = model.predict(chunk)
-        decoded = decode_predictions(preds, num_to_char)
-        
-        predictions.append(decoded[0])  # Append the result
-
-    # Merge all predictions smoothly
-    return ''.join(predictions)
+# === Predict in Chunks and Merge Outputs ===
+def process_chunks_and_predict(predictor, buffer, window_start):
+    """
+    Predicts only the chunks of the buffer not seen on a previous hop,
+    stitches their cached logits and decodes the merged sequence once.
+    """
+    logits = predictor.update(buffer, window_start)
+    if logits is None:
+        return ''
+    if decoder == 'beam':
+        return beam_search_decode(logits[np.newaxis], index_to_char, beam_width=beam_width, lexicon=lexicon)[0]
+    return greedy_decode(logits[np.newaxis], index_to_char)[0]
 
 # === Serial Reading Thread with Chunk-Based Processing ===
 def serial_reading_thread(stop_event, all_buffer=all_buffer):
@@ -119,101 +170,82 @@ def serial_reading_thread(stop_event, all_buffer=all_buffer):
 
             prediction_writer = csv.writer(prediction_file)
             prediction_writer.writerow(['Timestamp', 'Best Prediction'])
+            write_prediction = prediction_writer.writerow
 
-            while not stop_event.is_set():
-                line = ser.readline().decode('utf-8').strip()
-                if not line:
-                    continue
-
-                if line == 'System Deactivated':
-                    all_buffer.clear()
-
-                elif line == 'System Activated':
-                    all_buffer.clear()
-
-                elif len(line.split(',')) == len(feature_set):
-                    data = line.split(',')
-                    #print(data)  # Debugging output
-
-                    sensor_values = [float(value) for value in data]
-                    all_buffer.append(sensor_values)
-
-                    if len(all_buffer) >= window_size:
-                        # Predict on chunks of data and concatenate results
-                        prediction = process_chunks_and_predict(all_buffer)
+            ingest = BinaryIngest(ser, len(feature_set)) if serial_protocol == 'binary' else SerialIngest(ser, len(feature_set))
+            if metrics is not None:
+                instrument_ingest(metrics, ingest)
+                write_prediction = metrics.timed('csv_write', write_prediction)
 
-                        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-
-                        predicted_characters[timestamp] = prediction
-                        prediction_writer.writerow([timestamp, prediction])
-                        prediction_queue.put((timestamp, prediction))
-
-                        # Move the sliding window forward
-                        all_buffer = all_buffer[window_step:]
+            while not stop_event.is_set():
+                for kind, payload in ingest.read():
+                    if payload == 'System Deactivated':
+                        all_buffer.clear()
+                        if model_ready.is_set():
+                            predictor.reset()
+                        if gate is not None:
+                            gate.reset()
+
+                    elif payload == 'System Activated':
+                        all_buffer.clear()
+                        if model_ready.is_set():
+                            predictor.reset()
+                        if gate is not None:
+                            gate.reset()
+
+                    elif kind == SAMPLES:
+                        if gate is not None:
+                            gate.observe(payload)  # Raw force values, before normalization
+                        if normalizer is not None:
+                            normalizer(payload)
+                        while len(payload):
+                            # Only fill up to the next full window so no hop is skipped
+                            count = min(len(payload), window_size - len(all_buffer))
+                            all_buffer.append(payload[:count])
+                            payload = payload[count:]
+
+                            if len(all_buffer) >= window_size:
+                                run, stroke_ended = gate.hop(all_buffer.end) if gate is not None and model_ready.is_set() else (True, False)
+                                if model_ready.is_set() and run:
+                                    # Predict on chunks of data and concatenate results
+                                    prediction = process_chunks_and_predict(predictor, all_buffer.view(), all_buffer.start)
+
+                                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+                                    predicted_characters[timestamp] = prediction
+                                    write_prediction([timestamp, prediction])
+                                    prediction_queue.put((timestamp, prediction))
+
+                                    if 'first_prediction' not in startup_times:
+                                        startup_times['first_prediction'] = time.perf_counter() - startup_start
+                                        print(f"⏱️ Time to first prediction: {startup_times['first_prediction']:.2f} s")
+
+                                    if stroke_ended:
+                                        # Pen lifted: this was the stroke's final text, the next stroke starts fresh
+                                        print(f"✍️ Stroke ended: {prediction} ({gate.skipped_fraction:.0%} of windows skipped so far)")
+                                        predictor.reset()
+
+                                # Move the sliding window forward (while the model loads, this keeps the newest samples)
+                                all_buffer.consume(window_step)
 
     except Exception as e:
         print(f"Error: {e}")
 
-# === Tkinter UI Setup ===
-def start_ui(stop_event):
-    root = tk.Tk()
-    root.title("Real-Time Handwriting Prediction")
-    window_width = 600
-    window_height = 400
-    root.geometry(f"{window_width}x{window_height}")  # Set initial window size
-
-    # === Add Description Text at the Top ===
-    description_text = (
-        "This UI shows predictions of real-time handwriting using a sensor-equipped pen "
-        "developed by the NeverLateX team for the AML lab project "
-        "for MSc in AML at Imperial College London."
-    )
-    description_label = Label(root, text=description_text, wraplength=550, justify="center", font=("Arial", 10))
-    description_label.pack(pady=10)
-
-    # === Load and Resize Logo Dynamically ===
-    logo_path = "/Users/tunakisaga/Desktop/Repos/NeverLateX/all_sensors/all_sensors/Imperial_College_London_new_logo.png"
-    
-    if os.path.exists(logo_path):
-        img = Image.open(logo_path)
-        logo_width = window_width // 5  # 1/10th of the window width
-        # Keep the aspect ratio
-        logo_size = (logo_width, int(logo_width * img.height / img.width))
-        img = img.resize(logo_size, Image.LANCZOS)
-        logo = ImageTk.PhotoImage(img)
-
-        logo_label = Label(root, image=logo)
-        logo_label.image = logo  # Keep reference to prevent garbage collection
-        logo_label.pack(pady=5)  # Ensure it is centered below the text
-
-    # === Prediction Display Area ===
-    text_area = ScrolledText(root, width=80, height=15)
-    text_area.pack(padx=10, pady=10)
-    text_area.configure(state='disabled')
-
-    # === Poll Predictions and Update UI ===
-    def poll_predictions():
-        try:
-            while True:
-                timestamp, pred = prediction_queue.get_nowait()
-                message = f"[{pred}"
-                text_area.configure(state='normal')
-                text_area.insert(tk.END, message)
-                text_area.see(tk.END)
-                text_area.configure(state='disabled')
-        except queue.Empty:
-            pass
-        if not stop_event.is_set():
-            root.after(100, poll_predictions)
-
-    poll_predictions()
-    root.mainloop()
-    stop_event.set()
-
 # === Main Execution ===
 if __name__ == "__main__":
     stop_event = threading.Event()
+    exporter = None
+    if metrics is not None:
+        instrument_live_path(metrics)
+        exporter = MetricsExporter(metrics, metrics_path, metrics_interval, metrics_port)
+    if startup_mode == 'blocking':
+        model_loading_thread()
+    else:
+        threading.Thread(target=model_loading_thread, daemon=True).start()
+
     serial_thread = threading.Thread(target=serial_reading_thread, args=(stop_event,), daemon=True)
     serial_thread.start()
-    start_ui(stop_event)
+    start_ui(stop_event, prediction_queue, startup_status, on_ready=report_ui_ready, metrics=metrics)
     serial_thread.join()
+    if exporter is not None:
+        exporter.close()
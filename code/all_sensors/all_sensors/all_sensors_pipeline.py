@@ -0,0 +1,166 @@
+import csv
+import os
+import time
+import multiprocessing as mp
+from datetime import datetime
+from shared_ring import SharedSampleRing, LATE_WINDOWS, PREDICTED_WINDOWS, GAP_RESETS, BACKPRESSURE_POLICIES
+
+# Pipeline mode of all_sensors_only_prediction_with_ui.py: serial capture, model
+# inference and the Tk UI run in separate processes. Samples go through a
+# shared-memory ring and predictions come back on a queue, so a slow prediction
+# can neither stall serial reads nor freeze the UI.
+# working directory should be NeverLateX
+
+# === Configuration ===
+serial_port = '/dev/tty.usbmodem101'
+baud_rate = 115200
+serial_protocol = 'ascii'  # 'ascii' or 'binary', must match BINARY_MODE in the firmware
+model_folder = "all_sensors/model_parameters"
+model_filename = "cldnn_full_model.h5"
+model_backend = 'keras'  # 'keras' or 'tflite' (run export_tflite.py first)
+tflite_variant = 'float16'  # 'float16', 'dynamic' or 'int8'
+prediction_file_name = "predicted_characters.csv"
+window_size = 1500  # Can be any value
+window_step = int(window_size/4) # Move forward by this step
+decoder = 'greedy'  # 'greedy' or 'beam' (prefix beam search)
+beam_width = 8
+use_lexicon = True  # Beam search only: restrict output to entries of get_complete_set()
+normalization = 'global'  # 'global' (training scaler), 'running' (drift-tracking) or 'per_chunk' (legacy)
+num_features = 12
+backpressure = 'drop_oldest'  # 'drop_oldest' skips stale hops, 'block' stalls capture until inference catches up
+max_pending_hops = 8  # Unread hops the shared ring can hold before backpressure applies
+
+ring_capacity = max(window_size, max_pending_hops * window_step)
+prediction_path = os.path.join(os.getcwd(), "all_sensors/predicted_data", prediction_file_name)
+
+# === Capture Process ===
+def capture_process(ring_args, stop_event):
+    import serial
+    from serial_ingest import SerialIngest, SAMPLES
+    from sensor_protocol import BinaryIngest
+
+    ring = SharedSampleRing(*ring_args)
+    try:
+        with serial.Serial(serial_port, baud_rate, timeout=1) as ser:
+            ingest = BinaryIngest(ser, num_features) if serial_protocol == 'binary' else SerialIngest(ser, num_features)
+            while not stop_event.is_set():
+                for kind, payload in ingest.read():
+                    if payload in ('System Activated', 'System Deactivated'):
+                        ring.reset_session()
+                    elif kind == SAMPLES:
+                        ring.write(payload, backpressure, stop_event)
+    except Exception as e:
+        print(f"Capture error: {e}")
+    finally:
+        ring.close()
+
+# === Inference Process ===
+def inference_process(ring_args, prediction_queue, stop_event):
+    from model_backends import load_backend
+    from characters import get_complete_set
+    from inference import IncrementalPredictor, load_vocabulary, standardize_chunks
+    from ctc_decoding import build_index_to_char, greedy_decode, beam_search_decode, LexiconTrie
+    from ring_buffer import RingBuffer
+    from normalization import load_normalizer
+
+    ring = SharedSampleRing(*ring_args)
+    try:
+        model_path = os.path.join(model_folder, model_filename)
+        backend = load_backend(model_backend, model_path, num_features, tflite_variant)
+        model_input_shape = backend.chunk_size
+        print(f"Model loaded successfully! Expected input time steps: {model_input_shape}")
+
+        characters = set(char for label in get_complete_set() for char in label)
+        index_to_char = build_index_to_char(load_vocabulary(model_path, characters))
+        lexicon = LexiconTrie(get_complete_set()) if use_lexicon else None
+        normalizer = load_normalizer(model_path, normalization)
+        if normalizer is None:
+            predictor = IncrementalPredictor(lambda batch: backend(standardize_chunks(batch)), model_input_shape)
+        else:
+            predictor = IncrementalPredictor(backend, model_input_shape)
+        window = RingBuffer(window_size, num_features)
+        session = None
+        next_start = None  # Ring index the window's next sample must come from
+
+        with open(prediction_path, mode='w', newline='') as prediction_file:
+            prediction_writer = csv.writer(prediction_file)
+            prediction_writer.writerow(['Timestamp', 'Best Prediction'])
+
+            while not stop_event.is_set():
+                result = ring.read(window_size - len(window))
+                if result is None:
+                    time.sleep(0.002)
+                    continue
+
+                read_session, start, samples = result
+                if read_session != session:
+                    # Pen was (de)activated: start a fresh window
+                    window.clear()
+                    predictor.reset()
+                    session = read_session
+                elif start != next_start:
+                    # drop_oldest skipped samples: the window must not span the gap
+                    window.clear()
+                    predictor.reset()
+                    ring.increment(GAP_RESETS)
+                next_start = start + len(samples)
+                if normalizer is not None:
+                    normalizer(samples)
+                window.append(samples)
+                if len(window) < window_size:
+                    continue
+
+                logits = predictor.update(window.view(), window.start)
+                if logits is None:
+                    prediction = ''
+                elif decoder == 'beam':
+                    prediction = beam_search_decode(logits[None], index_to_char, beam_width=beam_width, lexicon=lexicon)[0]
+                else:
+                    prediction = greedy_decode(logits[None], index_to_char)[0]
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+                prediction_writer.writerow([timestamp, prediction])
+                prediction_queue.put((timestamp, prediction))
+
+                ring.increment(PREDICTED_WINDOWS)
+                if ring.unread() >= window_step:
+                    ring.increment(LATE_WINDOWS)  # The next hop was already waiting
+
+                # Move the sliding window forward
+                window.consume(window_step)
+    except Exception as e:
+        print(f"Inference error: {e}")
+    finally:
+        ring.close()
+
+# === Main Execution ===
+if __name__ == "__main__":
+    from prediction_ui import start_ui
+
+    if backpressure not in BACKPRESSURE_POLICIES:
+        raise ValueError(f"backpressure must be one of {BACKPRESSURE_POLICIES}")
+
+    ctx = mp.get_context('spawn')
+    stop_event = ctx.Event()
+    prediction_queue = ctx.Queue()
+    ring = SharedSampleRing(ring_capacity, num_features, window_step, lock=ctx.Lock())
+
+    workers = [
+        ctx.Process(target=capture_process, args=(ring.attach_args(), stop_event), daemon=True),
+        ctx.Process(target=inference_process, args=(ring.attach_args(), prediction_queue, stop_event), daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
+
+    def status():
+        counters = ring.counters()
+        return (f"windows: {counters['predicted_windows']} predicted, {counters['dropped_windows']} dropped, "
+                f"{counters['late_windows']} late, {counters['gap_resets']} restarted after a gap | pending samples: {counters['pending_samples']}")
+
+    try:
+        start_ui(stop_event, prediction_queue, status_fn=status)
+    finally:
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=5)
+        print(f"Pipeline counters: {ring.counters()}")
+        ring.close(unlink=True)
@@ -13,6 +13,12 @@ from sklearn.preprocessing import StandardScaler
 import tensorflow.keras.backend as K
 from tensorflow.keras import layers
 from all_sensors.all_sensors.characters import get_complete_set
+from all_sensors.all_sensors.ring_buffer import RingBuffer
+from all_sensors.all_sensors.serial_ingest import SerialIngest, SAMPLES
+from all_sensors.all_sensors.sensor_protocol import BinaryIngest
+from all_sensors.all_sensors.normalization import load_normalizer
+from all_sensors.all_sensors.recording_writer import RecordingWriter
+from all_sensors.all_sensors.metrics import Metrics, MetricsExporter, instrument_ingest
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 
 # working directory should be NeverLateX
@@ -33,11 +39,17 @@ characters = set(char for label in dataset for char in label)
 # === Configuration ===
 serial_port = '/dev/tty.usbmodem101'  # Change as needed (e.g., 'COM3' for Windows)
 baud_rate = 115200  # Must match Arduino's baud rate
+serial_protocol = 'ascii'  # 'ascii' or 'binary', must match BINARY_MODE in the firmware
 model_folder = "all_sensors/model_parameters"  # Folder containing trained models (.h5)
 model_filename = "cldnn_cce_model.h5"  # Change based on the model to use ("cnn_model.h5" or "cldnn_model.h5")
 file_name = "all_data.csv"
 prediction_file_name = "predicted_characters.csv"
 max_sequence_length = 1010  # Ensure consistency with model training
+buffer_capacity = 20000  # Max samples kept per recording (~20 s at 1 kHz), older ones are dropped
+metrics_enabled = False  # Per-stage latency histograms and counters (metrics.py); when False nothing is instrumented
+metrics_path = "all_sensors/benchmark_results/live_metrics.jsonl"  # JSON snapshot appended every metrics_interval seconds
+metrics_interval = 10.0
+metrics_port = 9108  # Prometheus text endpoint http://127.0.0.1:9108/metrics, None for none
 
 # === Load Trained Model ===
 model_path = os.path.join(model_folder, model_filename)
@@ -58,20 +70,35 @@ noise = ['noise']
 all_characters = noise + dataset
 
 i = 0  # Tracks which character is being recorded
-all_buffer = []  # Buffer to store all data during recording
+all_buffer = RingBuffer(buffer_capacity, 12)  # Buffer to store all data during recording
 predicted_characters = {}
 
-# Initialize StandardScaler for consistency with training
+# Training scaler statistics saved next to the model, else fit a StandardScaler per recording
+normalizer = load_normalizer(model_path, 'global')
 scaler = StandardScaler()
 
 # Define feature set for CSV
 feature_set = ['Timestamp', 'Acc_X', 'Acc_Y', 'Acc_Z', 'Gyro_X', 'Gyro_Y', 'Gyro_Z', 'Mag_X', 'Mag_Y', 'Mag_Z', 'Force1', 'Force2', 'Force3', 'Letter']
 
+# === Metrics ===
+# Stages are wrapped once here; the serial read, parse and recording writes are wrapped when the port opens
+metrics = Metrics() if metrics_enabled else None
+exporter = None
+if metrics is not None:
+    all_buffer.append = metrics.timed('buffer', all_buffer.append)
+    if normalizer is not None:
+        normalizer = metrics.timed('normalize', normalizer)
+    scaler.fit_transform = metrics.timed('normalize', scaler.fit_transform)
+    if model is not None:
+        model.predict = metrics.timed('predict', model.predict)
+    metrics.gauge('buffer_fill_samples', lambda: len(all_buffer))
+    exporter = MetricsExporter(metrics, metrics_path, metrics_interval, metrics_port)
+
 # === Open Serial Connection & CSV File ===
 try:
-    with serial.Serial(serial_port, baud_rate, timeout=1) as ser, open(file_path, mode='w', newline='') as file, open(prediction_path, mode='w', newline='') as prediction_file:
-        writer = csv.writer(file)
-        writer.writerow(feature_set)
+    with serial.Serial(serial_port, baud_rate, timeout=1) as ser, \
+         RecordingWriter(file_path, feature_set, all_characters) as writer, \
+         open(prediction_path, mode='w', newline='') as prediction_file:
 
         prediction_writer = csv.writer(prediction_file)
         prediction_writer.writerow(['Timestamp', 'Best Prediction', 'Actual_Letter'])
@@ -79,66 +106,57 @@ try:
         print(f"📡 Logging data from {serial_port} to {file_path}...")
         print("📌 Press Ctrl+C to stop logging.")
 
+        ingest = BinaryIngest(ser, len(feature_set)-2) if serial_protocol == 'binary' else SerialIngest(ser, len(feature_set)-2)
+        if metrics is not None:
+            instrument_ingest(metrics, ingest)
+            writer.write = metrics.timed('record', writer.write)
+            metrics.gauge('writer_queue_blocks', writer.queue.qsize)
         firstLetter = True
         while True:
             try:
-                line = ser.readline().decode('utf-8').strip()
-                
-                print("Line: ", line)
-
-                # === Handle Start/Stop Recording ===
-                if line == 'System Deactivated':
-                    print("🛑 Recording stopped.")
-
-                    if model is not None and len(all_buffer) > 0:
-                        all_data_np = np.array(all_buffer, dtype=np.float32)
-                        all_data_np = scaler.fit_transform(all_data_np)
-                        all_data_np = pad_sequences([all_data_np], maxlen=max_sequence_length, padding='post', dtype='float32')
-                        all_data_np = all_data_np.reshape(1, all_data_np.shape[1], all_data_np.shape[2])
-
-                        prediction = model.predict(all_data_np)
-                        label_encoder = LabelEncoder()
-                        predicted_label = label_encoder.inverse_transform([np.argmax(prediction)])
-                        predicted_label = predicted_label[0]
-                        # Get current timestamp
-                        now = datetime.now()
-                        timestamp = str(now.strftime('%Y-%m-%d %H:%M:%S') + f".{now.microsecond // 1000:03d}")
-                        predicted_characters[timestamp] = predicted_label  # Store best prediction
-                        prediction_writer.writerow([timestamp, predicted_label, all_characters[i]])
-                        print(f"🔠 Best Prediction: {predicted_label}")   
+                for kind, payload in ingest.read():
+
+                    # === Handle Start/Stop Recording ===
+                    if payload == 'System Deactivated':
+                        print("🛑 Recording stopped.")
+
+                        if model is not None and len(all_buffer) > 0:
+                            all_data_np = all_buffer.view()
+                            all_data_np = normalizer(all_data_np.copy()) if normalizer is not None else scaler.fit_transform(all_data_np)
+                            all_data_np = pad_sequences([all_data_np], maxlen=max_sequence_length, padding='post', dtype='float32')
+                            all_data_np = all_data_np.reshape(1, all_data_np.shape[1], all_data_np.shape[2])
+
+                            prediction = model.predict(all_data_np)
+                            label_encoder = LabelEncoder()
+                            predicted_label = label_encoder.inverse_transform([np.argmax(prediction)])
+                            predicted_label = predicted_label[0]
+                            # Get current timestamp
+                            now = datetime.now()
+                            timestamp = str(now.strftime('%Y-%m-%d %H:%M:%S') + f".{now.microsecond // 1000:03d}")
+                            predicted_characters[timestamp] = predicted_label  # Store best prediction
+                            prediction_writer.writerow([timestamp, predicted_label, all_characters[i]])
+                            print(f"🔠 Best Prediction: {predicted_label}")   
                         
-                    all_buffer.clear()  # Reset buffer after prediction
-                    
-                elif line == 'System Activated' and not firstLetter:
-                    i += 1   
-                    if i == len(all_characters)+1:
-                        print("✅ All characters successfully recorded.")
-                        i = 0
-
-                elif line == 'System Activated':
-                    print("✅ System started recording...")
-                    all_buffer.clear()
-
-                # === Read All Data ===
-                elif len(line.split(',')) == len(feature_set)-2:
-                    
-                    print("Data: ")
+                        all_buffer.clear()  # Reset buffer after prediction
                     
-                    data = line.split(',')
+                    elif payload == 'System Activated' and not firstLetter:
+                        i += 1   
+                        if i == len(all_characters)+1:
+                            print("✅ All characters successfully recorded.")
+                            i = 0
 
-                    # Get current timestamp
-                    now = datetime.now()
-                    timestamp = now.strftime('%Y-%m-%d %H:%M:%S') + f".{now.microsecond // 1000:03d}"
-                    data = [timestamp] + data
-                    data = data + [all_characters[i]]
+                    elif payload == 'System Activated':
+                        print("✅ System started recording...")
+                        all_buffer.clear()
 
-                    # Write to CSV
-                    writer.writerow(data)
-                    print("Current letter: ", f"{all_characters[i]}, writing to file...")
+                    # === Read All Data ===
+                    elif kind == SAMPLES:
+                        # Timestamped and written to CSV by the writer thread
+                        writer.write(payload, all_characters[i])
 
-                    # Store in buffer for prediction
-                    all_buffer.append([float(value) for value in data[1:len(data)-1]])  # Exclude timestamp and label
-                    firstLetter = False
+                        # Store in buffer for prediction
+                        all_buffer.append(payload)
+                        firstLetter = False
 
             except Exception as e:
                 print(f"⚠️ Error reading data: {e}")
@@ -151,6 +169,9 @@ except KeyboardInterrupt:
 except Exception as e:
     print(f"❌ Failed to open serial port or file: {e}")
     report_predicted_characters(predicted_characters)
+finally:
+    if exporter is not None:
+        exporter.close()
 
 
     
\ No newline at end of file
@@ -1,9 +1,7 @@
 # !!!!!!!!! MAKE SURE TO CHECK THE MAX SEQUENCE LENGTH !!!!!!!!!
 
 import serial
-import csv
 import time
-from datetime import datetime
 import os
 import numpy as np
 import tensorflow as tf
@@ -12,7 +10,9 @@ from tensorflow.keras.preprocessing.sequence import pad_sequences
 from sklearn.preprocessing import StandardScaler
 import tensorflow.keras.backend as K
 from characters import get_complete_set
-import unicodedata
+from serial_ingest import SerialIngest, SAMPLES
+from sensor_protocol import BinaryIngest
+from recording_writer import RecordingWriter, NPY
 
 
 # working directory should be NeverLateX
@@ -23,6 +23,8 @@ import unicodedata
 serial_port = '/dev/tty.usbmodem1101'
 # serial_port = 'COM5' # For windows / fajar's PC
 baud_rate = 115200  # Must match Arduino's baud rate
+serial_protocol = 'ascii'  # 'ascii' or 'binary', must match BINARY_MODE in the firmware
+recording_format = 'csv'  # 'csv' or 'npy' (directory of binary per-session chunks)
 file_name = "all_data.csv"
 max_sequence_length = 64  # Ensure consistency with model training
 
@@ -40,7 +42,7 @@ os.makedirs(folder_path, exist_ok=True)
 
 # Generate a unique file name
 base_file_name = "new_all_data"
-file_extension = ".csv"
+file_extension = ".csv" if recording_format != NPY else ""
 
 file_number = 30
 file_name = f"{base_file_name}{file_number}{file_extension}"
@@ -73,49 +75,36 @@ buffer = []  # Buffer to store all data during recording
 
 # === Open Serial Connection & CSV File ===
 try:
-    with serial.Serial(serial_port, baud_rate, timeout=1) as ser, open(file_path, mode='w', newline='', encoding='utf-8-sig') as file:
-        writer = csv.writer(file)
-        writer.writerow(feature_set)
-        
+    with serial.Serial(serial_port, baud_rate, timeout=1) as ser, \
+         RecordingWriter(file_path, feature_set, all_characters, fmt=recording_format) as writer:
+
         print(f"📡 Logging data from {serial_port} to {file_path}...")
         print("📌 Press Ctrl+C to stop logging.")
 
+        ingest = BinaryIngest(ser, len(feature_set)-2) if serial_protocol == 'binary' else SerialIngest(ser, len(feature_set)-2)
         firstLetter = True
         while True:
             try:
-                line = unicodedata.normalize('NFC', ser.readline().decode('utf-8').strip())
-
-                # === Handle Start/Stop Recording ===
-                if line == 'System Deactivated':
-                    print("🛑 Recording stopped.")
-                    
-                elif line == 'System Activated' and not firstLetter:
-                    i += 1   
-                    if i == len(all_characters)+1:
-                        print("✅ All characters successfully recorded.")
-                        i = 0
-
-                elif line == 'System Activated':
-                    print("✅ System started recording...")
-
-                elif len(line.split(',')) == (len(feature_set)-2):
-                    
-                    # print(line)  # Debugging
-                    data = line.split(',')
-
-                    # Get current timestamp
-                    now = datetime.now()
-                    timestamp = now.strftime('%Y-%m-%d %H:%M:%S') + f".{now.microsecond // 1000:03d}"
-                    data = [timestamp] + data
-                    data = data + [all_characters[i]]
-                    
-                    print(data)
+                for kind, payload in ingest.read():
 
-                    # Write to CSV
-                    writer.writerow(data)
-                    print("Current letter: ", f"{all_characters[i]}, writing to file...")
+                    # === Handle Start/Stop Recording ===
+                    if payload == 'System Deactivated':
+                        print("🛑 Recording stopped.")
                     
-                    firstLetter = False
+                    elif payload == 'System Activated' and not firstLetter:
+                        writer.new_session()
+                        i += 1   
+                        if i == len(all_characters)+1:
+                            print("✅ All characters successfully recorded.")
+                            i = 0
+
+                    elif payload == 'System Activated':
+                        print("✅ System started recording...")
+
+                    elif kind == SAMPLES:
+                        # Timestamped and written by the writer thread
+                        writer.write(payload, all_characters[i])
+                        firstLetter = False
 
             except Exception as e:
                 print(f"⚠️ Error reading data: {e}")
@@ -0,0 +1,59 @@
+import os
+import time
+import numpy as np
+from tensorflow.keras.models import load_model
+from inference import BatchedModelRunner
+
+# Micro-benchmark of per-window model latency: one model.predict per chunk
+# (previous live loop) versus one batched tf.function call for all chunks.
+# working directory should be NeverLateX
+
+# === Configuration ===
+model_folder = "all_sensors/model_parameters"
+model_filename = "cldnn_full_model.h5"
+window_size = 1500
+num_features = 12
+warmup_windows = 3
+timed_windows = 20
+
+# === Load Model ===
+model_path = os.path.join(model_folder, model_filename)
+model = load_model(model_path, custom_objects={'ctc_loss': lambda y_true, y_pred: y_pred})
+chunk_size = model.input_shape[1]
+chunk_step = chunk_size // 2
+offsets = list(range(0, window_size - chunk_size + 1, chunk_step))
+print(f"Chunk size: {chunk_size}, chunks per window: {len(offsets)}")
+
+rng = np.random.default_rng(0)
+window = rng.standard_normal((window_size, num_features)).astype(np.float32)
+
+# === Before: One predict Call per Chunk ===
+def predict_per_chunk(window):
+    return [model.predict(window[i:i + chunk_size][np.newaxis], verbose=0)[0] for i in offsets]
+
+# === After: One Batched Forward Pass ===
+runner = BatchedModelRunner(model, chunk_size, num_features)
+batch = np.empty((len(offsets), chunk_size, num_features), dtype=np.float32)
+
+def predict_batched(window):
+    for n, i in enumerate(offsets):
+        batch[n] = window[i:i + chunk_size]
+    return runner(batch)
+
+def time_windows(predict_fn):
+    for _ in range(warmup_windows):
+        predict_fn(window)
+    latencies = []
+    for _ in range(timed_windows):
+        start = time.perf_counter()
+        predict_fn(window)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+# === Check Parity and Report ===
+max_diff = np.max(np.abs(np.stack(predict_per_chunk(window)) - predict_batched(window)))
+print(f"Max abs logit difference: {max_diff:.2e}")
+
+for name, predict_fn in [("per-chunk predict", predict_per_chunk), ("batched tf.function", predict_batched)]:
+    latencies = time_windows(predict_fn)
+    print(f"{name:>20}: median {np.median(latencies):7.2f} ms, p95 {np.percentile(latencies, 95):7.2f} ms per window")
@@ -0,0 +1,55 @@
+import time
+import numpy as np
+from characters import get_complete_set
+from inference import build_char_lookups
+from ctc_decoding import build_index_to_char, greedy_decode, decode_predictions_tf, beam_search_decode, LexiconTrie
+
+# Checks the NumPy greedy decoder against the previous TF decoder on random
+# logits and times both on batches of the sizes the live loop produces, then
+# times prefix beam search (with and without the lexicon) against greedy decoding.
+
+# === Configuration ===
+batch_sizes = [1, 8, 64]
+time_steps = 187  # Frames of one stitched 1500-sample window
+repeats = 5
+
+characters = set(char for label in get_complete_set() for char in label)
+char_to_num, num_to_char = build_char_lookups(characters)
+index_to_char = build_index_to_char(char_to_num.get_vocabulary())
+num_classes = len(char_to_num.get_vocabulary()) + 1
+
+rng = np.random.default_rng(0)
+
+def random_logits(batch_size):
+    # Peaky logits like a trained CTC model: mostly blank, with runs of characters
+    logits = rng.standard_normal((batch_size, time_steps, num_classes)).astype(np.float32)
+    labels = np.where(rng.random((batch_size, time_steps)) < 0.7, num_classes - 1, rng.integers(0, num_classes, (batch_size, time_steps)))
+    labels = np.repeat(labels[:, ::3], 3, axis=1)[:, :time_steps]
+    np.put_along_axis(logits, labels[..., None], 10.0, axis=-1)
+    return logits
+
+def time_ms(decode_fn, logits):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        decode_fn(logits)
+    return (time.perf_counter() - start) * 1000 / repeats
+
+for batch_size in batch_sizes:
+    logits = random_logits(batch_size)
+    expected = decode_predictions_tf(logits, num_to_char)
+    actual = greedy_decode(logits, index_to_char)
+    assert actual == expected, f"Mismatch for batch size {batch_size}"
+
+    tf_ms = time_ms(lambda x: decode_predictions_tf(x, num_to_char), logits)
+    np_ms = time_ms(lambda x: greedy_decode(x, index_to_char), logits)
+    print(f"batch {batch_size:3d}: TF {tf_ms:8.2f} ms, NumPy {np_ms:7.3f} ms ({tf_ms / np_ms:6.1f}x), outputs identical")
+
+# === Beam Search Latency vs Greedy ===
+lexicon = LexiconTrie(get_complete_set())
+for batch_size in batch_sizes:
+    logits = random_logits(batch_size)
+    greedy_ms = time_ms(lambda x: greedy_decode(x, index_to_char), logits)
+    beam_ms = time_ms(lambda x: beam_search_decode(x, index_to_char, beam_width=8), logits)
+    lexicon_ms = time_ms(lambda x: beam_search_decode(x, index_to_char, beam_width=8, lexicon=lexicon), logits)
+    print(f"batch {batch_size:3d}: greedy {greedy_ms:7.3f} ms, beam {beam_ms:8.2f} ms, beam + lexicon {lexicon_ms:8.2f} ms "
+          f"({lexicon_ms / batch_size:.2f} ms per window)")
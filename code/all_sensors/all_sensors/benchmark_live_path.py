@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import time
+from datetime import datetime
+import numpy as np
+from characters import get_complete_set
+from inference import IncrementalPredictor, build_vocabulary, load_vocabulary, standardize_chunks
+from model_backends import load_backend, BACKENDS
+from ctc_decoding import build_index_to_char, greedy_decode
+from replay import ReplaySerial, SESSION_FRAMINGS
+from ring_buffer import RingBuffer
+from serial_ingest import SerialIngest, SAMPLES
+from sensor_protocol import BinaryIngest
+from normalization import load_normalizer, NORMALIZATION_MODES
+from pen_activity import PenActivityDetector, PenGate
+
+# End-to-end benchmark of the live path on a recorded session:
+# replayed serial bytes -> ingest -> ring buffer -> normalize -> predict -> CTC decode.
+# Each run appends one JSON line to the results file so runs can be compared across commits.
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/benchmark_live_path.py all_sensors/dataset/all_data10.csv --speed 0
+
+# === Configuration ===
+model_folder = "all_sensors/model_parameters"
+model_filename = "cldnn_full_model.h5"
+results_path = "all_sensors/benchmark_results/live_path.jsonl"
+window_size = 1500
+window_step = int(window_size/4)
+num_features = 12
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return 'unknown'
+
+def percentiles(values_ms):
+    if not values_ms:
+        return {}
+    values_ms = np.asarray(values_ms)
+    return {f"p{q}": round(float(np.percentile(values_ms, q)), 3) for q in (50, 90, 99)} | {"max": round(float(values_ms.max()), 3)}
+
+# === Replay Through the Live Path ===
+def run_benchmark(csv_path, speed, protocol, backend, normalizer=None, gate=None, sessions='recording', vocabulary=None):
+    model_input_shape = backend.chunk_size
+    characters = set(char for label in get_complete_set() for char in label)
+    index_to_char = build_index_to_char(vocabulary or build_vocabulary(characters))
+    if normalizer is None:
+        predictor = IncrementalPredictor(lambda batch: backend(standardize_chunks(batch)), model_input_shape)
+    else:
+        predictor = IncrementalPredictor(backend, model_input_shape)
+    all_buffer = RingBuffer(window_size, num_features)
+
+    ser = ReplaySerial(csv_path, speed=speed, protocol=protocol, timeout=0.05, sessions=sessions)
+    ingest = BinaryIngest(ser, num_features) if protocol == 'binary' else SerialIngest(ser, num_features)
+
+    hop_ms = []      # Predict + decode time per hop (normalization runs once per block, on ingest)
+    delay_ms = []    # Prediction done minus arrival time of the newest sample in the window
+    samples_seen = 0
+    hops = 0
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    while not ser.finished:
+        for kind, payload in ingest.read():
+            if kind != SAMPLES:
+                if payload in ('System Activated', 'System Deactivated'):
+                    all_buffer.clear()
+                    predictor.reset()
+                    if gate is not None:
+                        gate.reset()
+                continue
+
+            if gate is not None:
+                gate.observe(payload)
+            if normalizer is not None:
+                normalizer(payload)
+            while len(payload):
+                count = min(len(payload), window_size - len(all_buffer))
+                all_buffer.append(payload[:count])
+                payload = payload[count:]
+                samples_seen += count
+
+                if len(all_buffer) >= window_size:
+                    hops += 1
+                    run, stroke_ended = gate.hop(all_buffer.end) if gate is not None else (True, False)
+                    if not run:
+                        all_buffer.consume(window_step)
+                        continue
+                    hop_start = time.perf_counter()
+                    logits = predictor.update(all_buffer.view(), all_buffer.start)
+                    if logits is not None:
+                        greedy_decode(logits[np.newaxis], index_to_char)
+                    if stroke_ended:
+                        predictor.reset()
+                    hop_end = time.perf_counter()
+
+                    hop_ms.append((hop_end - hop_start) * 1000)
+                    delay_ms.append((hop_end - ser.due_time(samples_seen - 1)) * 1000)
+                    all_buffer.consume(window_step)
+
+    wall_time = time.perf_counter() - start
+    cpu_time = time.process_time() - cpu_start
+    if not hops:
+        raise RuntimeError(f"No window of {window_size} samples filled in {csv_path} ({samples_seen} samples, "
+                           f"sessions={sessions}); nothing was predicted")
+    duration = float(ser.times[-1]) if len(ser.times) else 0.0
+    return {
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+        "commit": git_commit(),
+        "csv": os.path.basename(csv_path),
+        "speed": speed,
+        "protocol": protocol,
+        "sessions": sessions,
+        "backend": type(backend).__name__,
+        "normalization": type(normalizer).__name__ if normalizer is not None else 'per_chunk',
+        "samples": samples_seen,
+        "hops": hops,
+        "hops_predicted": len(hop_ms),
+        "pen_gating": gate is not None,
+        "skipped_fraction": round(gate.skipped_fraction, 3) if gate is not None else 0.0,
+        "wall_time_s": round(wall_time, 3),
+        "cpu_time_s": round(cpu_time, 3),
+        "throughput_samples_per_s": round(samples_seen / wall_time, 1),
+        "realtime_factor": round(duration / wall_time, 3) if wall_time else None,
+        "hop_latency_ms": percentiles(hop_ms),
+        "end_to_end_delay_ms": percentiles(delay_ms),
+    }
+
+# === Main Execution ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the live prediction path.")
+    parser.add_argument("csv", help="Recorded session, e.g. all_sensors/dataset/all_data10.csv")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = real time, N = N times faster, 0 = as fast as possible")
+    parser.add_argument("--protocol", choices=["ascii", "binary"], default="ascii")
+    parser.add_argument("--sessions", choices=SESSION_FRAMINGS, default="recording",
+                        help="One activation around the replay, or one per label run (windows rarely fill)")
+    parser.add_argument("--normalization", choices=NORMALIZATION_MODES, default="global")
+    parser.add_argument("--backend", choices=BACKENDS, default="keras")
+    parser.add_argument("--tflite-variant", choices=["float16", "dynamic", "int8"], default="float16")
+    parser.add_argument("--pen-gating", action="store_true", help="Skip hops while the pen is lifted (pen_activity.py)")
+    parser.add_argument("--output", default=results_path, help="JSON lines file the result is appended to")
+    args = parser.parse_args()
+
+    model_path = os.path.join(model_folder, model_filename)
+    load_start = time.perf_counter()
+    backend = load_backend(args.backend, model_path, num_features, args.tflite_variant)
+    load_time = time.perf_counter() - load_start
+    gate = PenGate(PenActivityDetector(), window_step) if args.pen_gating else None
+    vocabulary = load_vocabulary(model_path, set(char for label in get_complete_set() for char in label))
+    result = run_benchmark(args.csv, args.speed, args.protocol, backend, load_normalizer(model_path, args.normalization),
+                           gate, args.sessions, vocabulary)
+    result["model_load_s"] = round(load_time, 3)
+    result["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KiB on Linux
+    print(json.dumps(result, indent=2))
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'a') as results_file:
+        results_file.write(json.dumps(result) + '\n')
@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+from datetime import datetime
+from model_backends import load_backend, BACKENDS
+from replay import fake_pen_recording, open_fake_pen, play_recording
+import pen_server
+from pen_server import PenServer
+
+# Scaling benchmark of pen_server.py: N fake pens (pseudo-terminals) replay recorded
+# CSVs in real time while one server process reads all of them and shares one model.
+# Reports aggregate throughput and per-pen latency (window ready -> decoded text) per N.
+# POSIX only (os.openpty). Each N appends one JSON line to the results file.
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/benchmark_pen_server.py --pens 1 2 4 8 --duration 30
+
+# === Configuration ===
+model_folder = "all_sensors/model_parameters"
+model_filename = "cldnn_full_model.h5"
+dataset_pattern = "all_sensors/dataset/all_data*.csv"
+results_path = "all_sensors/benchmark_results/pen_server.jsonl"
+
+# === Fake Pens ===
+async def run_pens(server, recordings, speed):
+    pens = [open_fake_pen() for _ in recordings]
+    players = [play_recording(master, *recording, speed) for (master, _, _), recording in zip(pens, recordings)]
+    try:
+        await asyncio.gather(server.serve([path for _, _, path in pens], lambda device, text, window_start: None), *players)
+    finally:
+        for _, slave, _ in pens:
+            os.close(slave)
+
+# === Main Execution ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve N fake pens replaying recordings from one server process.")
+    parser.add_argument("--pens", type=int, nargs="+", default=[1, 2, 4, 8], help="Numbers of pens to try")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of each recording to replay")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = real time, N = N times faster")
+    parser.add_argument("--backend", choices=BACKENDS, default="keras")
+    parser.add_argument("--max-batch", type=int, default=pen_server.max_batch_windows)
+    parser.add_argument("--max-wait-ms", type=float, default=pen_server.max_wait_ms)
+    parser.add_argument("--protocol", choices=["ascii", "binary"], default="ascii")
+    parser.add_argument("--output", default=results_path, help="JSON lines file the results are appended to")
+    args = parser.parse_args()
+
+    csv_paths = sorted(glob.glob(dataset_pattern))
+    model_path = os.path.join(model_folder, model_filename)
+    backend = load_backend(args.backend, model_path, pen_server.num_features, pen_server.tflite_variant)
+
+    # One activation around each replay, so windows are not cleared at every label change
+    recordings = [fake_pen_recording(csv_path, args.duration, args.protocol) for csv_path in csv_paths[:max(args.pens)]]
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    for count in args.pens:
+        server = PenServer(backend, model_path, protocol=args.protocol,
+                           max_batch_windows=args.max_batch, max_wait_ms=args.max_wait_ms)
+        start = time.perf_counter()
+        asyncio.run(run_pens(server, [recordings[i % len(recordings)] for i in range(count)], args.speed))
+        result = {"timestamp": datetime.now().isoformat(timespec='seconds'), "backend": args.backend,
+                  "max_batch_windows": args.max_batch, "max_wait_ms": args.max_wait_ms,
+                  **server.stats(time.perf_counter() - start)}
+        print(f"{count:>3} pens: {result['samples_per_s']:>9.1f} samples/s, {result['windows_per_s']:>6.2f} windows/s, "
+              f"latency p50 {result['latency_ms']['p50']} ms, p99 {result['latency_ms']['p99']} ms, "
+              f"mean batch {result['mean_batch_windows']}, dropped {result['dropped_windows']}")
+        with open(args.output, 'a') as results_file:
+            results_file.write(json.dumps(result) + '\n')
@@ -0,0 +1,92 @@
+import argparse
+import glob
+import os
+import time
+import numpy as np
+from characters import get_complete_set
+from inference import IncrementalPredictor, load_vocabulary, standardize_chunks
+from ctc_decoding import build_index_to_char, greedy_decode, character_error_rate
+from model_backends import KerasBackend
+from normalization import load_normalizer
+from replay import load_recording, labelled_segments
+from streaming_cldnn import StreamingPredictor, load_streaming_models
+
+# Latency/accuracy comparison of the windowed CLDNN (overlapping chunks, bidirectional LSTMs)
+# and the streaming CLDNN (causal convolutions, carried LSTM state) on the recorded dataset.
+# - Latency: one sliding window hop at a time over a whole recording, as in the live loop
+# - Accuracy: CER of greedy decoding over every labelled segment
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/benchmark_streaming_cldnn.py --max-files 5
+
+# === Configuration ===
+model_folder = "all_sensors/model_parameters"
+windowed_model_filename = "cldnn_full_model.h5"
+streaming_model_filename = "cldnn_streaming_model.h5"
+dataset_pattern = "all_sensors/dataset/all_data*.csv"
+window_size = 1500
+window_step = int(window_size/4)
+num_features = 12
+
+def hop_latencies(predictor, stream, index_to_char):
+    """Milliseconds per hop of predict + decode while the window slides over the stream."""
+    latencies = []
+    for start in range(0, len(stream) - window_size + 1, window_step):
+        hop_start = time.perf_counter()
+        logits = predictor.update(stream[start:start + window_size], start)
+        if logits is not None:
+            greedy_decode(logits[np.newaxis], index_to_char)
+        latencies.append((time.perf_counter() - hop_start) * 1000)
+    return np.array(latencies)
+
+def segment_cer(predictor, segments, index_to_char):
+    labels, texts = [], []
+    for label, segment in segments:
+        predictor.reset()
+        logits = predictor.update(segment, 0)
+        labels.append(label)
+        texts.append(greedy_decode(logits[np.newaxis], index_to_char)[0] if logits is not None else '')
+    return character_error_rate(labels, texts)
+
+# === Main Execution ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the windowed and streaming CLDNN on recorded sessions.")
+    parser.add_argument("--dataset", default=dataset_pattern, help="Glob of recorded CSVs")
+    parser.add_argument("--max-files", type=int, default=None, help="Only use the first N recordings")
+    args = parser.parse_args()
+    csv_paths = sorted(glob.glob(args.dataset))[:args.max_files]
+
+    characters = set(char for label in get_complete_set() for char in label)
+
+    # Windowed model, normalized as configured on the live path
+    windowed_path = os.path.join(model_folder, windowed_model_filename)
+    backend = KerasBackend(windowed_path, num_features)
+    windowed_normalizer = load_normalizer(windowed_path, 'global')
+    predict_fn = backend if windowed_normalizer is not None else (lambda batch: backend(standardize_chunks(batch)))
+    windowed = IncrementalPredictor(predict_fn, backend.chunk_size)
+    windowed_index_to_char = build_index_to_char(load_vocabulary(windowed_path, characters))
+
+    # Streaming model, which always needs the training scaler statistics
+    streaming_path = os.path.join(model_folder, streaming_model_filename)
+    streaming_normalizer = load_normalizer(streaming_path, 'global')
+    if streaming_normalizer is None:
+        raise SystemExit("The streaming model needs its scaler statistics, see 11_03_CTC_CLDNN.ipynb")
+    streaming = StreamingPredictor(*load_streaming_models(streaming_path))
+    streaming_index_to_char = build_index_to_char(load_vocabulary(streaming_path, characters))
+
+    results = [
+        ("windowed", windowed, windowed_normalizer, backend.chunk_size, windowed_index_to_char),
+        ("streaming", streaming, streaming_normalizer, 0, streaming_index_to_char),
+    ]
+    for name, predictor, normalizer, min_length, index_to_char in results:
+        latencies = []
+        for csv_path in csv_paths:
+            stream = load_recording(csv_path)[0]
+            if normalizer is not None:
+                normalizer(stream)
+            predictor.reset()
+            latencies.append(hop_latencies(predictor, stream, index_to_char)[1:])  # First hop of a recording fills the whole window
+        latencies = np.concatenate(latencies)
+
+        cer = segment_cer(predictor, labelled_segments(csv_paths, normalizer, min_length), index_to_char)
+        print(f"{name:>10}: CER {cer:.4f}, per hop median {np.median(latencies):7.2f} ms, "
+              f"p90 {np.percentile(latencies, 90):7.2f} ms, p99 {np.percentile(latencies, 99):7.2f} ms ({len(latencies)} hops)")
@@ -0,0 +1,118 @@
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers, models
+
+# Compact CLDNN students for CPU real-time inference, distilled from the CTC CLDNN of
+# 11_03_CTC_CLDNN.ipynb by distill_cldnn.py. Every student keeps the teacher's interface:
+# fixed (chunk_size, features) input, logits (chunk_size / 8, classes), blank index 0,
+# so the live scripts, IncrementalPredictor and the TFLite export load them unchanged.
+# Most of the teacher's FLOPs are in Conv1D(512, 5) at full input resolution; students shrink
+# that with fewer filters, depthwise-separable convolutions or pooling before each convolution.
+
+# (filters, kernel size) per block, each block halves the time axis
+TEACHER_CONV_BLOCKS = [(512, 5), (256, 3), (128, 3)]
+TEACHER_CONFIG = dict(conv_blocks=TEACHER_CONV_BLOCKS, separable=False, pool_first=False,
+                      lstm_units=64, dense_units=100, dropout=0.3)
+
+# Designed students; pruned students are derived from the teacher by prune_cldnn()
+STUDENTS = {
+    'narrow': dict(conv_blocks=[(128, 5), (64, 3), (64, 3)], separable=False, pool_first=False,
+                   lstm_units=48, dense_units=64, dropout=0.2),
+    'separable': dict(conv_blocks=[(128, 5), (128, 3), (64, 3)], separable=True, pool_first=False,
+                      lstm_units=48, dense_units=64, dropout=0.2),
+    'separable_early_pool': dict(conv_blocks=[(128, 5), (128, 3), (64, 3)], separable=True, pool_first=True,
+                                 lstm_units=48, dense_units=64, dropout=0.2),
+    'tiny': dict(conv_blocks=[(64, 5), (64, 3), (32, 3)], separable=True, pool_first=True,
+                 lstm_units=32, dense_units=48, dropout=0.1),
+}
+
+# === Model Definition ===
+def create_compact_cldnn_model(input_shape, num_classes, conv_blocks=TEACHER_CONV_BLOCKS, separable=False,
+                               pool_first=False, lstm_units=64, dense_units=100, dropout=0.3, name='Compact_CLDNN_Model'):
+    """
+    CLDNN with a configurable convolution stack; TEACHER_CONFIG rebuilds create_cldnn_model exactly.
+    - separable: SeparableConv1D (depthwise + pointwise) instead of Conv1D
+    - pool_first: pool before each convolution, so every convolution runs at half the
+      resolution of its input (average pooling on the raw samples, max pooling after)
+    Frames per chunk are input length // 8 either way.
+    """
+    inputs = layers.Input(shape=input_shape, name='input')
+    conv = layers.SeparableConv1D if separable else layers.Conv1D
+
+    # Convolutional Layers
+    x = inputs
+    for i, (filters, kernel) in enumerate(conv_blocks):
+        if pool_first:
+            x = (layers.AveragePooling1D if i == 0 else layers.MaxPooling1D)(pool_size=2)(x)
+        x = conv(filters, kernel, activation='relu', padding='same')(x)
+        x = layers.BatchNormalization()(x)
+        if not pool_first:
+            x = layers.MaxPooling1D(pool_size=2)(x)
+        x = layers.Dropout(dropout)(x)
+
+    # LSTM Layers
+    x = layers.Bidirectional(layers.LSTM(lstm_units, return_sequences=True, activation='tanh'))(x)
+    x = layers.Dropout(dropout)(x)
+    x = layers.Bidirectional(layers.LSTM(lstm_units, return_sequences=True, activation='tanh'))(x)
+    x = layers.Dropout(dropout)(x)
+
+    # Fully Connected Layer and Linear Output Layer
+    x = layers.Dense(dense_units, activation='relu')(x)
+    x = layers.Dropout(dropout)(x)
+    outputs = layers.Dense(num_classes)(x)
+
+    return models.Model(inputs, outputs, name=name)
+
+# === Structured Pruning ===
+def kept_filters(gamma, keep):
+    """Indices (ascending) of the round(keep * n) filters with the largest |BatchNorm gamma|."""
+    count = max(1, int(round(keep * len(gamma))))
+    return np.sort(np.argsort(-np.abs(gamma), kind='stable')[:count])
+
+def prune_cldnn(teacher, keep=0.5, name=None):
+    """
+    Copy of the teacher CLDNN with only `keep` of the filters of every convolution, ranked by
+    the |gamma| of the BatchNormalization after it (network slimming). The input rows of the
+    next convolution / first BiLSTM are sliced to match; LSTM and dense layers are kept whole.
+    The copy is meant as the starting point for distillation, not to be used as is.
+    """
+    teacher_convs = [layer for layer in teacher.layers if isinstance(layer, layers.Conv1D)]
+    teacher_norms = [layer for layer in teacher.layers if isinstance(layer, layers.BatchNormalization)]
+    kept = [kept_filters(norm.get_weights()[0], keep) for norm in teacher_norms]
+
+    config = TEACHER_CONFIG | {'conv_blocks': [(len(indices), conv.kernel_size[0]) for indices, conv in zip(kept, teacher_convs)]}
+    student = create_compact_cldnn_model(teacher.input_shape[1:], teacher.output_shape[-1], **config,
+                                         name=name or f'Pruned_CLDNN_{keep:g}')
+
+    student_convs = [layer for layer in student.layers if isinstance(layer, layers.Conv1D)]
+    student_norms = [layer for layer in student.layers if isinstance(layer, layers.BatchNormalization)]
+    inputs = None  # Kept channels of the previous block (None: all input features)
+    for teacher_conv, teacher_norm, student_conv, student_norm, outputs in zip(teacher_convs, teacher_norms, student_convs, student_norms, kept):
+        kernel, bias = teacher_conv.get_weights()
+        if inputs is not None:
+            kernel = kernel[:, inputs]
+        student_conv.set_weights([kernel[:, :, outputs], bias[outputs]])
+        student_norm.set_weights([weights[outputs] for weights in teacher_norm.get_weights()])
+        inputs = outputs
+
+    # Everything after the convolutions, in layer order
+    teacher_rest = [layer for layer in teacher.layers if isinstance(layer, (layers.Bidirectional, layers.Dense))]
+    student_rest = [layer for layer in student.layers if isinstance(layer, (layers.Bidirectional, layers.Dense))]
+    for i, (teacher_layer, student_layer) in enumerate(zip(teacher_rest, student_rest)):
+        weights = teacher_layer.get_weights()
+        if i == 0:
+            # Forward and backward input kernels read the pruned channels of the last convolution
+            weights[0], weights[3] = weights[0][inputs], weights[3][inputs]
+        student_layer.set_weights(weights)
+    return student
+
+# === Distillation Loss ===
+def distillation_loss(teacher_logits, student_logits, frame_mask, temperature=2.0):
+    """
+    Per-sample KL(teacher || student) of the temperature-softened frame distributions,
+    averaged over the valid (unpadded) frames and scaled by temperature² (Hinton et al.).
+    """
+    teacher_log_probs = tf.nn.log_softmax(teacher_logits / temperature)
+    student_log_probs = tf.nn.log_softmax(student_logits / temperature)
+    kl = tf.reduce_sum(tf.exp(teacher_log_probs) * (teacher_log_probs - student_log_probs), axis=-1)
+    return tf.reduce_sum(kl * frame_mask, axis=1) / tf.maximum(tf.reduce_sum(frame_mask, axis=1), 1.0) * temperature ** 2
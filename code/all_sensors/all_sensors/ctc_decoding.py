@@ -0,0 +1,179 @@
+import math
+import numpy as np
+
+OOV_CHAR = '[UNK]'  # What the inverted StringLookup returns for indices outside the vocabulary
+
+# === Index -> Character Table ===
+def build_index_to_char(vocabulary):
+    """
+    Array mapping CTC class indices to characters, built once from
+    char_to_num.get_vocabulary(). Index 0 is the 'BLANK' OOV token; one extra
+    entry catches indices past the vocabulary, like num_to_char does.
+    """
+    return np.array(list(vocabulary) + [OOV_CHAR], dtype=object)
+
+# === Greedy CTC Decoding (NumPy) ===
+def greedy_decode(logits, index_to_char, blank_index=None):
+    """
+    Decodes a batch of logits (batch, time, classes) to strings in one pass:
+    argmax per frame, collapse repeats, drop the CTC blank and index 0.
+    Matches decode_predictions_tf: tf.nn.ctc_greedy_decoder uses the last class
+    as blank by default, and the lookup's index 0 was filtered out afterwards.
+    """
+    logits = np.asarray(logits)
+    blank_index = logits.shape[-1] - 1 if blank_index is None else blank_index
+
+    best = logits.argmax(axis=-1)
+    keep = best != blank_index
+    keep[:, 1:] &= best[:, 1:] != best[:, :-1]
+    keep &= best > 0
+
+    indices = np.minimum(best, len(index_to_char) - 1)
+    return [''.join(index_to_char[row[mask]]) for row, mask in zip(indices, keep)]
+
+# === Reference TensorFlow Decoder ===
+def decode_predictions_tf(logits, num_to_char):
+    """Previous TF implementation, kept as the reference for parity checks and benchmarks."""
+    import tensorflow as tf
+
+    decoded_predictions, _ = tf.nn.ctc_greedy_decoder(
+        tf.transpose(logits, [1, 0, 2]),
+        tf.fill([tf.shape(logits)[0]], tf.shape(logits)[1])
+    )
+    dense_predictions = tf.sparse.to_dense(decoded_predictions[0], default_value=0)
+    predicted_texts = [
+        ''.join(num_to_char(index).numpy().decode('utf-8') for index in prediction if index > 0)
+        for prediction in dense_predictions
+    ]
+    return predicted_texts
+
+# === Lexicon Prefix Trie ===
+class LexiconTrie:
+    """
+    Character trie over the allowed entries (words, phrases and single symbols
+    from get_complete_set()). Decoded text must be a concatenation of entries;
+    each entry started costs `entry_penalty` (log-prob), which favours whole
+    words over strings of single-character entries.
+    """
+
+    def __init__(self, entries, entry_penalty=-2.0):
+        self.children = [{}]
+        self.terminal = [False]
+        self.entry_penalty = entry_penalty
+        self.transitions = {}  # (node, char) -> ((next_node, log bonus), ...)
+        for entry in entries:
+            node = 0
+            for char in entry:
+                if char not in self.children[node]:
+                    self.children[node][char] = len(self.children)
+                    self.children.append({})
+                    self.terminal.append(False)
+                node = self.children[node][char]
+            self.terminal[node] = True
+
+    def step(self, node, char):
+        """States reachable from `node` by emitting `char`: continue the entry or start a new one."""
+        key = (node, char)
+        if key not in self.transitions:
+            states = []
+            if char in self.children[node] and node != 0:
+                states.append((self.children[node][char], 0.0))
+            if (node == 0 or self.terminal[node]) and char in self.children[0]:
+                states.append((self.children[0][char], self.entry_penalty))
+            self.transitions[key] = tuple(states)
+        return self.transitions[key]
+
+def _logaddexp(a, b):
+    if a == -math.inf:
+        return b
+    if b == -math.inf:
+        return a
+    if a < b:
+        a, b = b, a
+    return a + math.log1p(math.exp(b - a))
+
+def log_softmax(logits):
+    logits = np.asarray(logits, dtype=np.float64)
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    return shifted - np.log(np.exp(shifted).sum(axis=-1, keepdims=True))
+
+# === CTC Prefix Beam Search ===
+def beam_search_decode(logits, index_to_char, beam_width=8, prune_threshold=1e-3, max_candidates=8, lexicon=None):
+    """
+    CTC prefix beam search over a batch of logits (batch, time, classes).
+    - Class 0 is the blank the model was trained with (ctc_loss blank_index=0);
+      classes past the vocabulary never occur in labels and count as blank
+    - Per frame only the `max_candidates` most likely characters with probability
+      >= prune_threshold are expanded, and only `beam_width` prefixes are kept
+    - With a LexiconTrie, prefixes must follow the trie
+    """
+    log_probs = log_softmax(logits)
+    num_chars = len(index_to_char) - 1  # Table has one extra OOV slot
+    log_threshold = math.log(prune_threshold)
+
+    # Blank mass per frame: class 0 plus any classes past the vocabulary
+    blank_log_probs = np.logaddexp.reduce(
+        np.concatenate((log_probs[..., :1], log_probs[..., num_chars:]), axis=-1), axis=-1)
+
+    texts = []
+    for sequence, blank_sequence in zip(log_probs, blank_log_probs):
+        # (prefix class indices, trie node) -> [log p ending in blank, log p ending in a character]
+        beams = {((), 0): [0.0, -math.inf]}
+
+        for frame, blank_lp in zip(sequence, blank_sequence.tolist()):
+            char_frame = frame[1:num_chars]
+            candidates = np.flatnonzero(char_frame >= log_threshold)
+            if len(candidates) > max_candidates:
+                candidates = candidates[np.argpartition(char_frame[candidates], -max_candidates)[-max_candidates:]]
+            candidates = (candidates + 1).tolist()
+            frame = frame.tolist()
+            next_beams = {}
+
+            for (prefix, node), (p_blank, p_char) in beams.items():
+                total = _logaddexp(p_blank, p_char)
+                entry = next_beams.setdefault((prefix, node), [-math.inf, -math.inf])
+                entry[0] = _logaddexp(entry[0], total + blank_lp)
+
+                last = prefix[-1] if prefix else None
+                for c in candidates:
+                    char_lp = frame[c]
+                    if c == last:
+                        # Repeated character without a blank in between collapses into the prefix
+                        entry[1] = _logaddexp(entry[1], p_char + char_lp)
+                        extend_lp = p_blank + char_lp
+                    else:
+                        extend_lp = total + char_lp
+
+                    states = ((0, 0.0),) if lexicon is None else lexicon.step(node, index_to_char[c])
+                    for next_node, bonus in states:
+                        extended = next_beams.setdefault((prefix + (c,), next_node), [-math.inf, -math.inf])
+                        extended[1] = _logaddexp(extended[1], extend_lp + bonus)
+
+            if len(next_beams) > beam_width:
+                ranked = sorted(next_beams.items(), key=lambda item: _logaddexp(*item[1]), reverse=True)
+                next_beams = dict(ranked[:beam_width])
+            beams = next_beams
+
+        # Merge trie states that spell the same prefix and pick the best text
+        scores = {}
+        for (prefix, _), (p_blank, p_char) in beams.items():
+            scores[prefix] = _logaddexp(scores.get(prefix, -math.inf), _logaddexp(p_blank, p_char))
+        best = max(scores, key=scores.get)
+        texts.append(''.join(index_to_char[list(best)]))
+    return texts
+
+# === Character Error Rate ===
+def edit_distance(reference, hypothesis):
+    """Levenshtein distance between two strings (one row of the DP table at a time)."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_char in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_char in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_char != hyp_char)))
+        previous = current
+    return previous[-1]
+
+def character_error_rate(references, hypotheses):
+    """Total edits over total reference characters, across all pairs."""
+    edits = sum(edit_distance(ref, hyp) for ref, hyp in zip(references, hypotheses))
+    return edits / max(1, sum(len(ref) for ref in references))
@@ -0,0 +1,224 @@
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+import numpy as np
+import tensorflow as tf
+from characters import get_complete_set
+from inference import BatchedModelRunner, load_vocabulary, vocabulary_path, standardize_chunks
+from ctc_decoding import build_index_to_char, character_error_rate
+from model_backends import KerasBackend
+from normalization import load_normalizer, scaler_stats_path
+from replay import labelled_segments
+from export_tflite import decode_segments
+from compact_cldnn import STUDENTS, create_compact_cldnn_model, prune_cldnn, distillation_loss
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data_analysis_and_processing_scripts'))
+from bucketing import DOWNSAMPLE, pack_labels, make_ctc_loss
+
+# Distils the CTC CLDNN (teacher) into compact students and reports the Pareto front of
+# latency and parameter count against CER on held-out recordings.
+# - Students: the designed architectures in compact_cldnn.STUDENTS, plus the teacher with
+#   only part of its convolution filters (structured pruning) as a warm start
+# - Training: CTC loss on the labels plus KL divergence to the teacher's softened frame
+#   distributions; the teacher logits are computed once, before training
+# - Held-out recordings are whole CSVs (the last --holdout of the sorted list), never trained on.
+#   The teacher was trained on a random split of all recordings, so its CER here is optimistic.
+# - Latency: one chunk through the model (batch 1, as in a live hop), median over repeats
+# The chosen student (fastest on the front within --max-cer-increase of the teacher) is saved
+# with the teacher's scaler statistics and vocabulary; set model_filename = "cldnn_compact_model.h5" in the live scripts.
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/distill_cldnn.py --students narrow separable tiny --prune 0.5 0.25
+
+# === Configuration ===
+model_folder = "all_sensors/model_parameters"
+teacher_filename = "cldnn_full_model.h5"
+student_filename = "cldnn_compact_model.h5"
+dataset_pattern = "all_sensors/dataset/all_data*.csv"
+results_path = "all_sensors/benchmark_results/compact_cldnn.jsonl"
+num_features = 12
+temperature = 2.0  # Softening of teacher and student frame distributions
+ctc_weight = 0.5  # Loss = ctc_weight * CTC + (1 - ctc_weight) * distillation
+batch_size = 32
+learning_rate = 1e-3
+validation_fraction = 0.1  # Of the training segments, for early stopping
+latency_repeats = 50
+
+# === Training Data ===
+def segment_arrays(segments, chunk_size, char_index):
+    """Segments zero padded to chunk_size -> (x, packed labels with input lengths)."""
+    x = np.zeros((len(segments), chunk_size, num_features), dtype=np.float32)
+    lengths = np.zeros(len(segments), dtype=np.int32)
+    max_label_length = max(len(label) for label, _ in segments)
+    labels = np.zeros((len(segments), max_label_length), dtype=np.int32)
+    for i, (label, segment) in enumerate(segments):
+        lengths[i] = min(len(segment), chunk_size)
+        x[i, :lengths[i]] = segment[:lengths[i]]
+        labels[i, :len(label)] = [char_index[char] for char in label]
+    return x, pack_labels(labels, lengths)
+
+def predict_logits(model, x, chunk_size, batch=256):
+    runner = BatchedModelRunner(model, chunk_size, num_features)
+    return np.concatenate([runner(x[start:start + batch]) for start in range(0, len(x), batch)])
+
+# === Distillation ===
+def distill(student, x, y, teacher_logits, epochs, patience, seed=0):
+    """
+    Trains `student` on CTC + distillation loss with Adam, early stopping on the loss of a
+    held-back validation slice of the training segments. Restores the best weights.
+    """
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(x))
+    validation = order[:int(len(x) * validation_fraction)]
+    train = order[len(validation):]
+    ctc_loss = make_ctc_loss()
+    optimizer = tf.keras.optimizers.Adam(learning_rate)
+
+    def frame_mask(y_batch, frames):
+        valid = tf.clip_by_value(y_batch[:, 0] // DOWNSAMPLE, 1, frames)
+        return tf.sequence_mask(valid, frames, dtype=tf.float32)
+
+    def loss_fn(x_batch, y_batch, teacher_batch, training):
+        logits = student(x_batch, training=training)
+        mask = frame_mask(y_batch, tf.shape(logits)[1])
+        loss = ctc_weight * ctc_loss(y_batch, logits) + (1 - ctc_weight) * distillation_loss(teacher_batch, logits, mask, temperature)
+        return tf.reduce_mean(loss)
+
+    @tf.function
+    def train_step(x_batch, y_batch, teacher_batch):
+        with tf.GradientTape() as tape:
+            loss = loss_fn(x_batch, y_batch, teacher_batch, True)
+        gradients = tape.gradient(loss, student.trainable_variables)
+        optimizer.apply_gradients(zip(gradients, student.trainable_variables))
+        return loss
+
+    validation_step = tf.function(lambda x_batch, y_batch, teacher_batch: loss_fn(x_batch, y_batch, teacher_batch, False))
+
+    best_loss, best_weights, waited = np.inf, student.get_weights(), 0
+    for epoch in range(epochs):
+        epoch_start = time.perf_counter()
+        train = rng.permutation(train)
+        train_losses = [float(train_step(x[batch], y[batch], teacher_logits[batch]))
+                        for batch in np.array_split(train, -(-len(train) // batch_size))]
+        validation_loss = np.mean([float(validation_step(x[batch], y[batch], teacher_logits[batch]))
+                                   for batch in np.array_split(validation, max(1, -(-len(validation) // batch_size)))])
+        print(f"  epoch {epoch + 1:3d}: loss {np.mean(train_losses):.4f}, val_loss {validation_loss:.4f} "
+              f"({time.perf_counter() - epoch_start:.1f} s)")
+        if validation_loss < best_loss:
+            best_loss, best_weights, waited = validation_loss, student.get_weights(), 0
+        else:
+            waited += 1
+            if waited >= patience:
+                break
+    student.set_weights(best_weights)
+    return student
+
+# === Evaluation ===
+def chunk_latency_ms(model, chunk_size):
+    """Median milliseconds for one chunk (batch 1) through the model, after one warm-up call."""
+    runner = BatchedModelRunner(model, chunk_size, num_features)
+    chunk = np.zeros((1, chunk_size, num_features), dtype=np.float32)
+    runner(chunk)
+    latencies = []
+    for _ in range(latency_repeats):
+        start = time.perf_counter()
+        runner(chunk)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+def evaluate(name, model, segments, chunk_size, index_to_char, per_chunk):
+    runner = BatchedModelRunner(model, chunk_size, num_features)
+    predict_fn = (lambda batch: runner(standardize_chunks(batch))) if per_chunk else runner
+    texts, segment_ms = decode_segments(predict_fn, segments, chunk_size, index_to_char)
+    return {"model": name, "params": int(model.count_params()),
+            "chunk_latency_ms": round(chunk_latency_ms(model, chunk_size), 3),
+            "segment_ms": round(segment_ms, 3),
+            "cer": round(character_error_rate([label for label, _ in segments], texts), 4)}
+
+def pareto_front(results, keys=("chunk_latency_ms", "params", "cer")):
+    """Results not dominated by another result (no worse in every key, better in one)."""
+    def dominates(a, b):
+        return all(a[key] <= b[key] for key in keys) and any(a[key] < b[key] for key in keys)
+    return [result for result in results if not any(dominates(other, result) for other in results)]
+
+# === Main Execution ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distil the CLDNN into compact students and report latency/size vs CER.")
+    parser.add_argument("--students", nargs="*", choices=list(STUDENTS), default=list(STUDENTS))
+    parser.add_argument("--prune", type=float, nargs="*", default=[0.5, 0.25], help="Fractions of teacher filters to keep")
+    parser.add_argument("--dataset", default=dataset_pattern, help="Glob of recorded CSVs")
+    parser.add_argument("--holdout", type=int, default=8, help="Recordings (last in sorted order) used only for CER")
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--patience", type=int, default=10)
+    parser.add_argument("--max-cer-increase", type=float, default=0.02, help="Allowed CER above the teacher for the saved student")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=results_path, help="JSON lines file the results are appended to")
+    args = parser.parse_args()
+
+    tf.keras.utils.set_random_seed(args.seed)
+    teacher_path = os.path.join(model_folder, teacher_filename)
+    teacher = KerasBackend(teacher_path, num_features).model
+    chunk_size = teacher.input_shape[1]
+    normalizer = load_normalizer(teacher_path, 'global')  # Students see exactly the teacher's inputs
+
+    characters = set(char for label in get_complete_set() for char in label)
+    vocabulary = load_vocabulary(teacher_path, characters)  # CTC targets must use the teacher's class order
+    index_to_char = build_index_to_char(vocabulary)
+    char_index = {char: index for index, char in enumerate(vocabulary)}
+
+    csv_paths = sorted(glob.glob(args.dataset))
+    train_paths, holdout_paths = csv_paths[:-args.holdout], csv_paths[-args.holdout:]
+    train_segments = [(label, segment) for label, segment in labelled_segments(train_paths, normalizer) if len(segment) <= chunk_size]
+    holdout_segments = labelled_segments(holdout_paths, normalizer, chunk_size)
+    print(f"{len(train_segments)} training segments from {len(train_paths)} recordings, "
+          f"{len(holdout_segments)} held-out segments from {len(holdout_paths)} recordings")
+
+    x, y = segment_arrays(train_segments, chunk_size, char_index)
+    if normalizer is None:
+        standardize_chunks(x)
+    teacher_logits = predict_logits(teacher, x, chunk_size)
+
+    results = [evaluate("teacher", teacher, holdout_segments, chunk_size, index_to_char, normalizer is None)]
+    candidates = {name: lambda name=name: create_compact_cldnn_model(teacher.input_shape[1:], teacher.output_shape[-1], **STUDENTS[name], name=name)
+                  for name in args.students}
+    candidates |= {f"pruned_{keep:g}": lambda keep=keep: prune_cldnn(teacher, keep) for keep in args.prune}
+
+    students = {}
+    for name, build in candidates.items():
+        print(f"Distilling {name}")
+        students[name] = distill(build(), x, y, teacher_logits, args.epochs, args.patience, args.seed)
+        results.append(evaluate(name, students[name], holdout_segments, chunk_size, index_to_char, normalizer is None))
+
+    # === Pareto Report ===
+    front = pareto_front(results)
+    print(f"\n{'model':>22} {'params':>10} {'chunk ms':>9} {'segment ms':>11} {'CER':>7}")
+    for result in sorted(results, key=lambda result: result["chunk_latency_ms"]):
+        print(f"{result['model']:>22} {result['params']:>10,} {result['chunk_latency_ms']:>9.2f} "
+              f"{result['segment_ms']:>11.2f} {result['cer']:>7.4f}{'  *' if result in front else ''}")
+    print("* on the Pareto front of latency, parameters and CER")
+
+    teacher_cer = results[0]["cer"]
+    eligible = [result for result in front if result["model"] in students and result["cer"] <= teacher_cer + args.max_cer_increase]
+    chosen = min(eligible, key=lambda result: result["chunk_latency_ms"]) if eligible else None
+    if chosen is not None:
+        student_path = os.path.join(model_folder, student_filename)
+        students[chosen["model"]].save(student_path)
+        for stats_path in (scaler_stats_path, vocabulary_path):
+            if os.path.exists(stats_path(teacher_path)):
+                shutil.copyfile(stats_path(teacher_path), stats_path(student_path))
+        print(f"✅ Saved {chosen['model']} to {student_path}: {chosen['params'] / results[0]['params']:.1%} of the teacher's "
+              f"parameters, {results[0]['chunk_latency_ms'] / chosen['chunk_latency_ms']:.1f}x faster per chunk, "
+              f"CER {chosen['cer']:.4f} vs {teacher_cer:.4f}")
+    else:
+        print(f"⚠️ No student within {args.max_cer_increase} CER of the teacher, nothing saved")
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'a') as results_file:
+        for result in results:
+            results_file.write(json.dumps({"timestamp": datetime.now().isoformat(timespec='seconds'),
+                                           "holdout_recordings": len(holdout_paths), **result,
+                                           "pareto": result in front,
+                                           "saved": chosen is not None and result["model"] == chosen["model"]}) + '\n')
@@ -0,0 +1,109 @@
+import argparse
+import glob
+import os
+import time
+import numpy as np
+import tensorflow as tf
+from characters import get_complete_set
+from inference import IncrementalPredictor, load_vocabulary, standardize_chunks
+from ctc_decoding import build_index_to_char, greedy_decode, character_error_rate
+from model_backends import KerasBackend, TFLiteBackend, tflite_model_path
+from normalization import load_normalizer
+from replay import labelled_segments
+
+# Converts the trained CLDNN to TFLite and checks the exported models against the float Keras model.
+# - float16: weights stored as float16
+# - dynamic: dynamic-range quantization (int8 weights, float activations)
+# - int8: full integer quantization calibrated on chunks of the dataset CSVs, float fallback where needed
+# The parity check decodes every labelled segment of the recordings with each model and reports
+# the character error rate against the labels and the drift against the Keras model.
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/export_tflite.py --variants float16 dynamic int8
+
+# === Configuration ===
+model_folder = "all_sensors/model_parameters"
+model_filename = "cldnn_full_model.h5"
+dataset_pattern = "all_sensors/dataset/all_data*.csv"
+num_features = 12
+calibration_chunks = 200
+VARIANTS = ('float16', 'dynamic', 'int8')
+
+# === Calibration Data ===
+def calibration_batches(segments, chunk_size, normalizer, count, seed=0):
+    """Representative dataset for int8 calibration: random chunks of the segments."""
+    rng = np.random.default_rng(seed)
+    for index in rng.integers(0, len(segments), count):
+        segment = segments[index][1]
+        start = rng.integers(0, len(segment) - chunk_size + 1)
+        chunk = segment[start:start + chunk_size][np.newaxis].copy()
+        yield [chunk if normalizer is not None else standardize_chunks(chunk)]
+
+# === Conversion ===
+def convert(model, variant, representative_dataset=None):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == 'int8':
+        converter.representative_dataset = representative_dataset
+        # Ops without an int8 kernel (e.g. parts of the LSTMs) stay in float; inputs/outputs stay float32
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8, tf.lite.OpsSet.TFLITE_BUILTINS]
+    return converter.convert()
+
+# === Parity Check ===
+def decode_segments(predict_fn, segments, chunk_size, index_to_char):
+    """Greedy-decodes each segment the way the live path decodes a window."""
+    predictor = IncrementalPredictor(predict_fn, chunk_size)
+    texts = []
+    start = time.perf_counter()
+    for _, segment in segments:
+        predictor.reset()
+        logits = predictor.update(segment, 0)
+        texts.append(greedy_decode(logits[np.newaxis], index_to_char)[0])
+    return texts, (time.perf_counter() - start) * 1000 / max(1, len(segments))
+
+# === Main Execution ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the CLDNN to TFLite and report CER drift against the Keras model.")
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--dataset", default=dataset_pattern, help="Glob of recorded CSVs used for calibration and parity")
+    parser.add_argument("--max-files", type=int, default=None, help="Only use the first N recordings")
+    parser.add_argument("--skip-parity", action="store_true")
+    args = parser.parse_args()
+
+    model_path = os.path.join(model_folder, model_filename)
+    keras_backend = KerasBackend(model_path, num_features)
+    chunk_size = keras_backend.chunk_size
+    normalizer = load_normalizer(model_path, 'global')
+
+    csv_paths = sorted(glob.glob(args.dataset))[:args.max_files]
+    segments = labelled_segments(csv_paths, normalizer, chunk_size)
+    print(f"{len(segments)} labelled segments from {len(csv_paths)} recordings")
+
+    for variant in args.variants:
+        representative_dataset = lambda: calibration_batches(segments, chunk_size, normalizer, calibration_chunks)
+        tflite_model = convert(keras_backend.model, variant, representative_dataset)
+        with open(tflite_model_path(model_path, variant), 'wb') as tflite_file:
+            tflite_file.write(tflite_model)
+        print(f"✅ {variant}: {tflite_model_path(model_path, variant)} ({len(tflite_model) / 1e6:.2f} MB)")
+
+    if args.skip_parity:
+        raise SystemExit
+
+    characters = set(char for label in get_complete_set() for char in label)
+    index_to_char = build_index_to_char(load_vocabulary(model_path, characters))
+    labels = [label for label, _ in segments]
+
+    def with_normalization(backend):
+        return backend if normalizer is not None else (lambda batch: backend(standardize_chunks(batch)))
+
+    reference, keras_ms = decode_segments(with_normalization(keras_backend), segments, chunk_size, index_to_char)
+    print(f"{'keras':>8}: CER {character_error_rate(labels, reference):.4f}, {keras_ms:7.2f} ms per segment, "
+          f"{os.path.getsize(model_path) / 1e6:.2f} MB")
+
+    for variant in args.variants:
+        path = tflite_model_path(model_path, variant)
+        texts, variant_ms = decode_segments(with_normalization(TFLiteBackend(path)), segments, chunk_size, index_to_char)
+        print(f"{variant:>8}: CER {character_error_rate(labels, texts):.4f}, "
+              f"drift vs keras {character_error_rate(reference, texts):.4f}, "
+              f"{variant_ms:7.2f} ms per segment, {os.path.getsize(path) / 1e6:.2f} MB")
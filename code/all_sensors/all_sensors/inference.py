@@ -0,0 +1,164 @@
+import json
+import os
+import numpy as np
+
+# === Incremental Chunk Inference ===
+class IncrementalPredictor:
+    """
+    Runs the model over half-overlapping chunks of a sliding window.
+    - Chunks are placed on a grid of absolute sample offsets, so consecutive
+      windows share most of their chunks
+    - Logits are cached per chunk offset; each hop only predicts chunks that
+      contain new samples
+    - New chunks are copied into one preallocated batch and predicted together
+    - Cached logits are stitched on a common frame grid before CTC decoding
+    """
+
+    def __init__(self, predict_fn, chunk_size, chunk_step=None):
+        self.predict_fn = predict_fn  # batch (n, chunk_size, features) -> logits (n, frames, classes)
+        self.chunk_size = chunk_size
+        self.chunk_step = chunk_step or chunk_size // 2
+        self.cache = {}  # absolute chunk start offset -> logits
+        self.batch = None  # Preallocated (max_chunks, chunk_size, features) input tensor
+
+    def reset(self):
+        """Drop all cached logits, e.g. when the pen is (de)activated."""
+        self.cache.clear()
+
+    def chunk_offsets(self, window_start, window_length):
+        """Absolute start offsets of all complete chunks inside the window."""
+        first = -(-window_start // self.chunk_step) * self.chunk_step  # Round up to the chunk grid
+        last = window_start + window_length - self.chunk_size
+        return list(range(first, last + 1, self.chunk_step))
+
+    def update(self, window, window_start):
+        """
+        Returns the stitched logits (frames, classes) for the window starting at
+        absolute sample offset `window_start`, or None if it holds no full chunk.
+        """
+        offsets, new_offsets, batch = self.prepare(window, window_start)
+        return self.complete(offsets, new_offsets, self.predict_fn(batch) if new_offsets else None)
+
+    def prepare(self, window, window_start):
+        """
+        First half of update() for callers that run the model themselves, e.g. batched
+        across several pens: returns (offsets, new offsets, batch of the new chunks).
+        The batch is only valid until the next prepare().
+        """
+        offsets = self.chunk_offsets(window_start, len(window))
+
+        # Evict chunks that have slid out of the window
+        for offset in [offset for offset in self.cache if offset < window_start]:
+            del self.cache[offset]
+
+        new_offsets = [offset for offset in offsets if offset not in self.cache]
+        batch = self.fill_batch(window, window_start, new_offsets) if new_offsets else None
+        return offsets, new_offsets, batch
+
+    def complete(self, offsets, new_offsets, logits):
+        """Second half of update(): caches the logits of the new chunks and stitches the window."""
+        for offset, chunk_logits in zip(new_offsets, logits if new_offsets else []):
+            self.cache[offset] = chunk_logits
+        return self.stitch(offsets)
+
+    def fill_batch(self, window, window_start, offsets):
+        """Copy the chunks at `offsets` into the preallocated batch, in order."""
+        window = np.asarray(window, dtype=np.float32)  # No copy for a float32 block; lists of rows still work
+        num_features = window.shape[1]
+        if self.batch is None or len(self.batch) < len(offsets) or self.batch.shape[2] != num_features:
+            self.batch = np.empty((len(offsets), self.chunk_size, num_features), dtype=np.float32)
+
+        for i, offset in enumerate(offsets):
+            start = offset - window_start
+            self.batch[i] = window[start:start + self.chunk_size]
+        return self.batch[:len(offsets)]
+
+    def stitch(self, offsets):
+        """Average overlapping chunk logits onto one frame sequence."""
+        if not offsets:
+            return None
+
+        frames, num_classes = self.cache[offsets[0]].shape
+        samples_per_frame = self.chunk_size / frames
+        base = offsets[0]
+        total_frames = int(round((offsets[-1] - base) / samples_per_frame)) + frames
+
+        summed = np.zeros((total_frames, num_classes), dtype=np.float32)
+        counts = np.zeros((total_frames, 1), dtype=np.float32)
+        for offset in offsets:
+            frame = int(round((offset - base) / samples_per_frame))
+            summed[frame:frame + frames] += self.cache[offset]
+            counts[frame:frame + frames] += 1
+
+        return summed / counts
+
+
+# === Batched Model Execution ===
+class BatchedModelRunner:
+    """
+    Runs a Keras model on a whole batch of chunks in one forward pass.
+    The call is traced once as a tf.function with a fixed input signature,
+    so varying batch sizes never trigger retracing.
+    """
+
+    def __init__(self, model, chunk_size, num_features):
+        import tensorflow as tf
+
+        self.model = model
+        self.forward = tf.function(
+            lambda batch: self.model(batch, training=False),
+            input_signature=[tf.TensorSpec(shape=(None, chunk_size, num_features), dtype=tf.float32)],
+        )
+
+    def __call__(self, batch):
+        return self.forward(np.asarray(batch, dtype=np.float32)).numpy()
+
+
+# === Character Lookups ===
+def build_char_lookups(characters, blank_token='BLANK'):
+    """StringLookup layers mapping characters to CTC indices and back (0 is blank)."""
+    from tensorflow.keras import layers
+
+    char_to_num = layers.StringLookup(vocabulary=sorted(characters), mask_token=None, oov_token=blank_token)
+    num_to_char = layers.StringLookup(vocabulary=char_to_num.get_vocabulary(), mask_token=None, invert=True)
+    return char_to_num, num_to_char
+
+def build_vocabulary(characters, blank_token='BLANK'):
+    """Same list as build_char_lookups(...)[0].get_vocabulary(), without importing TensorFlow."""
+    return [blank_token] + sorted(characters)
+
+# === Persisted Vocabulary ===
+def vocabulary_path(model_path):
+    """The vocabulary lives next to the model: cldnn_full_model.h5 -> cldnn_full_model_vocabulary.json"""
+    return os.path.splitext(model_path)[0] + "_vocabulary.json"
+
+def save_vocabulary(path, vocabulary):
+    """Writes the class order the model was trained with, i.e. char_to_num.get_vocabulary() (index 0 is blank)."""
+    with open(path, 'w', encoding='utf-8') as vocabulary_file:
+        json.dump(list(vocabulary), vocabulary_file, ensure_ascii=False, indent=2)
+
+def load_vocabulary(model_path, characters, blank_token='BLANK'):
+    """
+    The vocabulary saved next to the model, or build_vocabulary(characters) if there is none.
+    Models trained before the file was saved used the order of a Python set, which changes
+    with the hash seed, so their class mapping can only be trusted with a saved file.
+    """
+    path = vocabulary_path(model_path)
+    if not os.path.exists(path):
+        print(f"⚠️ No vocabulary at {path}, assuming the sorted character set")
+        return build_vocabulary(characters, blank_token)
+    with open(path, encoding='utf-8') as vocabulary_file:
+        return json.load(vocabulary_file)
+
+# === Standardize Chunks ===
+def standardize_chunks(batch):
+    """
+    Z-score normalizes every chunk of the batch over its own time axis, in place.
+    Matches fitting a fresh StandardScaler on each chunk.
+    """
+    mean = batch.mean(axis=1, keepdims=True)
+    std = batch.std(axis=1, keepdims=True)
+    std[std == 0] = 1.0
+    batch -= mean
+    batch /= std
+    return batch
@@ -0,0 +1,218 @@
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+try:
+    from .serial_ingest import SAMPLES, MALFORMED  # Loaded as all_sensors.all_sensors.metrics
+except ImportError:
+    from serial_ingest import SAMPLES, MALFORMED  # Run from this folder
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+BUCKETS_MS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+METRIC_PREFIX = 'neverlatex'
+
+# === Stage Histograms and Counters ===
+class Histogram:
+    def __init__(self, bounds_ms=BUCKETS_MS):
+        self.bounds_ms = bounds_ms
+        self.counts = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+
+    def percentile(self, q):
+        """Estimate, interpolated linearly inside the bucket that holds the q-th percentile."""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                low = self.bounds_ms[i - 1] if i else 0.0
+                high = self.bounds_ms[i] if i < len(self.bounds_ms) else low * 2
+                return low + (high - low) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds_ms[-1]
+
+class Metrics:
+    """
+    Per-stage latency histograms, counters and sampled gauges of the live path.
+    Instrumentation is added by wrapping callables (timed(), instrument_ingest()) once at
+    startup, so with metrics disabled nothing is wrapped and the hot path is unchanged.
+    Gauges are only evaluated when a snapshot is taken.
+    """
+
+    def __init__(self, bounds_ms=BUCKETS_MS):
+        self.bounds_ms = bounds_ms
+        self.stages = {}    # stage -> Histogram
+        self.counters = {}  # name -> running total
+        self.gauges = {}    # name -> zero-argument callable
+        self.start = time.perf_counter()
+        self.last_snapshot = (self.start, {})
+
+    def observe(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram(self.bounds_ms)
+        histogram.observe(seconds * 1000)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, fn, **labels):
+        """Registers `fn` as a gauge; labels (e.g. pen='usbmodem101') tell series of one name apart."""
+        if labels:
+            name += "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+        self.gauges[name] = fn
+
+    def timed(self, stage, fn):
+        """`fn` wrapped so every call is recorded in the `stage` histogram."""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.observe(stage, time.perf_counter() - start)
+        return wrapper
+
+    # === Export ===
+    def snapshot(self):
+        now = time.perf_counter()
+        previous_time, previous_counters = self.last_snapshot
+        counters = dict(self.counters)
+        self.last_snapshot = (now, counters)
+        elapsed = max(now - previous_time, 1e-9)
+        return {
+            "timestamp": time.time(),
+            "uptime_s": round(now - self.start, 3),
+            "stages_ms": {stage: {"count": histogram.count,
+                                  "mean": round(histogram.sum_ms / histogram.count, 4) if histogram.count else None,
+                                  **{f"p{q}": round(histogram.percentile(q), 4) if histogram.count else None for q in (50, 90, 99)}}
+                          for stage, histogram in list(self.stages.items())},
+            "counters": counters,
+            "rates_per_s": {name: round((total - previous_counters.get(name, 0)) / elapsed, 2) for name, total in counters.items()},
+            "gauges": self.read_gauges(),
+        }
+
+    def read_gauges(self):
+        gauges = {}
+        for name, fn in list(self.gauges.items()):
+            try:
+                gauges[name] = fn()
+            except Exception:
+                gauges[name] = None  # e.g. the serial port is closed
+        return gauges
+
+    def prometheus_text(self):
+        lines = [f"# TYPE {METRIC_PREFIX}_stage_seconds histogram"]
+        for stage, histogram in list(self.stages.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(list(histogram.bounds_ms) + ['+Inf'], histogram.counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else f"{bound / 1000:g}"
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{stage}"}} {histogram.sum_ms / 1000:.6f}')
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        for name, total in list(self.counters.items()):
+            lines += [f"# TYPE {METRIC_PREFIX}_{name}_total counter", f"{METRIC_PREFIX}_{name}_total {total}"]
+        declared = set()
+        for name, value in sorted(self.read_gauges().items()):
+            base = name.split("{")[0]
+            if base not in declared:
+                declared.add(base)
+                lines.append(f"# TYPE {METRIC_PREFIX}_{base} gauge")
+            if value is not None:
+                lines.append(f"{METRIC_PREFIX}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+# === Ingest Instrumentation ===
+def instrument_ingest(metrics, ingest, ser=None, **labels):
+    """
+    Wraps ingest.feed() (SerialIngest or BinaryIngest) and the port's read() so the port
+    read (including the wait for data) and the parse are timed separately.
+    - Counts bytes, samples and malformed lines
+    - Exposes the serial input-buffer occupancy and binary sequence gaps as gauges,
+      labelled with `labels` when several pens share one Metrics
+    """
+    feed = ingest.feed
+
+    def timed_feed(data):
+        start = time.perf_counter()
+        events = feed(data)
+        metrics.observe('parse', time.perf_counter() - start)
+        metrics.count('bytes', len(data))
+        for kind, payload in events:
+            if kind == SAMPLES:
+                metrics.count('samples', len(payload))
+            elif kind == MALFORMED:
+                metrics.count('malformed_lines')
+        return events
+
+    ingest.feed = timed_feed
+    ser = ser if ser is not None else ingest.ser
+    if ser is not None:
+        ser.read = metrics.timed('serial_read', ser.read)
+        metrics.gauge('serial_in_waiting_bytes', lambda: ser.in_waiting, **labels)
+    if hasattr(ingest, 'decoder'):
+        metrics.gauge('binary_seq_gaps', lambda: ingest.decoder.seq_gaps, **labels)
+    return ingest
+
+# === Periodic JSON Lines and Prometheus Endpoint ===
+class MetricsExporter:
+    """
+    Background thread appending a JSON snapshot to `path` every `interval` seconds,
+    plus an optional Prometheus text endpoint at http://<host>:<port>/metrics.
+    """
+
+    def __init__(self, metrics, path=None, interval=10.0, port=None, host='127.0.0.1'):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.http = None
+        if port is not None:
+            self.http = ThreadingHTTPServer((host, port), self.handler())
+            threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            threading.Thread(target=self.run, daemon=True).start()
+
+    def handler(self):
+        metrics = self.metrics
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Scrapes are not worth a line on the terminal
+        return MetricsHandler
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.write()
+
+    def write(self):
+        with open(self.path, 'a') as metrics_file:
+            metrics_file.write(json.dumps(self.metrics.snapshot()) + '\n')
+
+    def close(self):
+        self.stop_event.set()
+        if self.path is not None:
+            self.write()
+        if self.http is not None:
+            self.http.shutdown()
@@ -0,0 +1,90 @@
+import os
+import numpy as np
+
+# Inference backends for the CLDNN: both take a batch (n, chunk_size, features)
+# float32 and return logits (n, frames, classes) as NumPy, and expose `chunk_size`.
+
+BACKENDS = ('keras', 'tflite')
+
+# === Keras Backend ===
+class KerasBackend:
+    """Full Keras model through BatchedModelRunner (imports all of TensorFlow)."""
+
+    def __init__(self, model_path, num_features=12):
+        from tensorflow.keras.models import load_model
+        from inference import BatchedModelRunner
+
+        self.model = load_model(model_path, custom_objects={'ctc_loss': lambda y_true, y_pred: y_pred})
+        self.chunk_size = self.model.input_shape[1]
+        self.runner = BatchedModelRunner(self.model, self.chunk_size, num_features)
+
+    def __call__(self, batch):
+        return self.runner(batch)
+
+# === TFLite Backend ===
+def _tflite_interpreter(model_path, num_threads):
+    """Prefers the small tflite_runtime package, falls back to TensorFlow's interpreter."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter(model_path=model_path, num_threads=num_threads)
+
+class TFLiteBackend:
+    """
+    Runs an exported .tflite model (see export_tflite.py).
+    - The input is resized only when the batch size changes
+    - Quantized (int8) inputs/outputs are (de)quantized with the tensor's scale and zero point
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        self.interpreter = _tflite_interpreter(model_path, num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.chunk_size = int(self.input['shape'][1])
+        self.batch_size = int(self.input['shape'][0])
+
+    def resize(self, batch_size):
+        shape = [batch_size] + [int(size) for size in self.input['shape'][1:]]
+        self.interpreter.resize_tensor_input(self.input['index'], shape)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = batch_size
+
+    def __call__(self, batch):
+        if len(batch) != self.batch_size:
+            self.resize(len(batch))
+
+        scale, zero_point = self.input['quantization']
+        if scale:
+            batch = np.clip(np.round(batch / scale + zero_point), *_dtype_range(self.input['dtype']))
+        self.interpreter.set_tensor(self.input['index'], batch.astype(self.input['dtype'], copy=False))
+        self.interpreter.invoke()
+
+        logits = self.interpreter.get_tensor(self.output['index'])
+        scale, zero_point = self.output['quantization']
+        if scale:
+            logits = (logits.astype(np.float32) - zero_point) * scale
+        return logits
+
+def _dtype_range(dtype):
+    info = np.iinfo(dtype)
+    return info.min, info.max
+
+# === Pick a Backend ===
+def tflite_model_path(model_path, variant):
+    """cldnn_full_model.h5 + 'float16' -> cldnn_full_model_float16.tflite"""
+    return f"{os.path.splitext(model_path)[0]}_{variant}.tflite"
+
+def load_backend(kind, model_path, num_features=12, tflite_variant='float16', num_threads=None):
+    """
+    Loads the model behind the requested backend.
+    `model_path` is the Keras .h5; the TFLite backend loads its exported variant.
+    """
+    if kind == 'keras':
+        return KerasBackend(model_path, num_features)
+    if kind == 'tflite':
+        return TFLiteBackend(tflite_model_path(model_path, tflite_variant), num_threads)
+    raise ValueError(f"backend must be one of {BACKENDS}")
@@ -0,0 +1,99 @@
+import json
+import os
+import numpy as np
+
+NORMALIZATION_MODES = ('global', 'running', 'per_chunk')
+
+# === Persisted Scaler Statistics ===
+def scaler_stats_path(model_path):
+    """Statistics live next to the model: cldnn_full_model.h5 -> cldnn_full_model_scaler.json"""
+    return os.path.splitext(model_path)[0] + "_scaler.json"
+
+def save_scaler_stats(path, mean, scale, feature_names, count=None):
+    """Writes the mean/scale of a fitted StandardScaler (scaler.mean_, scaler.scale_)."""
+    stats = {
+        "feature_names": list(feature_names),
+        "mean": [float(value) for value in mean],
+        "scale": [float(value) for value in scale],
+        "count": None if count is None else int(count),
+    }
+    with open(path, 'w') as stats_file:
+        json.dump(stats, stats_file, indent=2)
+
+def load_scaler_stats(path):
+    with open(path) as stats_file:
+        stats = json.load(stats_file)
+    return np.array(stats["mean"], dtype=np.float32), np.array(stats["scale"], dtype=np.float32), stats.get("count")
+
+# === Fixed Affine Normalization ===
+class AffineNormalizer:
+    """
+    Applies the training scaler as (x - mean) / scale, in place on a float32 block.
+    Every sample is normalized once, so inference no longer depends on which chunk it lands in.
+    """
+
+    def __init__(self, mean, scale):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        scale = np.asarray(scale, dtype=np.float32)
+        self.inv_scale = np.where(scale == 0, 1.0, 1.0 / scale).astype(np.float32)
+
+    def __call__(self, block):
+        block -= self.mean
+        block *= self.inv_scale
+        return block
+
+# === Running (Welford) Normalization ===
+class RunningNormalizer:
+    """
+    Tracks mean and variance of the incoming samples with Welford's algorithm
+    (Chan's parallel update, one step per block) to follow sensor drift.
+    - Starts from the training statistics, weighted as `prior_count` samples
+    - Each block is normalized with the statistics including that block
+    """
+
+    def __init__(self, mean, scale, prior_count=1000):
+        self.count = float(prior_count)
+        self.mean = np.asarray(mean, dtype=np.float64).copy()
+        self.m2 = np.asarray(scale, dtype=np.float64) ** 2 * self.count
+
+    def update(self, block):
+        block_count = len(block)
+        if not block_count:
+            return
+        block_mean = block.mean(axis=0, dtype=np.float64)
+        block_m2 = ((block - block_mean) ** 2).sum(axis=0, dtype=np.float64)
+
+        total = self.count + block_count
+        delta = block_mean - self.mean
+        self.mean += delta * block_count / total
+        self.m2 += block_m2 + delta ** 2 * self.count * block_count / total
+        self.count = total
+
+    def __call__(self, block):
+        self.update(block)
+        std = np.sqrt(self.m2 / self.count)
+        std[std == 0] = 1.0
+        block -= self.mean.astype(np.float32)
+        block /= std.astype(np.float32)
+        return block
+
+# === Pick the Live Normalizer ===
+def load_normalizer(model_path, mode='global'):
+    """
+    Returns a callable that normalizes a (n, features) block in place, or None
+    when chunks should be standardized individually ('per_chunk', or no stats saved).
+    """
+    if mode not in NORMALIZATION_MODES:
+        raise ValueError(f"normalization must be one of {NORMALIZATION_MODES}")
+    if mode == 'per_chunk':
+        return None
+
+    stats_path = scaler_stats_path(model_path)
+    if not os.path.exists(stats_path):
+        print(f"⚠️ No scaler statistics at {stats_path}, falling back to per-chunk standardization")
+        return None
+
+    mean, scale, _ = load_scaler_stats(stats_path)
+    if mode == 'running':
+        return RunningNormalizer(mean, scale)
+    return AffineNormalizer(mean, scale)
@@ -0,0 +1,101 @@
+import numpy as np
+
+# Force channel indices in the live feature order (..., Force1, Force2, Force3)
+FORCE_CHANNELS = (9, 10, 11)
+
+# === Pen-Down Detection ===
+class PenActivityDetector:
+    """
+    Hysteresis detector on the raw force channels (call it before normalization).
+    - The pen goes down when the strongest force channel reaches `on_threshold`
+      and up again once it falls below `off_threshold` (resting baseline is ~20-30)
+    - A sample counts as active while the pen is down and for `hold_samples`
+      samples after it was last down, so short pressure dips do not split a stroke
+    - Whole blocks are processed at once; state carries over between blocks, and
+      sample indices count every sample since creation like RingBuffer.end
+    """
+
+    def __init__(self, on_threshold=150, off_threshold=100, hold_samples=50, force_channels=FORCE_CHANNELS):
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.hold_samples = hold_samples
+        self.force_channels = list(force_channels)
+        self.samples_seen = 0
+        self.reset()
+
+    def reset(self):
+        """Pen up; sample indices keep counting."""
+        self.pen_down = False
+        self.last_down = -np.inf  # Absolute index of the last pen-down sample
+
+    def update(self, samples):
+        """Per-sample activity (n,) bool of a raw block (n, features)."""
+        level = samples[:, self.force_channels].max(axis=1)
+        indices = np.arange(len(level))
+
+        # Forward-fill the last threshold crossing; samples between the thresholds keep the previous state
+        events = np.where(level >= self.on_threshold, 1, np.where(level < self.off_threshold, 0, -1))
+        last_event = np.maximum.accumulate(np.where(events >= 0, indices, -1))
+        down = np.where(last_event >= 0, events[np.maximum(last_event, 0)] == 1, self.pen_down)
+
+        absolute = self.samples_seen + indices
+        last_down = np.maximum.accumulate(np.where(down, absolute, -np.inf))
+        last_down = np.maximum(last_down, self.last_down)
+        active = absolute - last_down <= self.hold_samples
+
+        if len(level):
+            self.pen_down = bool(down[-1])
+            self.last_down = float(last_down[-1])
+        self.samples_seen += len(level)
+        return active
+
+    @property
+    def last_active(self):
+        """Absolute index of the last active sample (-inf if none yet)."""
+        return self.last_down + self.hold_samples
+
+# === Hop Gating ===
+class PenGate:
+    """
+    Decides which sliding window hops reach the model.
+    - A hop runs while any of its newest `hop_size` samples (or anything observed
+      after them) is active
+    - The first idle hop after a stroke runs once more and is marked as the end of
+      the stroke, so the caller can flush its decoded text and reset the predictor
+    - Counts run and skipped hops for reporting
+    """
+
+    def __init__(self, detector, hop_size):
+        self.detector = detector
+        self.hop_size = hop_size
+        self.in_stroke = False
+        self.hops = 0
+        self.skipped = 0
+
+    def observe(self, raw_samples):
+        """Feed every raw block in arrival order, before it is normalized."""
+        self.detector.update(raw_samples)
+
+    def hop(self, window_end):
+        """
+        (run, stroke_ended) for the hop whose window ends at absolute sample `window_end`,
+        e.g. RingBuffer.end.
+        """
+        self.hops += 1
+        active = self.detector.last_active >= window_end - self.hop_size
+        if active:
+            self.in_stroke = True
+            return True, False
+        if self.in_stroke:
+            self.in_stroke = False
+            return True, True
+        self.skipped += 1
+        return False, False
+
+    def reset(self):
+        self.detector.reset()
+        self.in_stroke = False
+
+    @property
+    def skipped_fraction(self):
+        return self.skipped / self.hops if self.hops else 0.0
@@ -0,0 +1,338 @@
+import argparse
+import asyncio
+import copy
+import csv
+import os
+import time
+from datetime import datetime
+import numpy as np
+from characters import get_complete_set
+from inference import IncrementalPredictor, load_vocabulary, standardize_chunks
+from model_backends import load_backend, BACKENDS
+from ctc_decoding import build_index_to_char, greedy_decode
+from ring_buffer import RingBuffer
+from serial_ingest import SerialIngest, SAMPLES, CONTROL, MALFORMED
+from sensor_protocol import BinaryIngest
+from normalization import load_normalizer, NORMALIZATION_MODES
+from metrics import Metrics, MetricsExporter, instrument_ingest
+
+# Server mode for several pens in one process: every serial port is read by the asyncio
+# event loop, and the ready windows of all pens go to one shared model. The inference
+# engine forms dynamic batches (up to max_batch_windows, waiting at most max_wait_ms for
+# more pens) and sends the decoded text back to each pen's prediction CSV.
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/pen_server.py /dev/tty.usbmodem101 /dev/tty.usbmodem102
+# Fake pens from recorded CSVs: python3 all_sensors/benchmark_pen_server.py
+
+# === Configuration ===
+baud_rate = 115200
+serial_protocol = 'ascii'  # 'ascii' or 'binary', must match BINARY_MODE in the firmware
+model_folder = "all_sensors/model_parameters"
+model_filename = "cldnn_full_model.h5"
+model_backend = 'keras'  # 'keras' or 'tflite' (run export_tflite.py first)
+tflite_variant = 'float16'  # 'float16', 'dynamic' or 'int8'
+prediction_folder = "all_sensors/predicted_data"
+window_size = 1500
+window_step = int(window_size/4)
+num_features = 12
+normalization = 'global'  # 'global' (training scaler), 'running' (drift-tracking) or 'per_chunk' (legacy)
+max_batch_windows = 16  # Most pen windows per model call
+max_wait_ms = 5.0  # How long a ready window may wait for other pens to join its batch
+metrics_path = "all_sensors/benchmark_results/pen_server_metrics.jsonl"  # With --metrics-port or --metrics-path
+metrics_interval = 10.0
+
+def open_port(port):
+    """Non-blocking pyserial port whose fileno() the event loop can watch."""
+    import serial
+    return serial.Serial(port, baud_rate, timeout=0)
+
+# === One Pen ===
+class PenDevice:
+    """
+    Per-pen state: byte parser, sliding window, normalizer and chunk cache.
+    - At most one window per pen waits for the engine; a newer one replaces it (counted as dropped)
+    - The predictor is only touched by the engine, so resets requested by control
+      lines are handed over with the pen's next batch
+    """
+
+    def __init__(self, name, ingest, predictor, normalizer=None):
+        self.name = name
+        self.ingest = ingest
+        self.predictor = predictor
+        self.normalizer = normalizer
+        self.window = RingBuffer(window_size, num_features)
+        self.pending = None  # (window copy, window start, ready time)
+        self.reset_requested = False
+        self.samples = 0
+        self.malformed = 0
+        self.windows = 0
+        self.dropped = 0
+        self.latencies_ms = []  # Window ready -> decoded text
+
+    def feed(self, data, engine):
+        for kind, payload in self.ingest.feed(data):
+            if kind == CONTROL:
+                # Pen was (de)activated: start a fresh window
+                self.window.clear()
+                self.pending = None
+                self.reset_requested = True
+            elif kind == MALFORMED:
+                self.malformed += 1
+            elif kind == SAMPLES:
+                if self.normalizer is not None:
+                    self.normalizer(payload)
+                self.samples += len(payload)
+                while len(payload):
+                    count = min(len(payload), window_size - len(self.window))
+                    self.window.append(payload[:count])
+                    payload = payload[count:]
+                    if len(self.window) >= window_size:
+                        engine.submit(self, self.window.view().copy(), self.window.start)
+                        self.window.consume(window_step)
+
+# === Shared Inference Engine ===
+class InferenceEngine:
+    """
+    Runs the ready windows of all pens through one model with dynamic batching.
+    - A batch closes when `max_batch_windows` pens are waiting or the first one has
+      waited `max_wait_ms`
+    - The new chunks of every window in the batch go through the model in one call,
+      in a worker thread so the event loop keeps reading the ports
+    """
+
+    def __init__(self, backend, index_to_char, per_chunk=False, max_batch_windows=max_batch_windows, max_wait_ms=max_wait_ms):
+        self.backend = backend
+        self.decode = greedy_decode
+        self.index_to_char = index_to_char
+        self.per_chunk = per_chunk
+        self.max_batch_windows = max_batch_windows
+        self.max_wait = max_wait_ms / 1000
+        self.ready = []  # Pens with a pending window, in arrival order
+        self.wakeup = asyncio.Event()
+        self.batches = 0
+        self.batched_windows = 0
+        self.in_flight = 0  # Windows of the batch currently in the model
+
+    def submit(self, device, window, window_start):
+        if device.pending is not None:
+            device.dropped += 1
+        elif device not in self.ready:
+            self.ready.append(device)
+        device.pending = (window, window_start, time.perf_counter())
+        self.wakeup.set()
+
+    async def next_batch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            self.ready = [device for device in self.ready if device.pending is not None]
+            if self.ready:
+                break
+
+        # Give other pens up to max_wait to join, unless the batch is already full
+        deadline = loop.time() + self.max_wait
+        while len(self.ready) < self.max_batch_windows and loop.time() < deadline:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                break
+            self.wakeup.clear()
+
+        devices = [device for device in self.ready if device.pending is not None][:self.max_batch_windows]
+        self.ready = [device for device in self.ready if device not in devices]
+        if self.ready:
+            self.wakeup.set()
+        # The reset flag is taken here, on the loop thread, so a control line arriving
+        # while the model runs is kept for the pen's next batch
+        requests = [(device,) + device.pending + (device.reset_requested,) for device in devices]
+        for device in devices:
+            device.pending = None
+            device.reset_requested = False
+        return requests
+
+    def predict(self, requests):
+        """Model call for one batch; returns (device, text, ready time, window start) per request."""
+        prepared, chunks = [], []
+        for device, window, window_start, ready_time, reset in requests:
+            if reset:
+                device.predictor.reset()
+            offsets, new_offsets, batch = device.predictor.prepare(window, window_start)
+            prepared.append((offsets, new_offsets))
+            if new_offsets:
+                chunks.append(batch)
+
+        logits = None
+        if chunks:
+            batch = np.concatenate(chunks)
+            logits = self.backend(standardize_chunks(batch) if self.per_chunk else batch)
+
+        results, position = [], 0
+        for (device, _, window_start, ready_time, _), (offsets, new_offsets) in zip(requests, prepared):
+            window_logits = device.predictor.complete(offsets, new_offsets, logits[position:position + len(new_offsets)] if new_offsets else None)
+            position += len(new_offsets)
+            text = self.decode(window_logits[np.newaxis], self.index_to_char)[0] if window_logits is not None else ''
+            results.append((device, text, ready_time, window_start))
+        return results
+
+    async def run(self, on_prediction):
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = await self.next_batch()
+            self.in_flight = len(requests)
+            results = await loop.run_in_executor(None, self.predict, requests)
+            self.batches += 1
+            self.batched_windows += len(requests)
+            done = time.perf_counter()
+            for device, text, ready_time, window_start in results:
+                device.windows += 1
+                device.latencies_ms.append((done - ready_time) * 1000)
+                on_prediction(device, text, window_start)
+            self.in_flight = 0
+
+# === Server ===
+class PenServer:
+    """
+    Reads every port on the event loop and serves all pens from one InferenceEngine.
+    With `metrics` (metrics.Metrics) every hot-path stage of every pen is timed.
+    """
+
+    def __init__(self, backend, model_path, normalization=normalization, protocol=serial_protocol,
+                 max_batch_windows=max_batch_windows, max_wait_ms=max_wait_ms, metrics=None):
+        characters = set(char for label in get_complete_set() for char in label)
+        self.protocol = protocol
+        self.normalizer = load_normalizer(model_path, normalization)
+        self.engine = InferenceEngine(backend, build_index_to_char(load_vocabulary(model_path, characters)),
+                                      self.normalizer is None, max_batch_windows, max_wait_ms)
+        self.chunk_size = backend.chunk_size
+        self.devices = []
+        self.metrics = metrics
+        if metrics is not None:
+            self.engine.backend = metrics.timed('predict', backend)
+            self.engine.decode = metrics.timed('ctc_decode', greedy_decode)
+            metrics.gauge('batch_queue_depth', lambda: len(self.engine.ready))
+            metrics.gauge('windows_in_flight', lambda: self.engine.in_flight)
+            metrics.gauge('dropped_windows', lambda: sum(device.dropped for device in self.devices))
+
+    def add_device(self, name):
+        ingest = BinaryIngest(None, num_features) if self.protocol == 'binary' else SerialIngest(None, num_features)
+        device = PenDevice(name, ingest, IncrementalPredictor(None, self.chunk_size),
+                           copy.deepcopy(self.normalizer))  # Running statistics are kept per pen
+        if self.metrics is not None:
+            device.window.append = self.metrics.timed('buffer', device.window.append)
+            if device.normalizer is not None:
+                device.normalizer = self.metrics.timed('normalize', device.normalizer)
+        self.devices.append(device)
+        return device
+
+    async def read_port(self, device, ser):
+        """Feeds the pen's bytes to its device until the port closes."""
+        loop = asyncio.get_running_loop()
+        closed = loop.create_future()
+        if self.metrics is not None:
+            instrument_ingest(self.metrics, device.ingest, ser, pen=device.name)
+
+        def on_readable():
+            try:
+                data = ser.read(ser.in_waiting or 1)
+            except OSError:
+                data = b''
+            if data:
+                device.feed(data, self.engine)
+            elif not closed.done():
+                closed.set_result(None)  # EOF, e.g. a fake pen that finished its recording
+
+        loop.add_reader(ser.fileno(), on_readable)
+        try:
+            await closed
+        finally:
+            loop.remove_reader(ser.fileno())
+            ser.close()
+
+    async def serve(self, ports, on_prediction):
+        """
+        Runs until every port is closed. `on_prediction(device, text, window_start)` gets each
+        decoded window; window_start is the absolute sample offset of the window in the pen's stream.
+        """
+        readers = [self.read_port(self.add_device(os.path.basename(port)), open_port(port)) for port in ports]
+        engine = asyncio.ensure_future(self.engine.run(on_prediction))
+        try:
+            await asyncio.gather(*readers)
+            while any(device.pending is not None for device in self.devices) or self.engine.in_flight:
+                await asyncio.sleep(0.01)  # Let the engine finish the last windows
+        finally:
+            engine.cancel()
+
+    def stats(self, wall_time):
+        latencies = [device.latencies_ms for device in self.devices]
+        all_latencies = np.concatenate(latencies) if any(latencies) else np.zeros(0)
+        return {
+            "pens": len(self.devices),
+            "samples_per_s": round(sum(device.samples for device in self.devices) / wall_time, 1),
+            "windows_per_s": round(sum(device.windows for device in self.devices) / wall_time, 2),
+            "dropped_windows": sum(device.dropped for device in self.devices),
+            "malformed_lines": sum(device.malformed for device in self.devices),
+            "mean_batch_windows": round(self.engine.batched_windows / self.engine.batches, 2) if self.engine.batches else 0,
+            "latency_ms": {q: round(float(np.percentile(all_latencies, int(q[1:]))), 2) if len(all_latencies) else None
+                           for q in ("p50", "p90", "p99")},
+            "per_pen_p90_ms": {device.name: round(float(np.percentile(device.latencies_ms, 90)), 2) if device.latencies_ms else None
+                               for device in self.devices},
+        }
+
+# === Prediction CSVs ===
+class PredictionLog:
+    """on_prediction callback writing predicted_characters_<pen>.csv per pen and printing each prediction."""
+
+    def __init__(self, folder=prediction_folder, echo=True):
+        self.folder = folder
+        self.echo = echo
+        self.files = {}
+        os.makedirs(folder, exist_ok=True)
+
+    def __call__(self, device, text, window_start):
+        if device.name not in self.files:
+            prediction_file = open(os.path.join(self.folder, f"predicted_characters_{device.name}.csv"), mode='w', newline='')
+            self.files[device.name] = (prediction_file, csv.writer(prediction_file))
+            self.files[device.name][1].writerow(['Timestamp', 'Best Prediction'])
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+        self.files[device.name][1].writerow([timestamp, text])
+        if self.echo:
+            print(f"[{device.name}] {timestamp}: {text}")
+
+    def close(self):
+        for prediction_file, _ in self.files.values():
+            prediction_file.close()
+
+# === Main Execution ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve several pens from one process and one model.")
+    parser.add_argument("ports", nargs="+", help="Serial ports, one per pen")
+    parser.add_argument("--backend", choices=BACKENDS, default=model_backend)
+    parser.add_argument("--normalization", choices=NORMALIZATION_MODES, default=normalization)
+    parser.add_argument("--max-batch", type=int, default=max_batch_windows)
+    parser.add_argument("--max-wait-ms", type=float, default=max_wait_ms)
+    parser.add_argument("--metrics-port", type=int, default=None, help="Serve Prometheus metrics on this port")
+    parser.add_argument("--metrics-path", default=None, help=f"Append JSON metric snapshots here (e.g. {metrics_path})")
+    args = parser.parse_args()
+
+    model_path = os.path.join(model_folder, model_filename)
+    backend = load_backend(args.backend, model_path, num_features, tflite_variant)
+    metrics = Metrics() if args.metrics_port is not None or args.metrics_path else None
+    server = PenServer(backend, model_path, args.normalization, serial_protocol, args.max_batch, args.max_wait_ms, metrics)
+
+    prediction_log = PredictionLog()
+    on_prediction = prediction_log
+    exporter = None
+    if metrics is not None:
+        on_prediction = metrics.timed('csv_write', prediction_log)
+        exporter = MetricsExporter(metrics, args.metrics_path, metrics_interval, args.metrics_port)
+    start = time.perf_counter()
+    try:
+        asyncio.run(server.serve(args.ports, on_prediction))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        prediction_log.close()
+        if exporter is not None:
+            exporter.close()
+        print(server.stats(time.perf_counter() - start))
@@ -0,0 +1,221 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from urllib.parse import urlsplit, parse_qs
+from model_backends import load_backend, BACKENDS
+from normalization import NORMALIZATION_MODES
+from replay import fake_pen_recording, open_fake_pen, play_recording
+import pen_server
+from pen_server import PenServer, PredictionLog
+from metrics import Metrics, MetricsExporter
+
+# Headless prediction daemon: capture and inference as in pen_server.py, without Tk.
+# Every decoded window is pushed to local subscribers over Server-Sent Events the moment
+# it is produced, instead of the UI polling a queue every 100 ms:
+#   GET /                   live view in the browser (the last predictions, pushed over /events)
+#   GET /events             text/event-stream, one "prediction" event per decoded window
+#   GET /events?pen=<name>  only the given pen(s)
+#   GET /status             server statistics as JSON
+#   GET /metrics            per-stage latency histograms and counters, Prometheus text (with --metrics)
+# Event data: {"id", "pen", "text", "window_start", "window_end", "produced_at"}, with the
+# window given as absolute sample offsets in the pen's stream and produced_at in Unix seconds.
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/prediction_daemon.py /dev/tty.usbmodem101
+#      python3 all_sensors/prediction_daemon.py --fake-pen all_sensors/dataset/all_data10.csv  (no hardware)
+# Open http://127.0.0.1:8765/ in a browser, or subscribe with: curl -N http://127.0.0.1:8765/events
+#   or  python3 all_sensors/push_latency_client.py
+
+# === Configuration ===
+http_host = '127.0.0.1'  # Local subscribers only
+http_port = 8765
+subscriber_queue_size = 256  # Events a slow subscriber may fall behind before its oldest are dropped
+keepalive_interval = 15.0  # Seconds between SSE comments on an idle stream
+
+# Served at GET /, so the page only ever talks to the daemon that served it
+LIVE_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <title>NeverLateX Live Predictions</title>
+  <style>body { font-family: sans-serif; margin: 2em; } li { font-size: 1.4em; }</style>
+</head>
+<body>
+  <h1>✍️ Live Predictions</h1>
+  <ul id="live-predictions"><li>Waiting for the first prediction…</li></ul>
+  <script>
+    const livePredictions = document.getElementById('live-predictions');
+    const source = new EventSource('/events');
+    source.addEventListener('prediction', (message) => {
+      const prediction = JSON.parse(message.data);
+      if (livePredictions.dataset.connected !== 'true') {
+        livePredictions.dataset.connected = 'true';
+        livePredictions.innerHTML = '';
+      }
+      const item = document.createElement('li');
+      item.textContent = `[${prediction.pen}] ${prediction.text}`;
+      livePredictions.prepend(item);
+      while (livePredictions.children.length > 10) {
+        livePredictions.lastChild.remove();
+      }
+    });
+  </script>
+</body>
+</html>
+"""
+
+# === Subscribers ===
+class PredictionBroadcaster:
+    """Fans each prediction out to the queue of every connected subscriber."""
+
+    def __init__(self, queue_size=subscriber_queue_size):
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.sequence = 0
+        self.dropped = 0
+
+    def publish(self, device, text, window_start):
+        self.sequence += 1
+        event = {
+            "id": self.sequence,
+            "pen": device.name,
+            "text": text,
+            "window_start": int(window_start),
+            "window_end": int(window_start) + pen_server.window_size,
+            "produced_at": time.time(),
+        }
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()  # A stalled subscriber must not hold up the others
+                self.dropped += 1
+            queue.put_nowait(event)
+
+    def subscribe(self):
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+# === HTTP ===
+# No Access-Control-Allow-Origin: the live view is served from this origin, and other
+# web pages the user visits must not read the handwriting stream
+def http_response(status, content_type, body=b''):
+    return (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n").encode() + body
+
+async def stream_events(writer, broadcaster, pens=None):
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                 b"Connection: keep-alive\r\n\r\n")
+    await writer.drain()
+    queue = broadcaster.subscribe()
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), keepalive_interval)
+            except asyncio.TimeoutError:
+                writer.write(b": keep-alive\n\n")
+                await writer.drain()
+                continue
+            if pens and event["pen"] not in pens:
+                continue
+            writer.write(f"id: {event['id']}\nevent: prediction\ndata: {json.dumps(event)}\n\n".encode())
+            await writer.drain()
+    except ConnectionError:
+        pass  # Subscriber went away
+    finally:
+        broadcaster.unsubscribe(queue)
+
+async def handle_http(reader, writer, broadcaster, server, start):
+    try:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        while (await reader.readline()).strip():
+            pass  # Headers are not needed
+        if len(request_line) < 2 or request_line[0] != 'GET':
+            writer.write(http_response("405 Method Not Allowed", "text/plain"))
+            return
+        url = urlsplit(request_line[1])
+        if url.path == '/':
+            writer.write(http_response("200 OK", "text/html; charset=utf-8", LIVE_PAGE.encode()))
+        elif url.path == '/events':
+            await stream_events(writer, broadcaster, parse_qs(url.query).get('pen'))
+        elif url.path == '/status':
+            status = server.stats(time.perf_counter() - start) | {"subscribers": len(broadcaster.subscribers),
+                                                                   "dropped_events": broadcaster.dropped}
+            writer.write(http_response("200 OK", "application/json", json.dumps(status).encode()))
+        elif url.path == '/metrics' and server.metrics is not None:
+            writer.write(http_response("200 OK", "text/plain; version=0.0.4", server.metrics.prometheus_text().encode()))
+        else:
+            writer.write(http_response("404 Not Found", "text/plain", b"Try /, /events or /status\n"))
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+# === Main Execution ===
+async def run_daemon(server, ports, fake_pens, speed, host, port, metrics_path=None):
+    broadcaster = PredictionBroadcaster()
+    prediction_log = PredictionLog(echo=False)
+    publish, write_prediction = broadcaster.publish, prediction_log
+    exporter = None
+    if server.metrics is not None:
+        publish = server.metrics.timed('sse_publish', publish)
+        write_prediction = server.metrics.timed('csv_write', write_prediction)
+        server.metrics.gauge('sse_subscribers', lambda: len(broadcaster.subscribers))
+        server.metrics.gauge('sse_subscriber_queue_max', lambda: max((queue.qsize() for queue in broadcaster.subscribers), default=0))
+        server.metrics.gauge('sse_dropped_events', lambda: broadcaster.dropped)
+        if metrics_path:
+            exporter = MetricsExporter(server.metrics, metrics_path, pen_server.metrics_interval)
+    start = time.perf_counter()
+
+    def on_prediction(device, text, window_start):
+        publish(device, text, window_start)  # Push first, the CSV can wait
+        write_prediction(device, text, window_start)
+
+    http = await asyncio.start_server(lambda reader, writer: handle_http(reader, writer, broadcaster, server, start), host, port)
+    print(f"Streaming predictions on http://{host}:{port}/events, live view at http://{host}:{port}/")
+
+    players, slaves = [], []
+    for csv_path in fake_pens:
+        master, slave, path = open_fake_pen()
+        ports.append(path)
+        slaves.append(slave)
+        players.append(play_recording(master, *fake_pen_recording(csv_path), speed))
+
+    try:
+        async with http:
+            await asyncio.gather(server.serve(ports, on_prediction), *players)
+            print("All pens disconnected; subscribers stay connected until the daemon stops")
+            await http.serve_forever()
+    finally:
+        prediction_log.close()
+        if exporter is not None:
+            exporter.close()
+        for slave in slaves:
+            os.close(slave)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless prediction daemon pushing predictions over Server-Sent Events.")
+    parser.add_argument("ports", nargs="*", help="Serial ports, one per pen")
+    parser.add_argument("--fake-pen", action="append", default=[], metavar="CSV", help="Replay a recording as an extra pen (POSIX)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Fake pen replay speed, 1 = real time")
+    parser.add_argument("--host", default=http_host)
+    parser.add_argument("--port", type=int, default=http_port)
+    parser.add_argument("--backend", choices=BACKENDS, default=pen_server.model_backend)
+    parser.add_argument("--normalization", choices=NORMALIZATION_MODES, default=pen_server.normalization)
+    parser.add_argument("--metrics", action="store_true", help="Time every hot-path stage and serve GET /metrics")
+    parser.add_argument("--metrics-path", default=None, help="Also append JSON metric snapshots here (implies --metrics)")
+    args = parser.parse_args()
+    if not args.ports and not args.fake_pen:
+        parser.error("give at least one serial port or --fake-pen")
+
+    model_path = os.path.join(pen_server.model_folder, pen_server.model_filename)
+    backend = load_backend(args.backend, model_path, pen_server.num_features, pen_server.tflite_variant)
+    metrics = Metrics() if args.metrics or args.metrics_path else None
+    server = PenServer(backend, model_path, args.normalization, metrics=metrics)
+    try:
+        asyncio.run(run_daemon(server, list(args.ports), args.fake_pen, args.speed, args.host, args.port, args.metrics_path))
+    except KeyboardInterrupt:
+        pass
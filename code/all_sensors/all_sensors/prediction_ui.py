@@ -0,0 +1,76 @@
+import os
+import queue
+import tkinter as tk
+from tkinter.scrolledtext import ScrolledText
+from tkinter import Label
+from PIL import Image, ImageTk  # Required for resizing the image
+
+# === Tkinter UI Setup ===
+def start_ui(stop_event, prediction_queue, status_fn=None, on_ready=None, metrics=None):
+    """
+    Runs the Tk window until closed, polling `prediction_queue` for
+    (timestamp, prediction) tuples. `status_fn` returns an optional status line,
+    `on_ready` is called once the window is up, `metrics` (metrics.Metrics) times each poll.
+    """
+    root = tk.Tk()
+    root.title("Real-Time Handwriting Prediction")
+    window_width = 600
+    window_height = 400
+    root.geometry(f"{window_width}x{window_height}")  # Set initial window size
+
+    # === Add Description Text at the Top ===
+    description_text = (
+        "This UI shows predictions of real-time handwriting using a sensor-equipped pen "
+        "developed by the NeverLateX team for the AML lab project "
+        "for MSc in AML at Imperial College London."
+    )
+    description_label = Label(root, text=description_text, wraplength=550, justify="center", font=("Arial", 10))
+    description_label.pack(pady=10)
+
+    # === Load and Resize Logo Dynamically ===
+    logo_path = "/Users/tunakisaga/Desktop/Repos/NeverLateX/all_sensors/all_sensors/Imperial_College_London_new_logo.png"
+    
+    if os.path.exists(logo_path):
+        img = Image.open(logo_path)
+        logo_width = window_width // 5  # 1/10th of the window width
+        # Keep the aspect ratio
+        logo_size = (logo_width, int(logo_width * img.height / img.width))
+        img = img.resize(logo_size, Image.LANCZOS)
+        logo = ImageTk.PhotoImage(img)
+
+        logo_label = Label(root, image=logo)
+        logo_label.image = logo  # Keep reference to prevent garbage collection
+        logo_label.pack(pady=5)  # Ensure it is centered below the text
+
+    # === Prediction Display Area ===
+    text_area = ScrolledText(root, width=80, height=15)
+    text_area.pack(padx=10, pady=10)
+    text_area.configure(state='disabled')
+
+    status_label = Label(root, text="", font=("Arial", 9))
+    status_label.pack(pady=2)
+
+    # === Poll Predictions and Update UI ===
+    def poll_predictions():
+        try:
+            while True:
+                timestamp, pred = prediction_queue.get_nowait()
+                message = f"[{pred}"
+                text_area.configure(state='normal')
+                text_area.insert(tk.END, message)
+                text_area.see(tk.END)
+                text_area.configure(state='disabled')
+        except queue.Empty:
+            pass
+        if status_fn is not None:
+            status_label.configure(text=status_fn())
+        if not stop_event.is_set():
+            root.after(100, poll_predictions)
+
+    if metrics is not None:
+        poll_predictions = metrics.timed('ui_update', poll_predictions)
+    poll_predictions()
+    if on_ready is not None:
+        root.after_idle(on_ready)
+    root.mainloop()
+    stop_event.set()
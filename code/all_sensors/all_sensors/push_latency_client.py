@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+
+# Test client for prediction_daemon.py: subscribes to /events and measures the delivery
+# latency of every prediction (received minus produced_at, same machine clock).
+# For comparison, the Tk window polls its queue every 100 ms, i.e. 50 ms on average and
+# up to 100 ms before a prediction is even picked up.
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/push_latency_client.py --count 100
+
+UI_POLL_INTERVAL_MS = 100
+
+async def subscribe(host, port, count, timeout, pen=None):
+    """Delivery latencies in ms of the next `count` predictions (fewer if `timeout` seconds pass)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    path = "/events" + (f"?pen={pen}" if pen else "")
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    while (await reader.readline()).strip():
+        pass  # Response headers
+
+    latencies = []
+    deadline = time.perf_counter() + timeout
+    try:
+        while len(latencies) < count:
+            line = await asyncio.wait_for(reader.readline(), max(deadline - time.perf_counter(), 0))
+            if not line:
+                break  # Daemon stopped
+            if line.startswith(b"data: "):
+                event = json.loads(line[6:])
+                latencies.append((time.time() - event["produced_at"]) * 1000)
+                print(f"[{event['pen']}] samples {event['window_start']}-{event['window_end']}: {event['text']!r} "
+                      f"({latencies[-1]:.2f} ms)")
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        writer.close()
+    return np.array(latencies)
+
+# === Main Execution ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure prediction-to-delivery latency of the prediction daemon.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--count", type=int, default=50, help="Predictions to wait for")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Give up after this many seconds")
+    parser.add_argument("--pen", default=None, help="Only this pen")
+    args = parser.parse_args()
+
+    latencies = asyncio.run(subscribe(args.host, args.port, args.count, args.timeout, args.pen))
+    if not len(latencies):
+        raise SystemExit("No predictions received")
+    print(f"{len(latencies)} predictions, delivery latency p50 {np.percentile(latencies, 50):.2f} ms, "
+          f"p99 {np.percentile(latencies, 99):.2f} ms, max {latencies.max():.2f} ms "
+          f"(UI polling adds {UI_POLL_INTERVAL_MS / 2:.0f} ms on average, up to {UI_POLL_INTERVAL_MS} ms)")
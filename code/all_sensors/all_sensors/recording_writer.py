@@ -0,0 +1,172 @@
+import csv
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+import numpy as np
+
+# Recording formats
+CSV = 'csv'  # One row per sample: Timestamp, sensor values, Letter (what the training notebooks read)
+NPY = 'npy'  # Directory of append-only .npy chunks per session, see chunk_dtype()
+
+def chunk_dtype(num_features=12):
+    """Rows of a binary chunk: wall-clock nanoseconds (monotonic within a recording), values, label index."""
+    return np.dtype([('timestamp', '<i8'), ('values', '<f4', (num_features,)), ('label', '<i2')])
+
+def sample_timestamps(read_ns, spacing_ns, count):
+    """Per-sample nanosecond stamps of a block read at `read_ns`, the last sample at the read time."""
+    return read_ns - (count - 1 - np.arange(count, dtype=np.int64)) * spacing_ns
+
+# === Buffered Recording Writer ===
+class RecordingWriter:
+    """
+    Writes sample blocks to disk from a background thread, so formatting and
+    disk/terminal I/O stay off the serial read loop.
+    - write() only stamps the block with the arrival time and queues it; the samples are
+      spread backwards from it, spaced by the time since the previous block divided by the
+      block size but at most `sample_period_ms` (a block read after an idle pause does not
+      stretch over the pause)
+    - The thread drains the queue and flushes in batches every `flush_interval` seconds
+    - Timestamps come from time.monotonic_ns() anchored to the wall clock at start,
+      so they never go backwards within a recording
+    - A status line is printed at most every `status_interval` seconds
+    For NPY, `path` is a directory: labels.json, then session0000_000000.npy, ...
+    """
+
+    def __init__(self, path, columns, labels, fmt=CSV, flush_interval=0.5, status_interval=1.0, sample_period_ms=50.0):
+        self.path = path
+        self.columns = columns  # Timestamp, sensor columns..., Letter
+        self.labels = list(labels)
+        self.label_index = {label: index for index, label in enumerate(self.labels)}
+        self.fmt = fmt
+        self.flush_interval = flush_interval
+        self.status_interval = status_interval
+        self.sample_period_ns = int(sample_period_ms * 1e6)  # Firmware loop period, ~20 Hz
+        self.dtype = chunk_dtype(len(columns) - 2)
+
+        self.queue = queue.Queue()
+        self.session = 0
+        self.chunk = 0
+        self.samples_written = 0
+        self.wall_start_ns = time.time_ns()
+        self.monotonic_start_ns = time.monotonic_ns()
+        self.last_write_ns = None
+
+        if fmt == CSV:
+            self.file = open(path, mode='w', newline='', encoding='utf-8-sig')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(columns)
+        elif fmt == NPY:
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, 'labels.json'), 'w') as labels_file:
+                json.dump({'columns': columns, 'labels': self.labels}, labels_file, indent=2)
+        else:
+            raise ValueError(f"Unknown recording format: {fmt}")
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, samples, label):
+        """Queue a block of samples (n, features) recorded under `label`. The block must not be modified afterwards."""
+        timestamp_ns = self.wall_start_ns + time.monotonic_ns() - self.monotonic_start_ns
+        spacing_ns = self.sample_period_ns
+        if self.last_write_ns is not None and len(samples):
+            spacing_ns = min(spacing_ns, (timestamp_ns - self.last_write_ns) // len(samples))
+        self.last_write_ns = timestamp_ns
+        self.queue.put((timestamp_ns, spacing_ns, samples, label))
+
+    def new_session(self):
+        """Later samples go to the next session's chunks (NPY); e.g. on 'System Activated'."""
+        self.queue.put(None)
+
+    def close(self):
+        self.queue.put(StopIteration)
+        self.thread.join()
+        if self.fmt == CSV:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # === Writer Thread ===
+    def run(self):
+        pending = []
+        last_flush = last_status = time.monotonic()
+        label = None
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+
+            if item is StopIteration or item is None:
+                self.flush(pending)
+                pending = []
+                if item is StopIteration:
+                    return
+                self.session += 1
+                self.chunk = 0
+                continue
+            if item:
+                pending.append(item)
+                label = item[3]
+
+            now = time.monotonic()
+            if now - last_flush >= self.flush_interval:
+                self.flush(pending)
+                pending = []
+                last_flush = now
+            if label is not None and now - last_status >= self.status_interval:
+                print(f"Current letter: {label}, {self.samples_written} samples written, {self.queue.qsize()} blocks queued")
+                last_status = now
+
+    def flush(self, pending):
+        if not pending:
+            return
+        if self.fmt == CSV:
+            for timestamp_ns, spacing_ns, samples, label in pending:
+                # Same local-time millisecond format as before, formatted for the whole block at once
+                utc_offset_ns = int(datetime.fromtimestamp(timestamp_ns / 1e9).astimezone().utcoffset().total_seconds() * 1e9)
+                local_ns = sample_timestamps(timestamp_ns + utc_offset_ns, spacing_ns, len(samples))
+                timestamps = np.char.replace(np.datetime_as_string(local_ns.astype('datetime64[ns]').astype('datetime64[ms]'), unit='ms'), 'T', ' ')
+                self.writer.writerows([timestamp] + row + [label] for timestamp, row in zip(timestamps.tolist(), samples.astype(int).tolist()))
+            self.file.flush()
+        else:
+            rows = np.empty(sum(len(samples) for _, _, samples, _ in pending), dtype=self.dtype)
+            position = 0
+            for timestamp_ns, spacing_ns, samples, label in pending:
+                block = rows[position:position + len(samples)]
+                block['timestamp'] = sample_timestamps(timestamp_ns, spacing_ns, len(samples))
+                block['values'] = samples
+                block['label'] = self.label_id(label)
+                position += len(samples)
+            chunk_path = os.path.join(self.path, f"session{self.session:04d}_{self.chunk:06d}.npy")
+            np.save(chunk_path, rows)
+            self.chunk += 1
+        self.samples_written += sum(len(samples) for _, _, samples, _ in pending)
+
+    def label_id(self, label):
+        if label not in self.label_index:
+            self.label_index[label] = len(self.labels)
+            self.labels.append(label)
+            with open(os.path.join(self.path, 'labels.json'), 'w') as labels_file:
+                json.dump({'columns': self.columns, 'labels': self.labels}, labels_file, indent=2)
+        return self.label_index[label]
+
+# === Read a Binary Recording ===
+def read_npy_recording(path):
+    """
+    Concatenates all chunks of an NPY recording directory in session order.
+    Returns (rows as a chunk_dtype array, labels list, columns list).
+    """
+    with open(os.path.join(path, 'labels.json')) as labels_file:
+        meta = json.load(labels_file)
+    chunks = [np.load(chunk_path) for chunk_path in sorted(glob.glob(os.path.join(path, 'session*_*.npy')))]
+    rows = np.concatenate(chunks) if chunks else np.empty(0, dtype=chunk_dtype(len(meta['columns']) - 2))
+    return rows, meta['labels'], meta['columns']
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import time
+import numpy as np
+import pandas as pd
+
+sensor_columns = ['Acc_X', 'Acc_Y', 'Acc_Z', 'Gyro_X', 'Gyro_Y', 'Gyro_Z',
+                  'Mag_X', 'Mag_Y', 'Mag_Z', 'Force1', 'Force2', 'Force3']
+
+# Where the replay toggles the pen: once around the whole recording (the live scripts then see
+# one session and fill their windows), or around every label run as during data collection
+SESSION_FRAMINGS = ('recording', 'label_runs')
+
+# === Load a Recorded Session ===
+def load_recording(csv_path, default_rate=1000.0):
+    """
+    Reads a dataset CSV and returns (samples (n, 12) float32, labels, times in seconds).
+    Times come from the Timestamp column, or `default_rate` if it is unusable.
+    A directory is read as a binary recording written by RecordingWriter.
+    """
+    if os.path.isdir(csv_path):
+        from recording_writer import read_npy_recording
+        rows, label_names, _ = read_npy_recording(csv_path)
+        labels = np.array(label_names, dtype=object)[rows['label']].astype(str)
+        times = (rows['timestamp'] - rows['timestamp'][0]) / 1e9 if len(rows) else np.zeros(0)
+        return rows['values'], labels, times
+
+    df = pd.read_csv(csv_path, encoding='utf-8-sig', skipinitialspace=True)
+    df[sensor_columns] = df[sensor_columns].apply(pd.to_numeric, errors='coerce')
+    df = df.dropna(subset=sensor_columns)
+
+    samples = df[sensor_columns].to_numpy(dtype=np.float32)
+    labels = df['Letter'].astype(str).to_numpy()
+
+    timestamps = pd.to_datetime(df['Timestamp'], errors='coerce')
+    if timestamps.notna().all() and timestamps.is_monotonic_increasing:
+        times = (timestamps - timestamps.iloc[0]).dt.total_seconds().to_numpy()
+    else:
+        times = np.arange(len(df)) / default_rate
+    return samples, labels, times
+
+# === Label Runs ===
+def label_runs(labels):
+    """(start, end) index pairs of the runs of identical consecutive labels."""
+    boundaries = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+    return list(zip(np.concatenate(([0], boundaries)).tolist(), np.concatenate((boundaries, [len(labels)])).tolist()))
+
+# === Labelled Segments of Recordings ===
+def labelled_segments(csv_paths, normalizer=None, min_length=0):
+    """
+    (label, samples) for every non-noise label run of the recordings,
+    normalized in place by `normalizer` and zero padded to `min_length`.
+    """
+    segments = []
+    for csv_path in csv_paths:
+        samples, labels, _ = load_recording(csv_path)
+        for start, end in label_runs(labels):
+            if labels[start] == 'noise':
+                continue
+            segment = samples[start:end].copy()
+            if normalizer is not None:
+                normalizer(segment)
+            if len(segment) < min_length:
+                segment = np.pad(segment, ((0, min_length - len(segment)), (0, 0)))
+            segments.append((labels[start], segment))
+    return segments
+
+# === Encode a Recording as the Pen Would Send It ===
+def encode_recording(samples, labels, protocol='ascii', sessions='recording'):
+    """
+    Returns (stream bytes, byte offset after each sample) for the recording, with
+    'System Activated' / 'System Deactivated' (the firmware's button toggle) around the
+    whole recording or, with sessions='label_runs', around every label run.
+    """
+    if sessions not in SESSION_FRAMINGS:
+        raise ValueError(f"sessions must be one of {SESSION_FRAMINGS}")
+    runs = label_runs(labels) if sessions == 'label_runs' else [(0, len(samples))] if len(samples) else []
+
+    if protocol == 'binary':
+        from sensor_protocol import encode_frames, FRAME_SAMPLE, FRAME_ACTIVATED, FRAME_DEACTIVATED
+        values = samples.astype(np.int16)
+        no_values = np.zeros(12, dtype=np.int16)
+
+    parts = []
+    sample_ends = np.zeros(len(samples), dtype=np.int64)
+    size = 0
+    seq = 0
+    for start, end in runs:
+        if protocol == 'binary':
+            activated = encode_frames(FRAME_ACTIVATED, no_values, seq, 0)
+            seq += 1
+            body = encode_frames(FRAME_SAMPLE, values[start:end], (seq + np.arange(end - start)) % 65536, 0)
+            seq += end - start
+            deactivated = encode_frames(FRAME_DEACTIVATED, no_values, seq % 65536, 0)
+            seq += 1
+            line_sizes = np.full(end - start, 36)
+        else:
+            activated = b'System Activated\r\n'
+            lines = [', '.join(map(str, row)).encode('ascii') + b'\r\n' for row in samples[start:end].astype(int).tolist()]
+            body = b''.join(lines)
+            deactivated = b'System Deactivated\r\n'
+            line_sizes = np.fromiter(map(len, lines), dtype=np.int64, count=len(lines))
+
+        size += len(activated)
+        sample_ends[start:end] = size + np.cumsum(line_sizes)
+        size += len(body) + len(deactivated)
+        parts += [activated, body, deactivated]
+
+    return b''.join(parts), sample_ends
+
+# === Replay Serial Port ===
+class ReplaySerial:
+    """
+    Serial-port stand-in that streams a recorded session with its original timing.
+    - speed=1 plays in real time, speed=N N times faster, speed=0 as fast as possible
+    - Bytes of a sample only become readable once the sample is due
+    Supports the `in_waiting` / `read(n)` interface used by SerialIngest and BinaryIngest.
+    """
+
+    def __init__(self, csv_path, speed=1.0, protocol='ascii', timeout=1.0, sessions='recording'):
+        self.samples, self.labels, self.times = load_recording(csv_path)
+        self.stream, self.sample_ends = encode_recording(self.samples, self.labels, protocol, sessions)
+        self.speed = speed
+        self.timeout = timeout
+        self.position = 0
+        self.start_time = None
+
+    def due_time(self, sample_index):
+        """Wall-clock time at which a sample is sent (replay start + scaled offset)."""
+        if not self.speed:
+            return self.start_time
+        return self.start_time + self.times[sample_index] / self.speed
+
+    def due_bytes(self):
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        if not self.speed:
+            return len(self.stream)
+        elapsed = (time.perf_counter() - self.start_time) * self.speed
+        sent = np.searchsorted(self.times, elapsed, side='right')
+        # Control lines go out together with the next due sample
+        return len(self.stream) if sent >= len(self.times) else int(self.sample_ends[sent - 1]) if sent else 0
+
+    @property
+    def in_waiting(self):
+        return self.due_bytes() - self.position
+
+    @property
+    def finished(self):
+        return self.position >= len(self.stream)
+
+    def read(self, size=1):
+        deadline = time.perf_counter() + self.timeout
+        while self.in_waiting <= 0 and not self.finished and time.perf_counter() < deadline:
+            time.sleep(0.0005)
+        end = min(self.position + size, self.due_bytes())
+        data = self.stream[self.position:end]
+        self.position = end
+        return data
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# === Fake Pen on a Pseudo-Terminal ===
+def fake_pen_recording(csv_path, duration=None, protocol='ascii'):
+    """
+    (stream bytes, byte offset after each sample, sample times) of a recording sent as one
+    session, i.e. a single activation around the whole replay, optionally cut to `duration` seconds.
+    """
+    samples, labels, times = load_recording(csv_path)
+    if duration is not None:
+        samples, labels, times = samples[times <= duration], labels[times <= duration], times[times <= duration]
+    stream, sample_ends = encode_recording(samples, labels, protocol, 'recording')
+    return stream, sample_ends, times
+
+def open_fake_pen():
+    """(master fd the fake pen writes to, slave fd, slave path a server opens as its serial port). POSIX only."""
+    master, slave = os.openpty()
+    os.set_blocking(master, False)
+    return master, slave, os.ttyname(slave)
+
+async def play_recording(master, stream, sample_ends, times, speed=1.0):
+    """Writes the pen's bytes to the pty master as they become due, then hangs up."""
+    start = time.perf_counter()
+    position = 0
+    try:
+        while position < len(stream):
+            sent = np.searchsorted(times, (time.perf_counter() - start) * speed, side='right')
+            due = len(stream) if sent >= len(times) else int(sample_ends[sent - 1]) if sent else 0
+            if due > position:
+                try:
+                    position += os.write(master, stream[position:due])
+                except BlockingIOError:
+                    pass  # The reader is behind; the pty buffer is full
+            await asyncio.sleep(0.002)
+        await asyncio.sleep(0.2)  # Let the reader drain the pty before hanging up
+    finally:
+        os.close(master)
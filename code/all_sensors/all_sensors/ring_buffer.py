@@ -0,0 +1,51 @@
+import numpy as np
+
+# === Fixed-Capacity Sample Ring Buffer ===
+class RingBuffer:
+    """
+    Preallocated float32 buffer holding the most recent `capacity` samples.
+    - Every sample is written twice (at i and i + capacity), so the retained
+      samples are always one contiguous slice and view() never copies
+    - Samples beyond capacity overwrite the oldest ones; memory stays bounded
+    - `start` is the absolute index of the oldest retained sample since creation
+    """
+
+    def __init__(self, capacity, num_features):
+        self.capacity = capacity
+        self.data = np.zeros((2 * capacity, num_features), dtype=np.float32)
+        self.start = 0  # Absolute index of the oldest retained sample
+        self.end = 0    # Absolute index one past the newest sample
+
+    def __len__(self):
+        return self.end - self.start
+
+    def append(self, samples):
+        """Append one sample (features,) or a block of samples (n, features)."""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1, self.data.shape[1])
+        if len(samples) > self.capacity:
+            self.end += len(samples) - self.capacity  # Only the newest samples can be kept
+            samples = samples[-self.capacity:]
+
+        positions = (self.end + np.arange(len(samples))) % self.capacity
+        self.data[positions] = samples
+        self.data[positions + self.capacity] = samples
+
+        self.end += len(samples)
+        self.start = max(self.start, self.end - self.capacity)
+
+    def view(self, length=None):
+        """
+        Contiguous view of the oldest `length` retained samples (all by default).
+        Only valid until the next append.
+        """
+        length = len(self) if length is None else min(length, len(self))
+        offset = self.start % self.capacity
+        return self.data[offset:offset + length]
+
+    def consume(self, count):
+        """Drop the oldest `count` samples."""
+        self.start = min(self.start + count, self.end)
+
+    def clear(self):
+        """Drop all samples; absolute indices keep counting up."""
+        self.start = self.end
@@ -0,0 +1,159 @@
+import numpy as np
+try:
+    from .serial_ingest import SAMPLES, CONTROL  # Loaded as all_sensors.all_sensors.sensor_protocol
+except ImportError:
+    from serial_ingest import SAMPLES, CONTROL  # Run from this folder
+
+# === Binary Frame Layout (must match all_sensors_calibrated.ino) ===
+FRAME_SYNC = 0xA55A
+FRAME_SAMPLE = 0
+FRAME_ACTIVATED = 1
+FRAME_DEACTIVATED = 2
+
+FRAME_DTYPE = np.dtype([
+    ('sync', '<u2'),
+    ('type', 'u1'),
+    ('reserved', 'u1'),
+    ('seq', '<u2'),
+    ('timestamp', '<u4'),  # Device micros()
+    ('values', '<i2', (12,)),
+    ('crc', '<u2'),
+])
+FRAME_SIZE = FRAME_DTYPE.itemsize  # 36 bytes
+SYNC_BYTES = FRAME_SYNC.to_bytes(2, 'little')
+
+CONTROL_FRAMES = {FRAME_ACTIVATED: 'System Activated', FRAME_DEACTIVATED: 'System Deactivated'}
+
+# === CRC-16/CCITT-FALSE ===
+def _crc16_table():
+    table = np.zeros(256, dtype=np.uint16)
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+        table[byte] = crc & 0xFFFF
+    return table
+
+CRC16_TABLE = _crc16_table()
+
+def crc16(payload):
+    """
+    CRC of every row of a (n, length) uint8 array, computed column by column
+    so the Python loop runs over frame bytes, not frames.
+    """
+    crc = np.full(len(payload), 0xFFFF, dtype=np.uint16)
+    for column in payload.T:
+        crc = (crc << 8) ^ CRC16_TABLE[(crc >> 8) ^ column]
+    return crc
+
+def encode_frames(frame_type, values, seq, timestamp):
+    """
+    Builds frames the same way the firmware does; used for recordings and tests.
+    `values` is (n, 12), the other arguments broadcast to n frames.
+    """
+    values = np.atleast_2d(values)
+    frames = np.zeros(len(values), dtype=FRAME_DTYPE)
+    frames['sync'] = FRAME_SYNC
+    frames['type'] = frame_type
+    frames['seq'] = seq
+    frames['timestamp'] = timestamp
+    frames['values'] = values
+    raw = frames.view(np.uint8).reshape(len(frames), FRAME_SIZE)
+    frames['crc'] = crc16(raw[:, 2:FRAME_SIZE - 2])
+    return frames.tobytes()
+
+# === Frame Decoder ===
+class FrameDecoder:
+    """
+    Turns a byte stream of frames into a structured NumPy array.
+    - Aligned runs of frames are viewed in place with np.frombuffer (no copy)
+    - On a bad sync word or CRC it rescans for the next sync word
+    - Partial trailing frames are kept until the next feed
+    Counters: crc_errors, skipped_bytes, seq_gaps (frames lost between reads).
+    """
+
+    def __init__(self):
+        self.pending = b''
+        self.last_seq = None
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+        self.seq_gaps = 0
+
+    def feed(self, data):
+        """Returns a FRAME_DTYPE array of all valid frames completed by `data`."""
+        buffer = self.pending + data
+        decoded = []
+        position = 0
+
+        while len(buffer) - position >= FRAME_SIZE:
+            count = (len(buffer) - position) // FRAME_SIZE
+            frames = np.frombuffer(buffer, dtype=FRAME_DTYPE, count=count, offset=position)
+
+            raw = frames.view(np.uint8).reshape(count, FRAME_SIZE)
+            valid = (frames['sync'] == FRAME_SYNC) & (crc16(raw[:, 2:FRAME_SIZE - 2]) == frames['crc'])
+
+            # Keep the longest valid prefix, then resync after the first bad frame
+            bad = np.flatnonzero(~valid)
+            good_count = bad[0] if len(bad) else count
+            if good_count:
+                decoded.append(frames[:good_count])
+                position += good_count * FRAME_SIZE
+            if good_count == count:
+                break
+
+            if frames['sync'][good_count] == FRAME_SYNC:
+                self.crc_errors += 1
+            next_sync = buffer.find(SYNC_BYTES, position + 1)
+            if next_sync < 0:
+                # Keep a possible first sync byte at the very end
+                next_sync = len(buffer) - 1 if buffer.endswith(SYNC_BYTES[:1]) else len(buffer)
+            self.skipped_bytes += next_sync - position
+            position = next_sync
+
+        self.pending = buffer[position:]
+
+        if not decoded:
+            return np.zeros(0, dtype=FRAME_DTYPE)
+        frames = decoded[0] if len(decoded) == 1 else np.concatenate(decoded)
+        self.count_seq_gaps(frames['seq'])
+        return frames
+
+    def count_seq_gaps(self, seq):
+        if self.last_seq is not None:
+            seq = np.concatenate(([self.last_seq], seq))
+        steps = np.diff(seq.astype(np.int32)) % 65536
+        self.seq_gaps += int(np.sum(steps[steps > 1] - 1))
+        self.last_seq = int(seq[-1])
+
+# === Binary Serial Ingest ===
+class BinaryIngest:
+    """
+    Same interface as SerialIngest.read()/feed() for binary-mode pens:
+    sample frames become float32 SAMPLES blocks, control frames CONTROL events.
+    """
+
+    def __init__(self, ser, num_features=12):
+        self.ser = ser
+        self.num_features = num_features
+        self.decoder = FrameDecoder()
+
+    def read(self):
+        data = self.ser.read(self.ser.in_waiting or 1)
+        return self.feed(data)
+
+    def feed(self, data):
+        frames = self.decoder.feed(data)
+        if not len(frames):
+            return []
+
+        # Split the frames into runs of samples separated by control frames
+        events = []
+        control_positions = np.flatnonzero(frames['type'] != FRAME_SAMPLE)
+        start = 0
+        for position in list(control_positions) + [len(frames)]:
+            if position > start:
+                events.append((SAMPLES, frames['values'][start:position, :self.num_features].astype(np.float32)))
+            if position < len(frames) and frames['type'][position] in CONTROL_FRAMES:
+                events.append((CONTROL, CONTROL_FRAMES[frames['type'][position]]))
+            start = position + 1
+        return events
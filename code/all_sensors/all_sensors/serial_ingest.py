@@ -0,0 +1,117 @@
+import numpy as np
+
+# === Event Kinds ===
+SAMPLES = 'samples'      # payload: float32 array (n, num_features)
+CONTROL = 'control'      # payload: 'System Activated' / 'System Deactivated'
+MALFORMED = 'malformed'  # payload: the undecodable or unparsable line
+
+CONTROL_LINES = ('System Activated', 'System Deactivated')
+NUMERIC_BYTES = b'0123456789-+., \t\r'
+
+# === Bulk Serial Ingest ===
+class SerialIngest:
+    """
+    Reads everything waiting on a serial port in one call and parses it in bulk.
+    - Only complete lines are parsed; a trailing partial line is kept for the next read
+    - Consecutive sample lines are parsed together into one float32 block
+    - Control and malformed lines are returned as separate events, in stream order
+    Works with anything exposing `in_waiting` and `read(n)` (pyserial, FakeSerial).
+    """
+
+    def __init__(self, ser, num_features=12):
+        self.ser = ser
+        self.num_features = num_features
+        self.pending = b''
+
+    def read(self):
+        """Returns a list of (kind, payload) events for all complete lines received."""
+        # Block for at least one byte (up to the port timeout), then drain the rest
+        data = self.ser.read(self.ser.in_waiting or 1)
+        return self.feed(data)
+
+    def feed(self, data):
+        """Parses raw bytes; usable without a port, e.g. on recorded byte streams."""
+        lines = (self.pending + data).split(b'\n')
+        self.pending = lines.pop()
+
+        events = []
+        run = []  # Consecutive numeric lines waiting to be parsed together
+        for line in lines:
+            if line.count(b',') == self.num_features - 1 and not line.translate(None, NUMERIC_BYTES):
+                run.append(line)
+                continue
+
+            if run:
+                events.extend(self.parse_run(run))
+                run = []
+
+            text = line.strip()
+            if not text:
+                continue
+            try:
+                text = text.decode('utf-8')
+            except UnicodeDecodeError:
+                events.append((MALFORMED, text.decode('utf-8', errors='replace')))
+                continue
+            events.append((CONTROL if text in CONTROL_LINES else MALFORMED, text))
+
+        if run:
+            events.extend(self.parse_run(run))
+        return events
+
+    def parse_run(self, run):
+        """Parses a run of numeric lines at once, falling back per line on errors."""
+        try:
+            values = np.array(b','.join(run).split(b','), dtype=np.float32)
+            return [(SAMPLES, values.reshape(len(run), self.num_features))]
+        except ValueError:
+            pass
+
+        # Something in the run did not parse (e.g. "1-2"), split it up line by line
+        events = []
+        rows = []
+        for line in run:
+            try:
+                rows.append(np.array(line.split(b','), dtype=np.float32))
+                continue
+            except ValueError:
+                pass
+            if rows:
+                events.append((SAMPLES, np.stack(rows)))
+                rows = []
+            events.append((MALFORMED, line.strip().decode('ascii')))
+        if rows:
+            events.append((SAMPLES, np.stack(rows)))
+        return events
+
+
+# === In-Memory Serial Port ===
+class FakeSerial:
+    """
+    Minimal stand-in for serial.Serial backed by a byte buffer, for tests and replay.
+    """
+
+    def __init__(self, data=b''):
+        self.buffer = bytearray(data)
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def write(self, data):
+        self.buffer.extend(data)
+        return len(data)
+
+    def read(self, size=1):
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,114 @@
+import time
+import numpy as np
+from multiprocessing import shared_memory
+
+# === Header Slots (int64) ===
+WRITE = 0            # Absolute index one past the newest sample written
+READ = 1             # Absolute index of the oldest unread sample
+SESSION = 2          # Bumped on every activate/deactivate; readers reset on change
+DROPPED_WINDOWS = 3  # Hops discarded by the writer under the drop_oldest policy
+LATE_WINDOWS = 4     # Hops the reader only finished after the next one was ready
+PREDICTED_WINDOWS = 5
+GAP_RESETS = 6       # Windows the reader restarted because drop_oldest skipped samples
+HEADER_SLOTS = 8
+
+BACKPRESSURE_POLICIES = ('drop_oldest', 'block')
+
+# === Shared-Memory Sample Ring ===
+class SharedSampleRing:
+    """
+    Single-writer, single-reader float32 sample ring in multiprocessing.shared_memory.
+    - The capture process writes blocks, the inference process reads one hop at a time
+    - When the ring is full the writer either drops the oldest unread hop
+      ('drop_oldest') or waits for the reader ('block')
+    - Counters live in the shared header so any process can report them
+    Create it in the parent, then pass `name` to the children and attach there.
+    """
+
+    def __init__(self, capacity, num_features, hop, name=None, lock=None):
+        self.capacity = capacity
+        self.num_features = num_features
+        self.hop = hop
+        self.lock = lock
+
+        header_bytes = HEADER_SLOTS * 8
+        data_bytes = capacity * num_features * 4
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + data_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((capacity, num_features), dtype=np.float32, buffer=self.shm.buf, offset=header_bytes)
+        if name is None:
+            self.header[:] = 0
+
+    def attach_args(self):
+        """Arguments for re-opening this ring in another process."""
+        return (self.capacity, self.num_features, self.hop, self.name, self.lock)
+
+    def unread(self):
+        return int(self.header[WRITE] - self.header[READ])
+
+    def write(self, samples, policy='drop_oldest', stop_event=None):
+        """Append a (n, num_features) block, applying the backpressure policy when full."""
+        samples = samples[-self.capacity:]
+        while True:
+            with self.lock:
+                free = self.capacity - self.unread()
+                if free >= len(samples):
+                    break
+                if policy == 'drop_oldest':
+                    dropped_hops = -(-(len(samples) - free) // self.hop)
+                    self.header[READ] = min(self.header[READ] + dropped_hops * self.hop, self.header[WRITE])
+                    self.header[DROPPED_WINDOWS] += dropped_hops
+                    break
+            if stop_event is not None and stop_event.is_set():
+                return
+            time.sleep(0.001)  # 'block': wait for the reader to free a hop
+
+        positions = (self.header[WRITE] + np.arange(len(samples))) % self.capacity
+        self.data[positions] = samples
+        with self.lock:
+            self.header[WRITE] += len(samples)
+
+    def reset_session(self):
+        """Discard unread samples and tell the reader to start a new window."""
+        with self.lock:
+            self.header[READ] = self.header[WRITE]
+            self.header[SESSION] += 1
+
+    def read(self, count):
+        """
+        Copy out the oldest `count` unread samples if available.
+        Returns (session, start_index, samples) or None.
+        """
+        with self.lock:
+            if self.unread() < count:
+                return None
+            start = int(self.header[READ])
+            positions = (start + np.arange(count)) % self.capacity
+            samples = self.data[positions]
+            self.header[READ] = start + count
+            return int(self.header[SESSION]), start, samples
+
+    def increment(self, slot, amount=1):
+        with self.lock:
+            self.header[slot] += amount
+
+    def counters(self):
+        return {
+            'predicted_windows': int(self.header[PREDICTED_WINDOWS]),
+            'dropped_windows': int(self.header[DROPPED_WINDOWS]),
+            'late_windows': int(self.header[LATE_WINDOWS]),
+            'gap_resets': int(self.header[GAP_RESETS]),
+            'pending_samples': self.unread(),
+        }
+
+    def close(self, unlink=False):
+        # Drop the NumPy views before closing the mapping
+        del self.header, self.data
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
@@ -0,0 +1,141 @@
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers, models
+
+# Streaming variant of the CLDNN from 11_03_CTC_CLDNN.ipynb: causal convolutions and
+# unidirectional LSTMs, so frames never depend on future samples and the model can run
+# hop by hop, carrying convolution context and LSTM state between calls.
+
+CONV_BLOCKS = [(512, 5), (256, 3), (128, 3)]  # (filters, kernel size), each followed by MaxPooling1D(2)
+LSTM_UNITS = 64
+DOWNSAMPLE = 2 ** len(CONV_BLOCKS)  # Input samples per output frame
+
+def conv_context(conv_blocks=CONV_BLOCKS):
+    """
+    Past samples needed to compute the frames of a new block exactly:
+    the receptive field of the conv/pool stack minus one frame, rounded up to whole frames.
+    """
+    field, jump = 1, 1
+    for _, kernel in conv_blocks:
+        field += (kernel - 1) * jump  # Causal Conv1D
+        field += jump                 # MaxPooling1D(2)
+        jump *= 2
+    return -(-(field - jump) // jump) * jump
+
+# === Model Definition ===
+def create_streaming_cldnn_model(num_features, num_classes, lstm_units=LSTM_UNITS):
+    """Trainable model over whole sequences (batch, time, features) -> logits (batch, time / 8, classes)."""
+    inputs = layers.Input(shape=(None, num_features), name='input')
+
+    # Causal Convolutional Layers
+    x = inputs
+    for filters, kernel in CONV_BLOCKS:
+        x = layers.Conv1D(filters, kernel, activation='relu', padding='causal')(x)
+        x = layers.BatchNormalization()(x)
+        x = layers.MaxPooling1D(pool_size=2)(x)
+        x = layers.Dropout(0.3)(x)
+
+    # Unidirectional LSTM Layers
+    x = layers.LSTM(lstm_units, return_sequences=True, name='lstm_1')(x)
+    x = layers.Dropout(0.3)(x)
+    x = layers.LSTM(lstm_units, return_sequences=True, name='lstm_2')(x)
+    x = layers.Dropout(0.3)(x)
+
+    # Fully Connected Layer and Linear Output Layer
+    x = layers.Dense(100, activation='relu', name='dense')(x)
+    x = layers.Dropout(0.3)(x)
+    outputs = layers.Dense(num_classes, name='logits')(x)
+
+    return models.Model(inputs, outputs, name='Streaming_CLDNN_Model')
+
+def build_streaming_models(model):
+    """
+    Splits a trained streaming CLDNN into the two inference graphs used per hop
+    (sharing its weights, dropout left out):
+    - conv_model: samples (1, n, features) -> frames (1, n / 8, channels)
+    - head_model: [frames, h1, c1, h2, c2] -> [logits, h1, c1, h2, c2]
+    """
+    lstm_1, lstm_2 = model.get_layer('lstm_1'), model.get_layer('lstm_2')
+    conv_model = models.Model(model.input, lstm_1.input, name='streaming_conv')
+
+    frames = layers.Input(shape=(None, lstm_1.input.shape[-1]), name='frames')
+    states = [layers.Input(shape=(lstm_1.units,), name=name) for name in ('h1', 'c1', 'h2', 'c2')]
+    x, h1, c1 = layers.LSTM.from_config(lstm_1.get_config() | {'return_state': True, 'name': 'lstm_1_step'})(frames, initial_state=states[:2])
+    x, h2, c2 = layers.LSTM.from_config(lstm_2.get_config() | {'return_state': True, 'name': 'lstm_2_step'})(x, initial_state=states[2:])
+    logits = model.get_layer('logits')(model.get_layer('dense')(x))
+    head_model = models.Model([frames] + states, [logits, h1, c1, h2, c2], name='streaming_head')
+
+    head_model.get_layer('lstm_1_step').set_weights(lstm_1.get_weights())
+    head_model.get_layer('lstm_2_step').set_weights(lstm_2.get_weights())
+    return conv_model, head_model
+
+def load_streaming_models(model_path):
+    model = tf.keras.models.load_model(model_path, custom_objects={'ctc_loss': lambda y_true, y_pred: y_pred})
+    return build_streaming_models(model)
+
+# === Streaming Inference ===
+class StreamingPredictor:
+    """
+    Hop-by-hop inference with the streaming CLDNN, a drop-in for IncrementalPredictor.
+    - Only samples not seen on a previous call are run through the model, so
+      compute per hop is proportional to the hop, not the window
+    - The last `context` samples are re-run through the convolutions and their
+      frames dropped, so new frames match a full-sequence pass exactly
+    - LSTM states are carried between calls; samples that do not fill a whole
+      frame wait for the next call
+    - Logits are kept for the frames of the current window
+    Expects samples normalized with the training scaler (normalization.load_normalizer).
+    """
+
+    def __init__(self, conv_model, head_model, context=None, downsample=DOWNSAMPLE):
+        self.conv_model = conv_model
+        self.head_model = head_model
+        self.context = conv_context() if context is None else context
+        self.downsample = downsample
+        self.units = head_model.get_layer('lstm_1_step').units
+        self.reset()
+
+    def reset(self):
+        """Start a new stream, e.g. when the pen is (de)activated."""
+        self.origin = None    # Absolute sample offset of the stream start
+        self.position = None  # Absolute offset one past the last sample received
+        self.pending = None   # Received samples not yet forming a whole frame
+        self.tail = None      # Convolution context from the previous call
+        self.states = [np.zeros((1, self.units), dtype=np.float32) for _ in range(4)]
+        self.logits = None    # Logits of the retained frames
+        self.first_frame = 0  # Frame index (since origin) of self.logits[0]
+
+    def feed(self, samples):
+        """Run new samples through the model and append their logits."""
+        samples = np.concatenate((self.pending, samples)) if self.pending is not None else samples
+        usable = len(samples) // self.downsample * self.downsample
+        block, self.pending = samples[:usable], samples[usable:].copy()  # Window views are only valid until the next append
+        if not usable:
+            return
+
+        x = np.concatenate((self.tail, block)) if self.tail is not None else block
+        frames = self.conv_model(x[np.newaxis], training=False).numpy()
+        frames = frames[:, (len(x) - usable) // self.downsample:]
+        self.tail = x[-self.context:].copy() if self.context else None
+
+        logits, *states = self.head_model([frames] + self.states, training=False)
+        self.states = [state.numpy() for state in states]
+        logits = logits.numpy()[0]
+        self.logits = logits if self.logits is None else np.concatenate((self.logits, logits))
+
+    def update(self, window, window_start):
+        """
+        Feeds the part of the window not seen yet and returns the logits
+        (frames, classes) of the frames inside the window, or None.
+        """
+        if self.position is None:
+            self.origin = self.position = window_start
+        self.feed(window[max(0, self.position - window_start):])
+        self.position = window_start + len(window)
+
+        # Drop frames that start before the window
+        first = -(-(window_start - self.origin) // self.downsample)
+        if self.logits is not None and first > self.first_frame:
+            self.logits = self.logits[first - self.first_frame:]
+            self.first_frame = first
+        return self.logits if self.logits is not None and len(self.logits) else None
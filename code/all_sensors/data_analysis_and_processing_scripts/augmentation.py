@@ -0,0 +1,151 @@
+import time
+import numpy as np
+
+# Batched, seeded augmentation for the training input pipeline, replacing the synthetic CSVs
+# of synthetic_data_generator.py: every training batch gets a fresh augmented copy, so there
+# is no extra disk I/O and memory stays at one batch.
+# All functions work on float arrays shaped (..., time, features) and take a np.random.Generator;
+# the warps need (batch, time, features) with post-padding (padded rows stay zero).
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/data_analysis_and_processing_scripts/augmentation.py  (speed check)
+# Reproducibility and padding checks: tests/test_augmentation.py
+
+AUGMENTATIONS = ('time_warp', 'magnitude_warp', 'scale_variation', 'gaussian_noise', 'jitter')
+
+# === Point-Wise Augmentations (from synthetic_data_generator.py) ===
+def add_gaussian_noise(data, rng, noise_level=0.02):
+    """Add Gaussian noise while keeping zeros unchanged."""
+    noise = rng.normal(loc=0, scale=noise_level, size=data.shape).astype(data.dtype)
+    return np.where(data == 0, data, data + noise)
+
+def jitter(data, rng, jitter_level=0.01):
+    """Apply jittering (small random shifts) while keeping zeros unchanged."""
+    jitter_values = rng.uniform(-jitter_level, jitter_level, size=data.shape).astype(data.dtype)
+    return np.where(data == 0, data, data + jitter_values)
+
+def scale_variation(data, rng, scale_range=(0.9, 1.1)):
+    """Scale each sequence's channels by a random factor within a given range (zeros stay zero)."""
+    scale_factor = rng.uniform(scale_range[0], scale_range[1], size=data.shape[:-2] + (1, data.shape[-1]))
+    return data * scale_factor.astype(data.dtype)
+
+# === Warps ===
+def sequence_lengths(batch):
+    """Length of each post-padded sequence: index of its last row with any nonzero value, plus one."""
+    nonzero = (batch != 0).any(axis=-1)
+    return np.where(nonzero.any(axis=1), batch.shape[1] - np.argmax(nonzero[:, ::-1], axis=1), 0)
+
+def random_curves(rng, lengths, steps, channels, sigma=0.2, knots=4):
+    """
+    Smooth random curves around 1, shape (batch, steps, channels): knots + 2 values ~ N(1, sigma)
+    spread evenly over each sequence's own length and linearly interpolated in between.
+    """
+    values = rng.normal(1.0, sigma, size=(len(lengths), knots + 2, channels))
+    positions = np.arange(steps)[np.newaxis, :] * (knots + 1) / np.maximum(lengths - 1, 1)[:, np.newaxis]
+    positions = np.minimum(positions, knots + 1)
+    left = np.minimum(positions.astype(np.int64), knots)
+    frac = (positions - left)[..., np.newaxis]
+    left_values = np.take_along_axis(values, left[..., np.newaxis], axis=1)
+    right_values = np.take_along_axis(values, left[..., np.newaxis] + 1, axis=1)
+    return left_values * (1 - frac) + right_values * frac
+
+def magnitude_warp(batch, rng, lengths=None, sigma=0.2, knots=4):
+    """Multiply every channel by its own smooth random curve."""
+    lengths = sequence_lengths(batch) if lengths is None else np.asarray(lengths)
+    curves = random_curves(rng, lengths, batch.shape[1], batch.shape[2], sigma, knots)
+    return batch * curves.astype(batch.dtype)
+
+def time_warp(batch, rng, lengths=None, sigma=0.2, knots=4):
+    """
+    Resample each sequence along a smooth random time axis: locally faster or slower writing,
+    same start, end and length. Values are linearly interpolated between neighbouring rows.
+    """
+    lengths = sequence_lengths(batch) if lengths is None else np.asarray(lengths)
+    steps = batch.shape[1]
+    speed = np.maximum(random_curves(rng, lengths, steps, 1, sigma, knots)[..., 0], 1e-3)
+    elapsed = np.cumsum(speed, axis=1) - speed[:, :1]
+    total = np.take_along_axis(elapsed, np.maximum(lengths - 1, 0)[:, np.newaxis], axis=1)
+    warped = elapsed / np.maximum(total, 1e-9) * np.maximum(lengths - 1, 0)[:, np.newaxis]
+    warped = np.minimum(warped, np.maximum(lengths - 1, 0)[:, np.newaxis])
+
+    left = warped.astype(np.int64)
+    right = np.minimum(left + 1, np.maximum(lengths - 1, 0)[:, np.newaxis])
+    frac = (warped - left)[..., np.newaxis].astype(batch.dtype)
+    resampled = (np.take_along_axis(batch, left[..., np.newaxis], axis=1) * (1 - frac)
+                 + np.take_along_axis(batch, right[..., np.newaxis], axis=1) * frac)
+    valid = np.arange(steps)[np.newaxis, :] < lengths[:, np.newaxis]
+    return np.where(valid[..., np.newaxis], resampled, 0).astype(batch.dtype)
+
+# === Training Pipeline Stage ===
+class Augmenter:
+    """
+    Applies `augmentations` (names from AUGMENTATIONS, in that order) to one padded batch at a time.
+    - Batch n of a run always draws from its own stream default_rng([seed, n]), so a run
+      is reproducible for a given seed and batch order, and every epoch sees new variants
+    - tf_map() wraps it for tf.data; map it after .batch() and without num_parallel_calls
+      so batches are numbered in order
+    """
+
+    def __init__(self, seed=0, augmentations=AUGMENTATIONS, noise_level=0.02, jitter_level=0.01,
+                 scale_range=(0.9, 1.1), time_warp_sigma=0.2, magnitude_warp_sigma=0.2, knots=4):
+        unknown = set(augmentations) - set(AUGMENTATIONS)
+        if unknown:
+            raise ValueError(f"Unknown augmentations: {sorted(unknown)}")
+        self.seed = seed
+        self.augmentations = [name for name in AUGMENTATIONS if name in augmentations]
+        self.noise_level = noise_level
+        self.jitter_level = jitter_level
+        self.scale_range = scale_range
+        self.time_warp_sigma = time_warp_sigma
+        self.magnitude_warp_sigma = magnitude_warp_sigma
+        self.knots = knots
+        self.batches = 0
+
+    def rng(self, batch_index):
+        return np.random.default_rng([self.seed, batch_index])
+
+    def reset(self):
+        self.batches = 0
+
+    def __call__(self, batch, lengths=None):
+        rng = self.rng(self.batches)
+        self.batches += 1
+        return self.augment(np.asarray(batch, dtype=np.float32), rng, lengths)
+
+    def augment(self, batch, rng, lengths=None):
+        if lengths is None and {'time_warp', 'magnitude_warp'} & set(self.augmentations):
+            lengths = sequence_lengths(batch)
+        for name in self.augmentations:
+            if name == 'time_warp':
+                batch = time_warp(batch, rng, lengths, self.time_warp_sigma, self.knots)
+            elif name == 'magnitude_warp':
+                batch = magnitude_warp(batch, rng, lengths, self.magnitude_warp_sigma, self.knots)
+            elif name == 'scale_variation':
+                batch = scale_variation(batch, rng, self.scale_range)
+            elif name == 'gaussian_noise':
+                batch = add_gaussian_noise(batch, rng, self.noise_level)
+            elif name == 'jitter':
+                batch = jitter(batch, rng, self.jitter_level)
+        return batch
+
+    def tf_map(self):
+        """(x, y) -> (augmented x, y) for tf.data.Dataset.map."""
+        import tensorflow as tf
+
+        def augment_batch(x, y):
+            augmented = tf.numpy_function(self, [x], tf.float32, stateful=True)
+            augmented.set_shape(x.shape)
+            return augmented, y
+        return augment_batch
+
+# === Speed Check ===
+if __name__ == "__main__":
+    rng = np.random.default_rng(1)
+    lengths = rng.integers(50, 1500, size=32)
+    batch = rng.normal(size=(32, 1500, 12)).astype(np.float32)
+    batch[np.arange(1500)[np.newaxis, :] >= lengths[:, np.newaxis]] = 0
+
+    augmenter = Augmenter(seed=42)
+    start = time.perf_counter()
+    for _ in range(20):
+        augmenter(batch)
+    print(f"{(time.perf_counter() - start) / 20 * 1000:.1f} ms per {batch.shape} batch with {', '.join(augmenter.augmentations)}")
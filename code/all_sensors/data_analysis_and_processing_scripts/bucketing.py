@@ -0,0 +1,109 @@
+import glob
+import numpy as np
+from augmentation import sequence_lengths
+
+# Length-bucketed batching for CTC training: sequences are grouped into buckets by length and
+# each batch is padded only to its bucket boundary instead of the longest sequence overall,
+# so a single letter no longer costs as much compute as a whole phrase.
+# Labels travel as one int32 row per sample: [input length in samples, label indices..., 0 padding],
+# which make_ctc_loss() turns into per-sample logit_length and label_length.
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/data_analysis_and_processing_scripts/bucketing.py  (padded work, global vs bucketed)
+
+DOWNSAMPLE = 8  # Input samples per CLDNN output frame (three MaxPooling1D(2) layers)
+
+# === Batch Plan ===
+def bucket_boundaries(lengths, num_buckets=8, multiple=DOWNSAMPLE):
+    """Upper bucket lengths at evenly spaced quantiles of `lengths`, rounded up to `multiple`; the last covers the maximum."""
+    quantiles = np.quantile(lengths, np.linspace(0, 1, num_buckets + 1)[1:])
+    return np.unique(np.ceil(quantiles / multiple).astype(np.int64) * multiple)
+
+def plan_batches(lengths, boundaries, batch_size, rng=None):
+    """
+    List of (sample indices, padded length) batches. Each batch only holds samples of one bucket.
+    With `rng`, samples are shuffled within their bucket and the batch order is shuffled too.
+    """
+    buckets = np.searchsorted(boundaries, lengths)
+    batches = []
+    for bucket, boundary in enumerate(boundaries):
+        members = np.flatnonzero(buckets == bucket)
+        if rng is not None:
+            members = rng.permutation(members)
+        batches += [(members[start:start + batch_size], int(boundary)) for start in range(0, len(members), batch_size)]
+    if rng is not None:
+        batches = [batches[i] for i in rng.permutation(len(batches))]
+    return batches
+
+def pack_labels(labels, lengths):
+    """(n, 1 + max label length) int32: input length in samples, then the 0-padded label indices."""
+    labels = np.asarray(labels, dtype=np.int32)
+    return np.concatenate([np.asarray(lengths, dtype=np.int32)[:, np.newaxis], labels], axis=1)
+
+# === tf.data Pipeline ===
+def make_bucketed_dataset(x, labels, batch_size=32, lengths=None, boundaries=None, num_buckets=8,
+                          shuffle=True, seed=0):
+    """
+    tf.data.Dataset of (x batch cut to its bucket boundary, packed labels) from post-padded `x`
+    (n, max_length, features) and 0-padded `labels` (n, max_label_length).
+    Every pass (epoch) draws a new shuffle from default_rng([seed, epoch]).
+    """
+    import tensorflow as tf
+
+    x = np.asarray(x, dtype=np.float32)
+    lengths = sequence_lengths(x) if lengths is None else np.asarray(lengths)
+    boundaries = bucket_boundaries(lengths, num_buckets) if boundaries is None else np.asarray(boundaries)
+    boundaries = np.minimum(boundaries, x.shape[1])
+    packed = pack_labels(labels, lengths)
+    epochs = [0]
+
+    def batches():
+        rng = np.random.default_rng([seed, epochs[0]]) if shuffle else None
+        epochs[0] += 1
+        for indices, boundary in plan_batches(lengths, boundaries, batch_size, rng):
+            yield x[indices, :boundary], packed[indices]
+
+    return tf.data.Dataset.from_generator(batches, output_signature=(
+        tf.TensorSpec(shape=(None, None, x.shape[2]), dtype=tf.float32),
+        tf.TensorSpec(shape=(None, packed.shape[1]), dtype=tf.int32),
+    ))
+
+def make_ctc_loss(downsample=DOWNSAMPLE, blank_index=0):
+    """CTC loss for packed labels: logit_length = input length // downsample, label_length = non-blank labels."""
+    import tensorflow as tf
+
+    def ctc_loss(y_true, y_pred):
+        y_true = tf.cast(y_true, tf.int32)
+        input_length, labels = y_true[:, 0], y_true[:, 1:]
+        logit_length = tf.clip_by_value(input_length // downsample, 1, tf.shape(y_pred)[1])
+        label_length = tf.reduce_sum(tf.cast(tf.not_equal(labels, blank_index), tf.int32), axis=1)
+        return tf.nn.ctc_loss(
+            labels=labels,
+            logits=tf.transpose(y_pred, [1, 0, 2]),
+            label_length=label_length,
+            logit_length=logit_length,
+            logits_time_major=True,
+            blank_index=blank_index,
+        )
+    return ctc_loss
+
+# === Padded Work: Global vs Bucketed ===
+if __name__ == "__main__":
+    import pandas as pd
+    from segmentation import create_sequences, sensor_columns
+
+    csv_paths = sorted(glob.glob("all_sensors/dataset/all_data*.csv"))
+    data = pd.concat([pd.read_csv(path, encoding='utf-8-sig', skipinitialspace=True) for path in csv_paths], ignore_index=True)
+    data = data[data["Letter"] != "noise"]
+    sequences, labels = create_sequences(data, sensor_columns)
+    lengths = np.array([len(sequence) for sequence in sequences])
+
+    batch_size = 32
+    padded_steps = len(lengths) * lengths.max()
+    print(f"{len(lengths)} sequences, {lengths.sum()} samples, longest {lengths.max()}")
+    print(f"global padding: {padded_steps} time steps per epoch ({lengths.sum() / padded_steps:.1%} real)")
+    for num_buckets in (4, 8, 16):
+        boundaries = bucket_boundaries(lengths, num_buckets)
+        batches = plan_batches(lengths, boundaries, batch_size, np.random.default_rng(0))
+        steps = sum(len(indices) * boundary for indices, boundary in batches)
+        print(f"{num_buckets:>2} buckets: {steps} time steps per epoch ({lengths.sum() / steps:.1%} real, "
+              f"{padded_steps / steps:.1f}x less work), {len(batches)} batches")
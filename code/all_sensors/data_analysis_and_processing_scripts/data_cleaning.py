@@ -1,50 +1,96 @@
-import pandas as pd
+import argparse
+import glob
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from dataset_store import build_store_from_frames, default_store_path, label_boundaries, natural_key, read_recording_csv
+
+# Cleaning stage: trims the leading and trailing rows without pen pressure from every
+# label run (contiguous rows of one letter), so repeated recordings of the same letter
+# are trimmed separately. A row is active when any of the force channels is > 0.
+# Files are cleaned in parallel and written as <name>_cleaned.csv next to the input,
+# or all together into a dataset store (see dataset_store.py).
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/data_analysis_and_processing_scripts/data_cleaning.py "all_sensors/test_data/all_data_*.csv"
+
+# === Configuration ===
+default_input_pattern = "all_sensors/test_data/all_data_1.csv"
+force_columns = ['Force1', 'Force2', 'Force3']
+label_column = 'Letter'
+
+# === Trim Leading & Trailing Zero-Force Rows ===
+def active_rows(df, force_columns=force_columns):
+    """True where any force channel is > 0; unparsable values count as zero."""
+    forces = df[force_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    return (forces > 0).any(axis=1)
+
+def trim_mask(active, bounds):
+    """
+    Rows to keep when every run bounds[i]:bounds[i + 1] is trimmed to its first..last active row.
+    Uses running counts of active rows: a row is kept if its run has an active row at or before
+    it and one at or after it. Runs without any active row are kept as they are, inner zeros always.
+    """
+    counts = np.concatenate(([0], np.cumsum(active)))
+    lengths = np.diff(bounds)
+    run_start = np.repeat(counts[bounds[:-1]], lengths)
+    run_end = np.repeat(counts[bounds[1:]], lengths)
+    seen_before = counts[1:] > run_start  # Active rows in run_start..row
+    seen_after = run_end > counts[:-1]    # Active rows in row..run_end
+    return (seen_before & seen_after) | (run_end == run_start)
+
+def trim_force_zeros(df, force_columns=force_columns, label_column=label_column):
+    """Removes leading and trailing zero-force rows of each label run while preserving inner zeros."""
+    codes = pd.factorize(df[label_column])[0]
+    return df[trim_mask(active_rows(df, force_columns), label_boundaries(codes))]
+
+# === Process One File ===
+def cleaned_path(file_path):
+    return os.path.splitext(file_path)[0] + "_cleaned.csv"
+
+def clean_file(file_path, write_csv=True):
+    """
+    Returns (input path, rows before, rows after, output path or cleaned DataFrame).
+    For the store, unparsable sensor rows are dropped first, as in build_store().
+    """
+    df = pd.read_csv(file_path, encoding='utf-8-sig', skipinitialspace=True) if write_csv else read_recording_csv(file_path)
+    cleaned_df = trim_force_zeros(df)
+    if not write_csv:
+        return file_path, len(df), len(cleaned_df), cleaned_df
+    cleaned_df.to_csv(cleaned_path(file_path), index=False)
+    return file_path, len(df), len(cleaned_df), cleaned_path(file_path)
+
+# === Main Execution ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trim zero-force rows at both ends of every label run.")
+    parser.add_argument("inputs", nargs="*", default=[default_input_pattern], help="CSV files or glob patterns")
+    parser.add_argument("--format", choices=("csv", "store"), default="csv",
+                        help="csv: <name>_cleaned.csv next to each input; store: one dataset store")
+    parser.add_argument("--store", default=default_store_path + "_cleaned", help="Store folder for --format store")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    file_paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)
+                         if not path.endswith("_cleaned.csv")}, key=natural_key)
+    write_csv = args.format == "csv"
+    frames = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(clean_file, file_path, write_csv) for file_path in file_paths]
+        for file_path, future in zip(file_paths, futures):
+            try:
+                file_path, rows, kept, result = future.result()
+            except Exception as e:
+                print(f"❌ Error processing {file_path}: {e}")
+                continue
+            if write_csv:
+                print(f"✅ Cleaned dataset saved as {result} ({rows} -> {kept} rows)")
+            else:
+                print(f"✅ Cleaned {file_path} ({rows} -> {kept} rows)")
+                frames.append((os.path.basename(file_path), result))
 
-# === Function to Trim Leading & Trailing Zero-Force Rows ===
-def trim_force_zeros(sub_df, force_column="Force"):
-    """Removes leading and trailing zero-force rows while preserving inner zeros."""
-    force_values = sub_df[force_column].values
-
-    # Find indices where force is nonzero
-    nonzero_indices = [i for i, v in enumerate(force_values) if v > 0]
-
-    if nonzero_indices:
-        start, end = min(nonzero_indices), max(nonzero_indices)
-        return sub_df.iloc[start : end + 1]  # Keep only relevant rows
-    else:
-        return sub_df  # If all zeros, return as is
-
-# === Function to Process Multiple Files ===
-def process_files(file_paths, directories):
-    for file_path, directory in zip(file_paths, directories):
-        try:
-            # Load dataset
-            print(f"📂 Processing: {file_path}")
-            df = pd.read_csv(file_path)
-            
-            force_columns = ['Force1', 'Force2', 'Force3']  # Adjust force columns as needed
-            label_column = 'Letter'  
-            for col in force_columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-                cleaned_df = df.groupby(label_column, group_keys=False).apply(trim_force_zeros)
-
-            # Generate output file path within the same folder as the original
-            cleaned_file_path = file_path.replace(".csv", "_cleaned.csv")
-            cleaned_file_path = os.path.join(directory, cleaned_file_path)
-
-            # Save cleaned dataset
-            cleaned_df.to_csv(cleaned_file_path, index=False)
-            print(f"✅ Cleaned dataset saved as {cleaned_file_path}\n")
-
-        except Exception as e:
-            print(f"❌ Error processing {file_path}: {e}")
-
-# === User Input for Multiple File Paths ===
-file_paths = [
-    os.path.join(os.getcwd(), "all_sensors/test_data", "all_data_1.csv") # Add more file paths as needed
-]
-directories = [os.path.dirname(file_path) for file_path in file_paths]
-
-# Process all files
-process_files(file_paths, directories)
+    if frames:
+        store = build_store_from_frames(frames, args.store)
+        print(f"✅ {len(store)} rows, {len(store.segments)} segments -> {args.store}")
+    print(f"⏱️ Cleaned {len(file_paths)} files in {time.perf_counter() - start:.2f} s")
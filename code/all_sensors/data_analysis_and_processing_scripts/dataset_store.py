@@ -0,0 +1,155 @@
+import argparse
+import glob
+import json
+import os
+import re
+import time
+import numpy as np
+
+# Memory-mapped columnar copy of the recorded CSVs, built once and loaded in milliseconds:
+#   sensors.npy     float32 (rows, 12)  sensor matrix
+#   labels.npy      int16   (rows,)     label codes into index.json "labels"
+#   timestamps.npy  int64   (rows,)     nanoseconds since the epoch, MISSING_TIMESTAMP if unparsable
+#   segments.npy    structured          one record per label run per file: file, label, start, end
+#   index.json                          columns, label names and per-file row ranges
+# working directory should be NeverLateX
+# e.g. python3 all_sensors/data_analysis_and_processing_scripts/dataset_store.py "all_sensors/dataset/all_data*.csv"
+
+sensor_columns = ['Acc_X', 'Acc_Y', 'Acc_Z', 'Gyro_X', 'Gyro_Y', 'Gyro_Z',
+                  'Mag_X', 'Mag_Y', 'Mag_Z', 'Force1', 'Force2', 'Force3']
+default_store_path = "all_sensors/dataset_store"
+MISSING_TIMESTAMP = np.iinfo(np.int64).min
+SEGMENT_DTYPE = np.dtype([('file', '<i4'), ('label', '<i2'), ('start', '<i8'), ('end', '<i8')])
+
+def natural_key(path):
+    """all_data2.csv sorts before all_data10.csv."""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', os.path.basename(path))]
+
+def label_boundaries(codes):
+    """Start indices of the runs of identical consecutive label codes, plus len(codes)."""
+    return np.concatenate(([0], np.flatnonzero(codes[1:] != codes[:-1]) + 1, [len(codes)]))
+
+# === One-Time Conversion ===
+def read_recording_csv(csv_path):
+    """Recorded CSV as a DataFrame with numeric sensor columns; unparsable rows are dropped."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, encoding='utf-8-sig', skipinitialspace=True)
+    df[sensor_columns] = df[sensor_columns].apply(pd.to_numeric, errors='coerce')
+    return df.dropna(subset=sensor_columns)
+
+def build_store(csv_paths, store_path=default_store_path):
+    """Parses the CSVs once and writes the store."""
+    return build_store_from_frames([(os.path.basename(path), read_recording_csv(path)) for path in csv_paths], store_path)
+
+def build_store_from_frames(named_frames, store_path=default_store_path):
+    """Writes the store from (file name, DataFrame) pairs, e.g. the output of a cleaning stage."""
+    import pandas as pd
+
+    frames, files, row = [], [], 0
+    for name, df in named_frames:
+        files.append({'name': name, 'start': row, 'end': row + len(df)})
+        row += len(df)
+        frames.append(df)
+    data = pd.concat(frames, ignore_index=True)
+
+    label_names, codes = np.unique(data['Letter'].astype(str).to_numpy(), return_inverse=True)
+    codes = codes.astype(np.int16)
+    timestamps = pd.to_datetime(data['Timestamp'], errors='coerce')
+    timestamps = np.where(timestamps.isna(), MISSING_TIMESTAMP, timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64))
+
+    # Label runs never cross file boundaries
+    segments = []
+    for file_id, file in enumerate(files):
+        bounds = label_boundaries(codes[file['start']:file['end']]) + file['start']
+        runs = np.zeros(len(bounds) - 1, dtype=SEGMENT_DTYPE)
+        runs['file'], runs['start'], runs['end'] = file_id, bounds[:-1], bounds[1:]
+        runs['label'] = codes[runs['start']]
+        segments.append(runs[runs['end'] > runs['start']])
+
+    os.makedirs(store_path, exist_ok=True)
+    np.save(os.path.join(store_path, 'sensors.npy'), data[sensor_columns].to_numpy(dtype=np.float32))
+    np.save(os.path.join(store_path, 'labels.npy'), codes)
+    np.save(os.path.join(store_path, 'timestamps.npy'), timestamps.astype(np.int64))
+    np.save(os.path.join(store_path, 'segments.npy'), np.concatenate(segments))
+    with open(os.path.join(store_path, 'index.json'), 'w') as index_file:
+        json.dump({'columns': sensor_columns, 'labels': label_names.tolist(), 'files': files}, index_file, indent=2, ensure_ascii=False)
+    return DatasetStore(store_path)
+
+# === Loader ===
+class DatasetStore:
+    """
+    Read-only, memory-mapped view of a store built by build_store().
+    Arrays are mapped lazily by the OS; segment and file accessors return
+    zero-copy views into the sensor matrix.
+    """
+
+    def __init__(self, store_path=default_store_path):
+        with open(os.path.join(store_path, 'index.json')) as index_file:
+            index = json.load(index_file)
+        self.columns = index['columns']
+        self.label_names = index['labels']
+        self.files = index['files']
+        self.label_codes = {name: code for code, name in enumerate(self.label_names)}
+        self.file_ids = {file['name']: file_id for file_id, file in enumerate(self.files)}
+
+        self.sensors = np.load(os.path.join(store_path, 'sensors.npy'), mmap_mode='r')
+        self.labels = np.load(os.path.join(store_path, 'labels.npy'), mmap_mode='r')
+        self.timestamps = np.load(os.path.join(store_path, 'timestamps.npy'), mmap_mode='r')
+        self.segments = np.load(os.path.join(store_path, 'segments.npy'))
+
+    def __len__(self):
+        return len(self.sensors)
+
+    def select(self, label=None, file=None, exclude=('noise',)):
+        """Segment records filtered by label name(s) and/or file name(s); labels in `exclude` are dropped."""
+        mask = np.ones(len(self.segments), dtype=bool)
+        if label is not None:
+            labels = [label] if isinstance(label, str) else label
+            mask &= np.isin(self.segments['label'], [self.label_codes[name] for name in labels if name in self.label_codes])
+        if file is not None:
+            files = [file] if isinstance(file, str) else file
+            mask &= np.isin(self.segments['file'], [self.file_ids[name] for name in files])
+        if exclude:
+            mask &= ~np.isin(self.segments['label'], [self.label_codes[name] for name in exclude if name in self.label_codes])
+        return self.segments[mask]
+
+    def segment(self, record):
+        """(label name, samples view) of one segment record."""
+        return self.label_names[record['label']], self.sensors[record['start']:record['end']]
+
+    def iter_segments(self, label=None, file=None, exclude=('noise',)):
+        for record in self.select(label, file, exclude):
+            yield self.segment(record)
+
+    def file_rows(self, name):
+        """(samples view, label codes view) of one recorded file."""
+        file = self.files[self.file_ids[name]]
+        return self.sensors[file['start']:file['end']], self.labels[file['start']:file['end']]
+
+    def to_frame(self, file=None):
+        """pandas DataFrame shaped like the concatenated CSVs (sensor columns + Letter), for the notebooks."""
+        import pandas as pd
+
+        rows = slice(None) if file is None else slice(self.files[self.file_ids[file]]['start'], self.files[self.file_ids[file]]['end'])
+        df = pd.DataFrame(self.sensors[rows], columns=self.columns)
+        df['Letter'] = np.array(self.label_names, dtype=object)[self.labels[rows]]
+        return df
+
+# === Main Execution ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert recorded CSVs into a memory-mapped dataset store.")
+    parser.add_argument("csv", nargs="+", help="CSV files or glob patterns, e.g. \"all_sensors/dataset/all_data*.csv\"")
+    parser.add_argument("--output", default=default_store_path)
+    args = parser.parse_args()
+
+    csv_paths = sorted({path for pattern in args.csv for path in glob.glob(pattern)}, key=natural_key)
+    start = time.perf_counter()
+    store = build_store(csv_paths, args.output)
+    print(f"✅ {len(store)} rows, {len(store.segments)} segments from {len(csv_paths)} files -> {args.output} "
+          f"({time.perf_counter() - start:.1f} s)")
+
+    start = time.perf_counter()
+    store = DatasetStore(args.output)
+    count = sum(1 for _ in store.iter_segments())
+    print(f"⏱️ Reopened store and walked {count} labelled segments in {(time.perf_counter() - start) * 1000:.1f} ms")
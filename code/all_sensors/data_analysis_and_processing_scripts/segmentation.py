@@ -0,0 +1,65 @@
+import numpy as np
+
+# Vectorized replacement for the create_sequences() loop of the training notebooks:
+# label runs are found with one comparison of neighbouring labels, and every sequence is a
+# float32 view into one contiguous array instead of a stack of per-row Series.
+# Parity with the old loop: tests/test_segmentation.py
+
+sensor_columns = ['Acc_X', 'Acc_Y', 'Acc_Z', 'Gyro_X', 'Gyro_Y', 'Gyro_Z',
+                  'Mag_X', 'Mag_Y', 'Mag_Z', 'Force1', 'Force2', 'Force3']
+
+# === Label Runs ===
+def segment_runs(labels):
+    """
+    Offsets (n_runs + 1,) of the runs of identical consecutive labels and the label of each run.
+    Run i covers rows offsets[i]:offsets[i + 1].
+    """
+    labels = np.asarray(labels)
+    if not len(labels):
+        return np.zeros(1, dtype=np.int64), []
+    # Elementwise != like the loop's comparison, so NaN labels (empty cells) never join a run
+    offsets = np.concatenate(([0], np.flatnonzero(labels[1:] != labels[:-1]) + 1, [len(labels)]))
+    return offsets, labels[offsets[:-1]].tolist()
+
+def create_sequences(data, sensor_columns=sensor_columns, label_column="Letter"):
+    """
+    Groups consecutive rows with the same label into sequences, like the notebook loop.
+    Returns (object array of float32 (length, features) views, labels).
+    """
+    values = np.ascontiguousarray(data[sensor_columns].to_numpy(dtype=np.float32))
+    offsets, labels = segment_runs(data[label_column].to_numpy())
+    sequences = np.empty(len(labels), dtype=object)
+    for i, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+        sequences[i] = values[start:end]
+    return sequences, labels
+
+# === Bulk Filtering and Padding ===
+def pad_sequences_bulk(sequences, maxlen=None, min_length=0, padding='post', truncating='pre', value=0.0):
+    """
+    Drops sequences shorter than `min_length` and pads/truncates the rest into one
+    (n, maxlen, features) float32 array with a single scatter, matching
+    keras pad_sequences(dtype='float32'). Returns (padded, keep mask over `sequences`).
+    """
+    lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+    keep = lengths >= min_length
+    kept = [sequence for sequence, kept in zip(sequences, keep) if kept]
+    lengths = lengths[keep]
+    if maxlen is None:
+        maxlen = int(lengths.max()) if len(lengths) else 0
+    num_features = kept[0].shape[1] if kept else 0
+
+    padded = np.full((len(kept), maxlen, num_features), value, dtype=np.float32)
+    if not kept or not maxlen:
+        return padded, keep
+
+    data = np.concatenate(kept).astype(np.float32, copy=False)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    used = np.minimum(lengths, maxlen)
+    if truncating == 'pre':
+        starts = starts + lengths - used  # Keep the last maxlen samples
+
+    rows = np.repeat(np.arange(len(kept)), used)
+    within = np.arange(used.sum()) - np.repeat(np.cumsum(used) - used, used)
+    steps = within if padding == 'post' else within + np.repeat(maxlen - used, used)
+    padded[rows, steps] = data[np.repeat(starts, used) + within]
+    return padded, keep
@@ -1,43 +1,78 @@
-import pandas as pd
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+import pandas as pd
+
+# Calibration stage: adds Roll, Pitch and gravity-compensated linear acceleration
+# (Lin_Acc_X/Y/Z) to every recording, computed over whole columns at once.
+# Files are processed in parallel; outputs newer than their input (and this script) are skipped.
+# e.g. python3 calibration.py "test_data/fajar_data/all_data_*.csv" --output test_data/fajar_data_calibrated/
+
+# === Configuration ===
+default_input_pattern = "test_data/fajar_data/all_data_*.csv"
+default_output_folder = "test_data/fajar_data_calibrated/"
+GRAVITY = 1000  # Accelerometer reading for 1 g
+
+# === Step 1: Compute Roll & Pitch from Accelerometer ===
+def compute_roll_pitch(acc_x, acc_y, acc_z):
+    roll = np.arctan2(-acc_y, acc_z) * 180.0 / np.pi
+    pitch = np.arctan2(acc_x, np.sqrt(acc_y**2 + acc_z**2)) * 180.0 / np.pi
+    return roll, pitch
+
+# === Step 2: Gravity Compensation ===
+def apply_gravity_compensation(acc_x, acc_y, acc_z, roll, pitch):
+    gravity_x = -np.sin(np.radians(pitch)) * GRAVITY
+    gravity_y = np.cos(np.radians(pitch)) * np.sin(np.radians(roll)) * GRAVITY
+    gravity_z = np.cos(np.radians(pitch)) * np.cos(np.radians(roll)) * GRAVITY
+
+    lin_acc_x = acc_x - gravity_x
+    lin_acc_y = acc_y - gravity_y
+    lin_acc_z = acc_z - gravity_z
+
+    return lin_acc_x, lin_acc_y, lin_acc_z
+
+def calibrate(df):
+    """Adds the calibrated columns to `df` in place; all inputs are whole columns."""
+    acc_x, acc_y, acc_z = (df[column].to_numpy(dtype=np.float64) for column in ("Acc_X", "Acc_Y", "Acc_Z"))
+    df["Roll"], df["Pitch"] = compute_roll_pitch(acc_x, acc_y, acc_z)
+    df["Lin_Acc_X"], df["Lin_Acc_Y"], df["Lin_Acc_Z"] = apply_gravity_compensation(
+        acc_x, acc_y, acc_z, df["Roll"].to_numpy(), df["Pitch"].to_numpy())
+    return df
+
+# === Step 3: Calibrate One File ===
+def is_up_to_date(input_path, output_path):
+    if not os.path.exists(output_path):
+        return False
+    newest_source = max(os.path.getmtime(input_path), os.path.getmtime(__file__))
+    return os.path.getmtime(output_path) >= newest_source
+
+def calibrate_file(input_path, output_path):
+    df = pd.read_csv(input_path)
+    calibrate(df).to_csv(output_path, index=False)
+    return output_path, len(df)
+
+# === Main Execution ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add roll, pitch and linear acceleration to recorded CSVs.")
+    parser.add_argument("inputs", nargs="*", default=[default_input_pattern], help="CSV files or glob patterns")
+    parser.add_argument("--output", default=default_output_folder, help="Folder for the calibrated CSVs (same file names)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="Recalibrate files that are already up to date")
+    args = parser.parse_args()
+
+    input_paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    os.makedirs(args.output, exist_ok=True)
+    jobs = [(path, os.path.join(args.output, os.path.basename(path))) for path in input_paths]
+    todo = [(source, target) for source, target in jobs if args.force or not is_up_to_date(source, target)]
+    print(f"{len(input_paths)} files, {len(jobs) - len(todo)} up to date, calibrating {len(todo)}")
 
-num_files = 50
-folder_path = "test_data/fajar_data/"
-output_folder_path = "test_data/fajar_data_calibrated/"
-for i in range(num_files):
-    # === Load Data ===
-    file_path = f"all_data_{i+1}.csv"  
-    file_path = folder_path + file_path
-    df = pd.read_csv(file_path)
-
-    # === Step 1: Compute Roll & Pitch from Accelerometer ===
-    def compute_roll_pitch(acc_x, acc_y, acc_z):
-        roll = np.arctan2(-acc_y, acc_z) * 180.0 / np.pi
-        pitch = np.arctan2(acc_x, np.sqrt(acc_y**2 + acc_z**2)) * 180.0 / np.pi
-        return roll, pitch
-
-    df["Roll"], df["Pitch"] = zip(*df.apply(lambda row: compute_roll_pitch(row["Acc_X"], row["Acc_Y"], row["Acc_Z"]), axis=1))
-
-    # === Step 3: Gravity Compensation ===
-    def apply_gravity_compensation(acc_x, acc_y, acc_z, roll, pitch):
-        gravity_x = -np.sin(np.radians(pitch)) * 1000
-        gravity_y = np.cos(np.radians(pitch)) * np.sin(np.radians(roll)) * 1000
-        gravity_z = np.cos(np.radians(pitch)) * np.cos(np.radians(roll)) * 1000
-
-        lin_acc_x = acc_x - gravity_x
-        lin_acc_y = acc_y - gravity_y
-        lin_acc_z = acc_z - gravity_z
-
-        return lin_acc_x, lin_acc_y, lin_acc_z
-
-    df["Lin_Acc_X"], df["Lin_Acc_Y"], df["Lin_Acc_Z"] = zip(*df.apply(
-        lambda row: apply_gravity_compensation(row["Acc_X"], row["Acc_Y"], row["Acc_Z"], row["Roll"], row["Pitch"]),
-        axis=1
-    ))
-
-    # === Step 4: Save Calibrated Data ===
-    output_file_path = f"all_data_{i+1}.csv"  
-    output_file_path = output_folder_path + output_file_path
-    df.to_csv(output_file_path, index=False)
-
-    print(f"Calibration complete! Saved as '{output_file_path}'")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(calibrate_file, source, target) for source, target in todo]
+        for future in futures:
+            output_path, rows = future.result()
+            print(f"Calibration complete! Saved as '{output_path}' ({rows} rows)")
+    print(f"⏱️ Calibrated {len(todo)} files in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The scripts import their siblings directly, as when run from their own folders
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ('all_sensors', 'data_analysis_and_processing_scripts'):
+    sys.path.insert(0, os.path.join(ROOT, folder))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from augmentation import Augmenter, AUGMENTATIONS, sequence_lengths, time_warp
+
+@pytest.fixture
+def padded_batch():
+    rng = np.random.default_rng(1)
+    lengths = rng.integers(50, 300, size=8)
+    batch = rng.normal(size=(8, 300, 12)).astype(np.float32)
+    batch[np.arange(300)[np.newaxis, :] >= lengths[:, np.newaxis]] = 0
+    return batch, lengths
+
+def test_same_seed_gives_the_same_batches(padded_batch):
+    batch, _ = padded_batch
+    first, second = Augmenter(seed=42), Augmenter(seed=42)
+    for _ in range(3):
+        np.testing.assert_array_equal(first(batch), second(batch))
+    assert not np.array_equal(Augmenter(seed=42)(batch), Augmenter(seed=43)(batch))
+
+def test_consecutive_batches_differ(padded_batch):
+    batch, _ = padded_batch
+    augmenter = Augmenter(seed=42)
+    assert not np.array_equal(augmenter(batch), augmenter(batch))
+    augmenter.reset()
+    np.testing.assert_array_equal(augmenter(batch), Augmenter(seed=42)(batch))
+
+@pytest.mark.parametrize('augmentations', [AUGMENTATIONS] + [(name,) for name in AUGMENTATIONS])
+def test_padded_rows_stay_zero(padded_batch, augmentations):
+    batch, lengths = padded_batch
+    augmented = Augmenter(seed=42, augmentations=augmentations)(batch)
+    assert augmented.shape == batch.shape and augmented.dtype == np.float32
+    padding = np.arange(batch.shape[1])[np.newaxis, :] >= lengths[:, np.newaxis]
+    assert not augmented[padding].any()
+    np.testing.assert_array_equal(sequence_lengths(augmented), lengths)
+
+def test_time_warp_preserves_sequence_lengths(padded_batch):
+    batch, lengths = padded_batch
+    warped = time_warp(batch, np.random.default_rng(0), sigma=0.5)
+    np.testing.assert_array_equal(sequence_lengths(warped), lengths)
+    # Same start and end sample, only the time axis in between is warped
+    rows = np.arange(len(batch))
+    np.testing.assert_allclose(warped[:, 0], batch[:, 0])
+    np.testing.assert_allclose(warped[rows, lengths - 1], batch[rows, lengths - 1], rtol=1e-5)
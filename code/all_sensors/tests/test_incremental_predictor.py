@@ -0,0 +1,20 @@
+import numpy as np
+from inference import IncrementalPredictor
+
+def mean_logits(batch):
+    return batch.reshape(len(batch), -1, 4, batch.shape[2]).mean(axis=2)  # (n, chunk_size / 4, features)
+
+def test_list_window_matches_array_window():
+    window = np.random.default_rng(0).normal(size=(64, 3)).astype(np.float32)
+    from_array = IncrementalPredictor(mean_logits, 16).update(window, 0)
+    from_list = IncrementalPredictor(mean_logits, 16).update(window.tolist(), 0)
+    np.testing.assert_allclose(from_list, from_array)
+
+def test_hop_only_predicts_new_chunks():
+    calls = []
+    predictor = IncrementalPredictor(lambda batch: calls.append(len(batch)) or mean_logits(batch), 16)
+    stream = np.random.default_rng(1).normal(size=(96, 3)).astype(np.float32)
+    first = predictor.update(stream[:64], 0)
+    second = predictor.update(stream[32:96], 32)
+    assert calls == [7, 4]  # Chunks every 8 samples; the second window shares 3 of its 7 chunks
+    np.testing.assert_allclose(second[:len(first) // 2], first[len(first) // 2:])
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+from serial_ingest import SerialIngest, FakeSerial
+from metrics import Metrics, instrument_ingest
+
+CODE = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def test_imports_through_the_package_path():
+    # all_sensors_only_prediction.py and all_sensors_with_prediction.py run from code/ and import
+    # all_sensors.all_sensors.metrics; a fresh interpreter has only code/ on its path
+    result = subprocess.run([sys.executable, '-c', 'import all_sensors.all_sensors.metrics'],
+                            cwd=CODE, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+def test_instrumented_ingest_counts_and_times_each_stage():
+    metrics = Metrics()
+    stream = b'System Activated\r\n' + b'1, 2, 3\r\n' * 4 + b'1, x, 3\r\n'
+    ser = FakeSerial(stream)
+    ingest = instrument_ingest(metrics, SerialIngest(ser, 3), pen='fake')
+    ingest.read()
+    snapshot = metrics.snapshot()
+    assert snapshot['counters'] == {'bytes': len(stream), 'samples': 4, 'malformed_lines': 1}
+    assert snapshot['stages_ms']['parse']['count'] == snapshot['stages_ms']['serial_read']['count'] == 1
+    assert snapshot['gauges'] == {'serial_in_waiting_bytes{pen="fake"}': 0}
+    assert 'neverlatex_samples_total 4' in metrics.prometheus_text()
@@ -0,0 +1,67 @@
+import numpy as np
+from pen_activity import PenActivityDetector, PenGate, FORCE_CHANNELS
+from ring_buffer import RingBuffer
+
+def block(levels, channel=FORCE_CHANNELS[0]):
+    """Raw samples whose strongest force channel follows `levels` (others at the resting baseline)."""
+    samples = np.full((len(levels), 12), 20, dtype=np.float32)
+    samples[:, channel] = levels
+    return samples
+
+def test_hysteresis_carries_across_block_boundaries():
+    detector = PenActivityDetector(on_threshold=150, off_threshold=100, hold_samples=0)
+    # Between the thresholds (120) the pen keeps its state, also at the start of the next block
+    np.testing.assert_array_equal(detector.update(block([20, 200, 120])), [False, True, True])
+    np.testing.assert_array_equal(detector.update(block([120, 90, 120])), [True, False, False])
+    np.testing.assert_array_equal(detector.update(block([120, 150])), [False, True])
+
+def test_any_block_split_matches_one_block():
+    levels = np.random.default_rng(0).choice([20, 90, 120, 160, 300], size=200)
+    expected = PenActivityDetector(hold_samples=5).update(block(levels))
+    for split in (1, 7, 50, 199):
+        detector = PenActivityDetector(hold_samples=5)
+        active = np.concatenate([detector.update(block(levels[:split])), detector.update(block(levels[split:]))])
+        np.testing.assert_array_equal(active, expected)
+
+def test_hold_samples_bridge_short_pressure_dips():
+    detector = PenActivityDetector(hold_samples=3)
+    active = detector.update(block([20, 200, 20, 20, 20, 20, 20]))
+    np.testing.assert_array_equal(active, [False, True, True, True, True, False, False])
+    assert detector.last_active == 1 + 3
+    # A dip shorter than hold_samples does not split the stroke, even across blocks
+    detector = PenActivityDetector(hold_samples=3)
+    assert detector.update(block([200, 20])).all() and detector.update(block([20, 200])).all()
+
+def test_stroke_end_runs_exactly_one_extra_hop():
+    gate = PenGate(PenActivityDetector(hold_samples=0), hop_size=4)
+    end = 0
+    results = []
+    for levels in ([200] * 4, [200, 20, 20, 20], [20] * 4, [20] * 4, [20] * 4, [200] * 4):
+        gate.observe(block(levels))
+        end += len(levels)
+        results.append(gate.hop(end))
+    assert results == [(True, False), (True, False), (True, True), (False, False), (False, False), (True, False)]
+    assert gate.hops == 6 and gate.skipped == 2
+
+def test_reset_keeps_indices_in_step_with_ring_buffer():
+    buffer = RingBuffer(8, 12)
+    gate = PenGate(PenActivityDetector(hold_samples=2), hop_size=4)
+    for levels in ([200] * 6, [20] * 3):
+        gate.observe(block(levels))
+        buffer.append(block(levels))
+
+    # A session marker clears the buffer and resets the gate; absolute indices keep counting
+    buffer.clear()
+    gate.reset()
+    assert gate.detector.samples_seen == buffer.end == 9
+    assert not gate.in_stroke and gate.detector.last_active == -np.inf
+
+    gate.observe(block([20] * 4))
+    buffer.append(block([20] * 4))
+    assert gate.hop(buffer.end) == (False, False)  # No stroke end is reported for the previous session
+
+    gate.observe(block([20, 200, 20, 20]))
+    buffer.append(block([20, 200, 20, 20]))
+    assert gate.detector.samples_seen == buffer.end == 17
+    assert gate.detector.last_active == buffer.end - 3 + 2
+    assert gate.hop(buffer.end) == (True, False)
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from serial_ingest import SerialIngest, SAMPLES, CONTROL
+from sensor_protocol import BinaryIngest
+from replay import encode_recording
+
+def recording():
+    samples = np.arange(7 * 12, dtype=np.float32).reshape(7, 12)
+    return samples, np.array(['a', 'a', 'b', 'b', 'b', 'noise', 'a'])
+
+@pytest.mark.parametrize('protocol', ['ascii', 'binary'])
+def test_recording_framing_is_one_session(protocol):
+    samples, labels = recording()
+    stream, sample_ends = encode_recording(samples, labels, protocol)
+    ingest = BinaryIngest(None) if protocol == 'binary' else SerialIngest(None)
+    events = ingest.feed(stream)
+    assert [payload for kind, payload in events if kind == CONTROL] == ['System Activated', 'System Deactivated']
+    np.testing.assert_array_equal(np.concatenate([payload for kind, payload in events if kind == SAMPLES]), samples)
+    assert sample_ends[-1] < len(stream) and np.all(np.diff(sample_ends) > 0)
+
+def test_label_run_framing_toggles_around_every_run():
+    samples, labels = recording()
+    events = SerialIngest(None).feed(encode_recording(samples, labels, sessions='label_runs')[0])
+    controls = [payload for kind, payload in events if kind == CONTROL]
+    assert controls == ['System Activated', 'System Deactivated'] * 4
+
+def test_unknown_framing_is_rejected():
+    with pytest.raises(ValueError):
+        encode_recording(*recording(), sessions='letters')
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from segmentation import create_sequences, pad_sequences_bulk, sensor_columns
+
+# === Reference: the previous notebook loop ===
+def create_sequences_iterrows(data, sensor_columns=sensor_columns):
+    sequences = []
+    labels = []
+    current_label = None
+    current_sequence = []
+
+    for _, row in data.iterrows():
+        if row["Letter"] != current_label:
+            if current_sequence:
+                sequences.append(np.array(current_sequence))
+                labels.append(current_label)
+            current_label = row["Letter"]
+            current_sequence = []
+        current_sequence.append(row[sensor_columns].values)
+
+    if current_sequence:
+        sequences.append(np.array(current_sequence))
+        labels.append(current_label)
+
+    return np.array(sequences, dtype=object), labels
+
+def recording(letters, seed=0):
+    """Synthetic recording with one row per entry of `letters` (np.nan for an empty Letter cell)."""
+    data = pd.DataFrame(np.random.default_rng(seed).standard_normal((len(letters), len(sensor_columns))), columns=sensor_columns)
+    data["Letter"] = pd.Series(letters, dtype=object)
+    return data
+
+LETTERS = (['noise'] * 3 + ['a'] * 4 + [np.nan] * 2 + ['b'] + ['noise'] * 2 + ['a'] * 3
+           + [np.nan] + ['cat'] * 5 + ['c'] * 2)  # Ends in a run that no label change closes
+
+def same_label(a, b):
+    return (pd.isna(a) and pd.isna(b)) or a == b
+
+def test_create_sequences_matches_loop():
+    data = recording(LETTERS)
+    expected_sequences, expected_labels = create_sequences_iterrows(data)
+    sequences, labels = create_sequences(data)
+
+    assert len(labels) == len(expected_labels)
+    assert all(same_label(label, expected) for label, expected in zip(labels, expected_labels))
+    assert [len(sequence) for sequence in sequences] == [len(sequence) for sequence in expected_sequences]
+    for actual, expected in zip(sequences, expected_sequences):
+        np.testing.assert_array_equal(actual, np.asarray(expected, dtype=np.float32))
+    assert labels[-1] == 'c' and len(sequences[-1]) == 2
+
+def test_create_sequences_matches_loop_without_noise():
+    data = recording(LETTERS, seed=1)
+    data = data[data["Letter"] != "noise"]  # As the notebooks filter before segmenting
+    expected_sequences, expected_labels = create_sequences_iterrows(data)
+    sequences, labels = create_sequences(data)
+    assert all(same_label(label, expected) for label, expected in zip(labels, expected_labels))
+    for actual, expected in zip(sequences, expected_sequences):
+        np.testing.assert_array_equal(actual, np.asarray(expected, dtype=np.float32))
+
+def test_pad_sequences_bulk_matches_padding_loop():
+    sequences, _ = create_sequences(recording(LETTERS))
+    padded, keep = pad_sequences_bulk(sequences, min_length=2)
+    reference = [sequence for sequence in sequences if len(sequence) >= 2]
+    assert keep.sum() == len(reference) and padded.shape == (len(reference), 5, len(sensor_columns))
+    for row, sequence in zip(padded, reference):
+        np.testing.assert_array_equal(row[:len(sequence)], sequence)
+        assert not row[len(sequence):].any()
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from serial_ingest import SAMPLES, CONTROL
+from sensor_protocol import (FrameDecoder, BinaryIngest, encode_frames, FRAME_SAMPLE, FRAME_ACTIVATED,
+                             FRAME_DEACTIVATED, FRAME_SIZE)
+
+def recorded_values(count, seed=0):
+    return np.random.default_rng(seed).integers(-32768, 32768, (count, 12), dtype=np.int16)
+
+def sample_stream(values, first_seq=0):
+    return encode_frames(FRAME_SAMPLE, values, first_seq + np.arange(len(values)), 1000 * np.arange(len(values)))
+
+def test_round_trip_is_exact():
+    values = recorded_values(50)
+    frames = FrameDecoder().feed(sample_stream(values))
+    np.testing.assert_array_equal(frames['values'], values)
+    np.testing.assert_array_equal(frames['seq'], np.arange(50))
+
+    ingest = BinaryIngest(None)
+    stream = encode_frames(FRAME_ACTIVATED, np.zeros(12), 0, 0) + sample_stream(values, 1) + encode_frames(FRAME_DEACTIVATED, np.zeros(12), 51, 0)
+    events = ingest.feed(stream)
+    assert [kind for kind, _ in events] == [CONTROL, SAMPLES, CONTROL]
+    assert events[0][1] == 'System Activated' and events[2][1] == 'System Deactivated'
+    assert events[1][1].dtype == np.float32
+    np.testing.assert_array_equal(events[1][1], values.astype(np.float32))
+
+def test_corrupted_frame_is_rejected_by_crc():
+    values = recorded_values(5)
+    stream = bytearray(sample_stream(values))
+    stream[2 * FRAME_SIZE + 10] ^= 0xFF  # Flip a value byte of the third frame
+    decoder = FrameDecoder()
+    frames = decoder.feed(bytes(stream))
+    np.testing.assert_array_equal(frames['values'], values[[0, 1, 3, 4]])
+    assert decoder.crc_errors == 1
+    assert decoder.seq_gaps == 1
+
+def test_resync_after_garbage_bytes():
+    values = recorded_values(6)
+    stream = sample_stream(values[:3]) + b'\x00\x5a\x13garbage\xa5' + sample_stream(values[3:], 3)
+    decoder = FrameDecoder()
+    frames = decoder.feed(stream)
+    np.testing.assert_array_equal(frames['values'], values)
+    assert decoder.skipped_bytes == 11
+    assert decoder.seq_gaps == 0
+
+def test_frame_split_across_reads():
+    values = recorded_values(4)
+    stream = sample_stream(values)
+    decoder = FrameDecoder()
+    cut = FRAME_SIZE + 17  # Inside the second frame
+    first, second = decoder.feed(stream[:cut]), decoder.feed(stream[cut:])
+    assert len(first) == 1 and len(second) == 3
+    np.testing.assert_array_equal(np.concatenate([first, second])['values'], values)
+
+    # Byte by byte, as a slow port would deliver it
+    decoder = FrameDecoder()
+    frames = np.concatenate([decoder.feed(stream[i:i + 1]) for i in range(len(stream))])
+    np.testing.assert_array_equal(frames['values'], values)
+
+def test_imports_through_the_package_path():
+    # all_sensors_only_prediction.py and all_sensors_with_prediction.py run from code/ and import
+    # all_sensors.all_sensors.sensor_protocol; a fresh interpreter has only code/ on its path
+    code = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = subprocess.run([sys.executable, '-c', 'import all_sensors.all_sensors.sensor_protocol'],
+                            cwd=code, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
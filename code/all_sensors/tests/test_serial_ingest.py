@@ -0,0 +1,61 @@
+import numpy as np
+from serial_ingest import SerialIngest, FakeSerial, SAMPLES, CONTROL, MALFORMED
+
+def sample_line(values):
+    return (','.join(f'{value:g}' for value in values) + '\r\n').encode()
+
+def rows(count, seed=0):
+    return np.round(np.random.default_rng(seed).uniform(-500, 500, (count, 12)), 2).astype(np.float32)
+
+def test_partial_lines_are_kept_until_complete():
+    values = rows(3)
+    stream = b''.join(sample_line(row) for row in values)
+    port = FakeSerial()
+    ingest = SerialIngest(port)
+
+    cut = len(sample_line(values[0])) + 7  # Inside the second line
+    port.write(stream[:cut])
+    first = ingest.read()
+    assert [kind for kind, _ in first] == [SAMPLES]
+    np.testing.assert_array_equal(first[0][1], values[:1])
+    assert port.in_waiting == 0 and ingest.pending  # The partial line waits for the next read
+
+    port.write(stream[cut:])
+    second = ingest.read()
+    np.testing.assert_array_equal(second[0][1], values[1:])
+    assert ingest.read() == [] and ingest.pending == b''
+
+def test_session_markers_split_sample_blocks():
+    values = rows(5, seed=1)
+    stream = (b'System Activated\r\n' + b''.join(sample_line(row) for row in values[:2])
+              + b'System Deactivated\r\n' + b'System Activated\r\n' + b''.join(sample_line(row) for row in values[2:]))
+    events = SerialIngest(FakeSerial(stream)).read()
+
+    assert [kind for kind, _ in events] == [CONTROL, SAMPLES, CONTROL, CONTROL, SAMPLES]
+    assert [payload for kind, payload in events if kind == CONTROL] == ['System Activated', 'System Deactivated', 'System Activated']
+    blocks = [payload for kind, payload in events if kind == SAMPLES]
+    assert all(block.dtype == np.float32 and block.shape[1] == 12 for block in blocks)
+    np.testing.assert_array_equal(np.concatenate(blocks), values)
+
+def test_malformed_rows_are_reported_in_order():
+    values = rows(4, seed=2)
+    stream = (sample_line(values[0]) + b'1,2,3\r\n' + sample_line(values[1])
+              + b'1-2,' + b'0,' * 10 + b'0\r\n'  # Numeric characters, twelve fields, but not a number
+              + sample_line(values[2]) + b'\xff\xfe garbage\r\n' + b'\r\n' + sample_line(values[3]))
+    events = SerialIngest(FakeSerial(stream)).read()
+
+    assert [kind for kind, _ in events] == [SAMPLES, MALFORMED, SAMPLES, MALFORMED, SAMPLES, MALFORMED, SAMPLES]
+    assert events[1][1] == '1,2,3'
+    assert events[3][1].startswith('1-2,')
+    np.testing.assert_array_equal(np.concatenate([payload for kind, payload in events if kind == SAMPLES]), values)
+
+def test_byte_by_byte_matches_one_read():
+    values = rows(6, seed=3)
+    stream = b'System Activated\n' + b''.join(sample_line(row) for row in values) + b'bad line\n'
+    whole = SerialIngest(None).feed(stream)
+
+    ingest = SerialIngest(None)
+    pieces = [event for i in range(len(stream)) for event in ingest.feed(stream[i:i + 1])]
+    assert [kind for kind, _ in pieces][0] == CONTROL and pieces[-1] == (MALFORMED, 'bad line')
+    np.testing.assert_array_equal(np.concatenate([p for k, p in pieces if k == SAMPLES]),
+                                  np.concatenate([p for k, p in whole if k == SAMPLES]))
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+from inference import build_vocabulary, save_vocabulary, load_vocabulary, vocabulary_path
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'all_sensors')
+
+def vocabulary_with_hash_seed(seed):
+    code = ("from characters import get_complete_set; from inference import build_vocabulary; "
+            "print(build_vocabulary(set(c for label in get_complete_set() for c in label)))")
+    env = dict(os.environ, PYTHONHASHSEED=str(seed))
+    return subprocess.run([sys.executable, '-c', code], cwd=SCRIPTS, env=env, capture_output=True, text=True, check=True).stdout
+
+def test_vocabulary_does_not_depend_on_the_hash_seed():
+    assert len({vocabulary_with_hash_seed(seed) for seed in (0, 1, 2)}) == 1
+
+def test_saved_vocabulary_wins_over_the_character_set(tmp_path):
+    model_path = str(tmp_path / 'cldnn_full_model.h5')
+    trained = ['BLANK', 'é', 'b', 'a']  # Order of an older, set-ordered training run
+    save_vocabulary(vocabulary_path(model_path), trained)
+    assert vocabulary_path(model_path).endswith('cldnn_full_model_vocabulary.json')
+    assert load_vocabulary(model_path, {'a', 'b', 'é'}) == trained
+
+def test_missing_vocabulary_falls_back_to_sorted_characters(tmp_path):
+    assert load_vocabulary(str(tmp_path / 'model.h5'), {'c', 'a', 'b'}) == build_vocabulary({'b', 'c', 'a'}) == ['BLANK', 'a', 'b', 'c']